@@ -1,12 +1,46 @@
 import os
-import fnmatch
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import threading
-import psutil
-import platform
-import cpuinfo
+import queue
+import re
+from file_index import FileIndex
+from index_watcher import IndexWatcher
+from index_snapshot import load_snapshot, write_snapshot
+from pattern_matcher import PatternMatcher
+from file_query import FileQuery, QueryError, looks_like_query
+from content_search import ContentSearch
+from archive_search import ArchiveSearch, ArchiveCache, ARCHIVE_MATCHER
+from duplicates import DuplicateFinder
+from mounts import mount_exclusions
+from disk_usage import DiskUsageWindow
+from fuzzy_finder import NameTable, FuzzyFinderWindow
+from path_table import PathTable, ROOT
+from system_sampler import SystemSampler
+from time_series import Sparkline
+from process_monitor import ProcessSampler, TOP_PROCESSES
+
+# Entrega de resultados al árbol: la búsqueda encola y la interfaz inserta por lotes
+RESULT_QUEUE_SIZE = 10000
+RESULT_BATCH_SIZE = 500
+PUMP_INTERVAL_MS = 50
+SYSTEM_PUMP_MS = 250
+
+SYSTEM_SECTIONS = [
+    ('disk', '💽 Disco Duro'),
+    ('cpu', '🖥️ Procesador'),
+    ('ram', '🧠 Memoria RAM'),
+    ('net', '🌐 Red'),
+    ('system', '⚙️ Sistema'),
+]
+# sección -> (serie del muestreador, máximo fijo o None para escala automática)
+SYSTEM_SPARKLINES = {
+    'disk': ('disk_io', None),
+    'cpu': ('cpu', 100),
+    'ram': ('ram', 100),
+    'net': ('net_io', None),
+}
 
 class FileSearchExplorer:
     def __init__(self, master):
@@ -20,13 +54,42 @@ class FileSearchExplorer:
         self.configure_styles()
         
         self.search_pattern = tk.StringVar()
+        self.ignore_case = tk.BooleanVar(value=False)
+        self.content_query = tk.StringVar()
+        self.content_regex = tk.BooleanVar(value=False)
+        self.content_search = None
+        self.search_archives = tk.BooleanVar(value=False)
+        self.archive_search = None
+        self.archive_cache = ArchiveCache()
+        self.archive_cache_loaded = False   # se lee del disco la primera vez que hace falta
+        self.duplicate_finder = None
         self.stop_search = False
         self.search_thread = None
-        self.tree_nodes = {}
+        self.path_table = PathTable()
+        self.shown = bytearray()    # 1 = el nodo ya está en el Treeview
+        self.result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        self.last_node = None
+        self.file_index = FileIndex()
+        self.name_table = NameTable()
+        # Las lecturas del sistema van en otro hilo; aquí solo se aplican los cambios
+        self.system_sampler = SystemSampler(self.format_size)
+        self.drawn_samples = 0
+        self.process_sampler = ProcessSampler()
+        self.process_rows = {}   # iid -> valores mostrados
         
         self.create_widgets()
         self.configure_exclusions()
-        self.update_system_info()
+        self.index_watcher = IndexWatcher(self.file_index, self.excluded_dirs)
+        if self.file_index.is_built():
+            self.index_watcher.start()
+        # Instantánea mmap del índice: las primeras búsquedas no esperan a cargar nada
+        self.snapshot = None
+        self.snapshot_writing = False
+        self.index_watcher.subscribe(self.apply_snapshot_changes)
+        self.open_snapshot()
+        self.system_sampler.start()
+        self.process_sampler.start()
+        self.master.after(SYSTEM_PUMP_MS, self.apply_system_updates)
         
     def configure_styles(self):
         self.style.configure('TFrame', background='#3498db')
@@ -39,7 +102,8 @@ class FileSearchExplorer:
         self.style.configure('System.TLabel', background='#2c3e50', foreground='white', font=('Arial', 10))
         
     def configure_exclusions(self):
-        self.excluded_dirs = ['/proc', '/sys', '/dev', '/run', '/tmp']
+        # /proc, /sys, /dev, tmpfs, red, FUSE y overlays según la tabla de montajes
+        self.excluded_dirs = mount_exclusions(['/'])
         
     def create_widgets(self):
         main_frame = ttk.Frame(self.master)
@@ -52,11 +116,31 @@ class FileSearchExplorer:
         ttk.Label(search_frame, text="Buscar archivos:", style='TLabel').pack(side=tk.LEFT)
         self.entry = ttk.Entry(search_frame, textvariable=self.search_pattern, width=40)
         self.entry.pack(side=tk.LEFT, padx=5)
+        # Varios patrones separados por ';' (ej: *.py;*.txt), de ruta (ej: src/**/*.py)
+        # o una consulta (ej: *.log and size>500M and mtime<7d)
+        ttk.Checkbutton(search_frame, text="Ignorar mayúsculas", variable=self.ignore_case).pack(side=tk.LEFT, padx=5)
+        # Modo grep: si se indica un texto, se busca dentro de los archivos que casan con el patrón
+        ttk.Label(search_frame, text="Contenido:").pack(side=tk.LEFT)
+        ttk.Entry(search_frame, textvariable=self.content_query, width=25).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(search_frame, text="Regex", variable=self.content_regex).pack(side=tk.LEFT, padx=5)
+        # También dentro de .zip/.jar/.tar.gz, sin extraerlos
+        ttk.Checkbutton(search_frame, text="Comprimidos", variable=self.search_archives).pack(side=tk.LEFT, padx=5)
         
         self.btn_search = ttk.Button(search_frame, text="🔍 Iniciar búsqueda", command=self.start_search)
         self.btn_search.pack(side=tk.LEFT)
         self.btn_stop = ttk.Button(search_frame, text="⏹ Detener", command=self.stop_search_process, state=tk.DISABLED)
         self.btn_stop.pack(side=tk.LEFT, padx=5)
+        self.btn_pause = ttk.Button(search_frame, text="⏸ Pausar", command=self.toggle_pause, state=tk.DISABLED)
+        self.btn_pause.pack(side=tk.LEFT)
+        self.btn_duplicates = ttk.Button(search_frame, text="🧬 Duplicados", command=self.start_duplicates)
+        self.btn_duplicates.pack(side=tk.LEFT, padx=5)
+        self.btn_reindex = ttk.Button(search_frame, text="🗂 Reindexar", command=self.rebuild_index)
+        self.btn_reindex.pack(side=tk.LEFT)
+        self.btn_quick = ttk.Button(search_frame, text="⚡ Búsqueda rápida", command=self.open_fuzzy_finder)
+        self.btn_quick.pack(side=tk.LEFT, padx=5)
+        self.master.bind('<Control-p>', lambda e: self.open_fuzzy_finder())
+        self.index_status = ttk.Label(search_frame, text="")
+        self.index_status.pack(side=tk.LEFT, padx=10)
         
         # Panel principal
         paned_window = ttk.PanedWindow(main_frame, orient=tk.HORIZONTAL)
@@ -85,6 +169,7 @@ class FileSearchExplorer:
         # Barra de progreso
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress.pack(fill=tk.X, padx=10, pady=5)
+        self.update_index_status()
         
     def create_system_panel(self, parent):
         # Marco desplazable
@@ -105,96 +190,152 @@ class FileSearchExplorer:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        # Información del sistema
+        # Información del sistema: las líneas llegan del muestreador
         self.system_labels = {}
-        sections = [
-            ('💽 Disco Duro', self.get_disk_info),
-            ('🖥️ Procesador', self.get_cpu_info),
-            ('🧠 Memoria RAM', self.get_ram_info),
-            ('🌐 Red', self.get_network_info),
-            ('⚙️ Sistema', self.get_system_info)
-        ]
-        
-        for title, func in sections:
+        self.system_lines = {}
+        self.sparklines = {}
+        for key, title in SYSTEM_SECTIONS:
             frame = ttk.Frame(scrollable_frame, style='System.TFrame')
             frame.pack(fill=tk.X, padx=10, pady=5)
             ttk.Label(frame, text=title, style='System.TLabel', font=('Arial', 12, 'bold')).pack(anchor=tk.W)
-            self.system_labels[title] = []
-            for line in func():
-                lbl = ttk.Label(frame, text=line, style='System.TLabel')
-                lbl.pack(anchor=tk.W)
-                self.system_labels[title].append(lbl)
+            self.system_lines[key] = ttk.Frame(frame, style='System.TFrame')
+            self.system_lines[key].pack(fill=tk.X)
+            self.system_labels[key] = [ttk.Label(self.system_lines[key], text="Cargando...", style='System.TLabel')]
+            self.system_labels[key][0].pack(anchor=tk.W)
+            if key in SYSTEM_SPARKLINES:
+                series, maximum = SYSTEM_SPARKLINES[key]
+                self.sparklines[series] = self.create_sparkline(frame, series, maximum)
+            if key == 'disk':
+                # Además de los totales por partición, el reparto por directorios
+                ttk.Button(frame, text="📊 Analizar uso de disco", command=self.start_disk_usage).pack(anchor=tk.W, pady=3)
             ttk.Separator(frame, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=5)
+        self.create_process_panel(scrollable_frame)
+        
+    def create_process_panel(self, parent):
+        frame = ttk.Frame(parent, style='System.TFrame')
+        frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(frame, text='📋 Procesos', style='System.TLabel', font=('Arial', 12, 'bold')).pack(anchor=tk.W)
+        sort_frame = ttk.Frame(frame, style='System.TFrame')
+        sort_frame.pack(anchor=tk.W)
+        self.process_sort = tk.StringVar(value=self.process_sampler.sort_key)
+        for key, text in (('cpu', 'CPU'), ('rss', 'Memoria'), ('io', 'E/S')):
+            ttk.Radiobutton(sort_frame, text=text, value=key, variable=self.process_sort,
+                            command=lambda: self.process_sampler.set_sort_key(self.process_sort.get())).pack(side=tk.LEFT)
+        self.process_tree = ttk.Treeview(frame, columns=('pid', 'name', 'cpu', 'rss', 'io'), show='headings',
+                                         height=TOP_PROCESSES, selectmode='none')
+        for column, text, width in (('pid', 'PID', 60), ('name', 'Nombre', 140), ('cpu', 'CPU', 60),
+                                    ('rss', 'Memoria', 80), ('io', 'E/S', 90)):
+            self.process_tree.heading(column, text=text)
+            self.process_tree.column(column, width=width, anchor=tk.W if column == 'name' else tk.E)
+        self.process_tree.pack(fill=tk.X, pady=3)
+        self.process_status = ttk.Label(frame, text="Cargando...", style='System.TLabel')
+        self.process_status.pack(anchor=tk.W)
+        
+    def show_processes(self, rows, stats):
+        # Solo se tocan las filas que cambian de valores o de posición
+        tree = self.process_tree
+        shown = {str(row[0]) for row in rows}
+        for iid in list(self.process_rows):
+            if iid not in shown:
+                tree.delete(iid)
+                del self.process_rows[iid]
+        for position, (pid, name, cpu, rss, io) in enumerate(rows):
+            iid = str(pid)
+            values = (
+                pid, name,
+                f"{cpu:.1f}%" if cpu is not None else '—',
+                self.format_size(rss) if rss is not None else '—',
+                f"{self.format_size(io)}/s" if io is not None else '—',
+            )
+            if iid not in self.process_rows:
+                tree.insert('', position, iid=iid, values=values)
+            else:
+                if self.process_rows[iid] != values:
+                    tree.item(iid, values=values)
+                if tree.index(iid) != position:
+                    tree.move(iid, '', position)
+            self.process_rows[iid] = values
+        self.process_status.config(
+            text=f"{stats['processes']} procesos · barrido {stats['sweep_ms']:.0f} ms · "
+                 f"coste {self.process_sampler.overhead():.2%} de una CPU"
+        )
         
-    def get_disk_info(self):
-        info = []
-        partitions = psutil.disk_partitions()
-        for part in partitions:
-            if 'snap' in part.mountpoint:
+    def start_disk_usage(self):
+        root_dir = filedialog.askdirectory(title="Carpeta a analizar", initialdir='/')
+        if root_dir:
+            DiskUsageWindow(self.master, root_dir, self.excluded_dirs, self.format_size)
+        
+    def create_sparkline(self, parent, series, maximum):
+        # CPU: una fila por núcleo; E/S: una fila por sentido
+        if series == 'cpu':
+            cores = self.system_sampler.history['cpu'].width
+            chart = Sparkline(parent, rows=cores, row_height=max(6, min(14, 224 // cores)), maximum=maximum)
+        elif series in ('disk_io', 'net_io'):
+            chart = Sparkline(parent, rows=2, row_height=22, maximum=maximum)
+        else:
+            chart = Sparkline(parent, maximum=maximum)
+        chart.pack(anchor=tk.W, pady=3)
+        return chart
+        
+    def draw_sparklines(self):
+        history = self.system_sampler.history
+        for series, chart in self.sparklines.items():
+            values = history[series].values()
+            last = history[series].last()
+            if last is None:
                 continue
+            if series == 'cpu':
+                caption = f"Por núcleo · media {sum(last) / len(last):.0f}%"
+            elif series == 'ram':
+                caption = f"En uso {last[0]:.0f}%"
+            elif series == 'disk_io':
+                caption = f"Lectura {self.format_size(last[0])}/s · Escritura {self.format_size(last[1])}/s"
+            else:
+                caption = f"Recibido {self.format_size(last[0])}/s · Enviado {self.format_size(last[1])}/s"
+            chart.draw(values, caption)
+        
+    def apply_system_updates(self):
+        # Solo se tocan las etiquetas cuyo texto cambió
+        updates = self.system_sampler.updates
+        while True:
             try:
-                usage = psutil.disk_usage(part.mountpoint)
-                info.append(f"📌 {part.device} ({part.fstype})")
-                info.append(f" Punto de montaje: {part.mountpoint}")
-                info.append(f" Espacio: {self.format_size(usage.used)} / {self.format_size(usage.total)}")
-                info.append(f" Uso: {usage.percent}%")
-            except:
-                pass
-        return info
-        
-    def get_cpu_info(self):
-        info = cpuinfo.get_cpu_info()
-        return [
-            f"Procesador: {info['brand_raw']}",
-            f"Núcleos: {psutil.cpu_count(logical=False)} físicos / {psutil.cpu_count()} lógicos",
-            f"Frecuencia: {psutil.cpu_freq().current:.2f} MHz",
-            f"Uso actual: {psutil.cpu_percent()}%"
-        ]
-        
-    def get_ram_info(self):
-        mem = psutil.virtual_memory()
-        return [
-            f"Total: {self.format_size(mem.total)}",
-            f"En uso: {self.format_size(mem.used)} ({mem.percent}%)",
-            f"Disponible: {self.format_size(mem.available)}"
-        ]
-        
-    def get_network_info(self):
-        net = psutil.net_if_addrs()
-        info = []
-        for interface, addrs in net.items():
-            info.append(f"🌍 {interface}")
-            for addr in addrs:
-                info.append(f" {addr.family.name}: {addr.address}")
-        return info
-        
-    def get_system_info(self):
-        return [
-            f"Sistema: {platform.system()} {platform.release()}",
-            f"Versión: {platform.version()}",
-            f"Arquitectura: {platform.machine()}",
-            f"Usuario: {os.getlogin()}"
-        ]
-        
-    def update_system_info(self):
-        for title, func in [
-            ('💽 Disco Duro', self.get_disk_info),
-            ('🖥️ Procesador', self.get_cpu_info),
-            ('🧠 Memoria RAM', self.get_ram_info),
-            ('🌐 Red', self.get_network_info),
-            ('⚙️ Sistema', self.get_system_info)
-        ]:
-            new_info = func()
-            for lbl, text in zip(self.system_labels[title], new_info):
-                lbl.config(text=text)
-        self.master.after(5000, self.update_system_info)
+                key, count, changed = updates.get_nowait()
+            except queue.Empty:
+                break
+            labels = self.system_labels[key]
+            while len(labels) < count:
+                label = ttk.Label(self.system_lines[key], style='System.TLabel')
+                label.pack(anchor=tk.W)
+                labels.append(label)
+            while len(labels) > count:
+                labels.pop().destroy()
+            for position, text in changed.items():
+                labels[position].config(text=text)
+        try:
+            rows, stats = self.process_sampler.updates.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            self.show_processes(rows, stats)
+        # Las minigráficas se redibujan una vez por muestra nueva, no en cada ciclo
+        if self.system_sampler.samples != self.drawn_samples:
+            self.drawn_samples = self.system_sampler.samples
+            self.draw_sparklines()
+        self.master.after(SYSTEM_PUMP_MS, self.apply_system_updates)
         
     def show_path_details(self, event):
         selected = self.tree.selection()
         if not selected:
             return
             
-        filepath = selected[0]
+        iid = selected[0]
+        tags = self.tree.item(iid, 'tags')
+        # Las filas de la ruta desglosada (iid path_N) no son nodos de path_table
+        if 'duplicates' in tags or 'path_info' in tags:
+            return
+        if 'match' in tags:
+            iid = self.tree.parent(iid)
+        filepath = self.item_path(iid)
         path_frame = ttk.Frame(self.tree, style='System.TFrame')
         
         # Limpiar información previa
@@ -219,83 +360,404 @@ class FileSearchExplorer:
         
     def start_search(self):
         pattern = self.search_pattern.get().strip()
+        content = self.content_query.get()
+        if not pattern and content:
+            pattern = '*'
         if not pattern:
             messagebox.showwarning("Advertencia", "Ingrese un patrón de búsqueda")
             return
         
+        self.content_search = None
+        if content:
+            try:
+                self.content_search = ContentSearch(
+                    content, regex=self.content_regex.get(), ignore_case=self.ignore_case.get()
+                )
+            except re.error as e:
+                messagebox.showerror("Error", f"Expresión regular no válida: {e}")
+                return
+        
+        query = None
+        if looks_like_query(pattern):
+            try:
+                query = FileQuery(pattern, ignore_case=self.ignore_case.get())
+                query.check_rows()
+            except QueryError as e:
+                messagebox.showerror("Error", f"Consulta no válida: {e}")
+                return
+            # Los globs de nombre de la consulta, si los hay, filtran ya en el índice
+            pattern = query.name_prefilter() or '*'
+        
+        self.duplicate_finder = None
+        self.reset_results()
+        
+        matcher = PatternMatcher(pattern, ignore_case=self.ignore_case.get())
+        self.archive_search = None
+        if self.search_archives.get():
+            self.archive_search = ArchiveSearch(matcher, query, content=self.content_search, cache=self.archive_cache)
+        self.search_thread = threading.Thread(target=self.search_files, args=(matcher, query), daemon=True)
+        self.search_thread.start()
+        self.master.after(100, self.check_thread)
+        self.master.after(PUMP_INTERVAL_MS, self.pump_results, self.result_queue)
+        
+    def reset_results(self):
         self.tree.delete(*self.tree.get_children())
-        self.tree_nodes.clear()
+        self.path_table = PathTable()
+        self.shown = bytearray()
+        self.result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        self.last_node = None
         self.stop_search = False
         self.btn_search.config(state=tk.DISABLED)
+        self.btn_duplicates.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
         self.progress.start()
         
-        self.search_thread = threading.Thread(target=self.search_files, args=(pattern,), daemon=True)
+    def start_duplicates(self):
+        root_dir = filedialog.askdirectory(title="Carpeta donde buscar duplicados", initialdir=os.path.expanduser('~'))
+        if not root_dir:
+            return
+        
+        self.content_search = None
+        self.archive_search = None
+        self.duplicate_finder = DuplicateFinder((root_dir,), self.excluded_dirs)
+        self.duplicate_groups = 0
+        self.reset_results()
+        
+        self.search_thread = threading.Thread(target=self.find_duplicates, args=(self.duplicate_finder,), daemon=True)
         self.search_thread.start()
         self.master.after(100, self.check_thread)
+        self.master.after(PUMP_INTERVAL_MS, self.pump_results, self.result_queue)
+        
+    def find_duplicates(self, finder):
+        results = self.result_queue
+        try:
+            for size, digest, copies in finder.run():
+                if not self.enqueue_result(results, self.add_duplicate_group, (size, digest, copies)):
+                    break
+        except Exception as e:
+            self.master.after(0, messagebox.showerror, "Error", str(e))
+            
+    def add_duplicate_group(self, size, digest, copies):
+        # Un nodo por grupo; cada copia es un inodo distinto y sus enlaces duros van marcados con 🔗
+        self.duplicate_groups += 1
+        group = f"dup{self.duplicate_groups}"
+        self.tree.insert(
+            '', 'end', iid=group, open=True,
+            text=f" {len(copies)} copias de {self.format_size(size)} · {digest[:12]}",
+            values=(self.format_size(size * (len(copies) - 1)), '🧬', ''), tags=('duplicates',)
+        )
+        for paths in copies:
+            for i, path in enumerate(paths):
+                self.tree.insert(
+                    group, 'end', iid=path, text=f" {path}" if i == 0 else f" 🔗 {path}",
+                    values=(self.format_size(size), '📄', ''), tags=('file',)
+                )
+        self.last_node = group
+        
+    def show_duplicate_progress(self):
+        finder = self.duplicate_finder
+        self.index_status.config(
+            text=f"Duplicados ({finder.stage}): {finder.files_seen} archivos · "
+                 f"leídos {self.format_size(finder.bytes_read)} de {self.format_size(finder.bytes_total)} · "
+                 f"{self.duplicate_groups} grupos"
+        )
         
     def stop_search_process(self):
         self.stop_search = True
+        if self.file_index.walker:
+            self.file_index.walker.stop()
+        if self.content_search:
+            self.content_search.stop()
+        if self.archive_search:
+            self.archive_search.stop()
+        if self.duplicate_finder:
+            self.duplicate_finder.stop()
         self.btn_search.config(state=tk.NORMAL)
+        self.btn_duplicates.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
+        self.btn_pause.config(state=tk.DISABLED, text="⏸ Pausar")
         self.progress.stop()
         
+    def toggle_pause(self):
+        # Solo la construcción del índice se puede pausar: es el recorrido largo
+        walker = self.file_index.walker
+        if not walker or not walker.running:
+            return
+        if walker.is_paused():
+            walker.resume()
+            self.btn_pause.config(text="⏸ Pausar")
+            self.progress.start()
+        else:
+            walker.pause()
+            self.btn_pause.config(text="▶ Continuar")
+            self.progress.stop()
+        self.show_walker_progress()
+        
     def check_thread(self):
         if self.search_thread.is_alive():
+            if self.duplicate_finder:
+                self.show_duplicate_progress()
+            else:
+                walker = self.file_index.walker
+                self.btn_pause.config(state=tk.NORMAL if walker and walker.running else tk.DISABLED)
+                self.show_walker_progress()
             self.master.after(100, self.check_thread)
         else:
+            if self.duplicate_finder:
+                self.show_duplicate_progress()
             self.progress.stop()
             self.btn_search.config(state=tk.NORMAL)
+            self.btn_duplicates.config(state=tk.NORMAL)
             self.btn_stop.config(state=tk.DISABLED)
+            self.btn_pause.config(state=tk.DISABLED, text="⏸ Pausar")
         
-    def search_files(self, pattern):
+    def search_files(self, matcher, query=None):
+        results = self.result_queue
+        table = self.path_table
         try:
-            for root, dirs, files in os.walk('/'):
-                if self.stop_search:
-                    break
-                
-                if any(root.startswith(excl) for excl in self.excluded_dirs):
-                    dirs[:] = []
-                    continue
-                
-                for name in files + dirs:
-                    if self.stop_search:
-                        break
-                    if fnmatch.fnmatch(name, pattern):
-                        filepath = os.path.join(root, name)
-                        self.add_to_tree(filepath)
+            # El índice se construye una sola vez; las búsquedas siguientes lo consultan
+            if not self.file_index.is_built():
+                if self.file_index.build(('/',), self.excluded_dirs, lambda: self.stop_search):
+                    self.index_watcher.restart()
+                    self.master.after(0, self.open_snapshot)
+                self.master.after(0, self.update_index_status)
+            
+            source = self.current_snapshot() or self.file_index
+            if self.content_search:
+                # Solo archivos: los directorios del índice no tienen contenido
+                paths = (row[0] for row in source.search(matcher, where=query) if not row[3])
+                finished = self.enqueue_matches(results, table, self.content_search.run(paths))
+            else:
+                finished = self.enqueue_rows(results, table, source.search(matcher, where=query))
+            if finished and self.archive_search:
+                self.search_in_archives(source, results, table)
         except Exception as e:
             self.master.after(0, messagebox.showerror, "Error", str(e))
             
-    def add_to_tree(self, filepath):
-        parent = ''
-        path_parts = filepath.split('/')[1:]
+    def search_in_archives(self, source, results, table):
+        # Después de los archivos sueltos, los miembros de los comprimidos con los mismos
+        # filtros; el índice da los comprimidos y el pool lee las listas que no estén en caché
+        if not self.archive_cache_loaded:
+            self.archive_cache.load()
+            self.archive_cache_loaded = True
+        archives = ((path, size, mtime) for path, size, mtime, is_dir in source.search(ARCHIVE_MATCHER) if not is_dir)
+        rows = self.archive_search.run(archives)
+        if self.content_search:
+            self.enqueue_matches(results, table, rows)
+        else:
+            self.enqueue_rows(results, table, rows)
+        self.archive_cache.save()
+            
+    def enqueue_rows(self, results, table, rows):
+        # Las rutas se parten aquí, en el hilo de búsqueda; a la interfaz llega el nodo
+        for filepath, size, mtime, is_dir in rows:
+            if not self.enqueue_result(results, self.show_node, (table.add(filepath), size, mtime, is_dir)):
+                return False
+        return True
+            
+    def enqueue_matches(self, results, table, matches):
+        last_path = node = None
+        for filepath, size, mtime, line_no, offset, text in matches:
+            # Las coincidencias de un archivo llegan seguidas: un solo nodo por archivo
+            if filepath != last_path:
+                last_path, node = filepath, table.add(filepath)
+            if not self.enqueue_result(results, self.add_match, (node, size, mtime, line_no, offset, text)):
+                return False
+        return True
+            
+    def enqueue_result(self, results, handler, row):
+        # Cola acotada: si la interfaz no da abasto, la búsqueda espera
+        while not self.stop_search:
+            try:
+                results.put((handler, row), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+        
+    def pump_results(self, results):
+        # Se insertan como mucho RESULT_BATCH_SIZE filas por ciclo para no bloquear la interfaz
+        inserted = 0
+        while inserted < RESULT_BATCH_SIZE:
+            try:
+                handler, row = results.get_nowait()
+            except queue.Empty:
+                break
+            handler(*row)
+            inserted += 1
+        if inserted:
+            self.update_tree_view()
+        if results is self.result_queue and (self.search_thread.is_alive() or not results.empty()):
+            self.master.after(PUMP_INTERVAL_MS, self.pump_results, results)
+            
+    def rebuild_index(self):
+        self.btn_reindex.config(state=tk.DISABLED)
+        self.index_status.config(text="Reindexando...")
+        self.file_index.build_in_background(
+            ('/',), self.excluded_dirs,
+            on_done=self.on_index_built
+        )
+        self.master.after(100, self.check_index_build)
         
-        for i, part in enumerate(path_parts):
-            node_path = '/' + '/'.join(path_parts[:i+1])
+    def check_index_build(self):
+        build_thread = self.file_index.build_thread
+        if build_thread and build_thread.is_alive():
+            self.show_walker_progress()
+            self.master.after(100, self.check_index_build)
             
-            if node_path not in self.tree_nodes and os.path.exists(node_path):
-                stats = os.stat(node_path)
-                file_type = '📁' if os.path.isdir(node_path) else '📄'
-                self.tree_nodes[node_path] = self.tree.insert(
-                    parent,
-                    'end',
-                    iid=node_path,
-                    text=f" {part}",
-                    values=(
-                        self.format_size(stats.st_size),
-                        file_type,
-                        datetime.fromtimestamp(stats.st_mtime).strftime('%d/%m/%Y %H:%M')
-                    ),
-                    tags=('dir' if os.path.isdir(node_path) else 'file')
+    def show_walker_progress(self):
+        walker = self.file_index.walker
+        if walker and walker.running:
+            state = "Indexación en pausa" if walker.is_paused() else "Indexando"
+            self.index_status.config(
+                text=f"{state}: {walker.dirs_scanned} directorios · {walker.dirs_per_second():.0f} dir/s"
+            )
+        
+    def on_index_built(self, ok):
+        # Las vigilancias se registran de nuevo sobre los directorios del índice nuevo
+        if ok:
+            self.index_watcher.restart()
+            self.master.after(0, self.open_snapshot)
+        self.master.after(0, self.update_index_status)
+        
+    def update_index_status(self):
+        self.btn_reindex.config(state=tk.NORMAL)
+        if not self.file_index.is_built():
+            checkpoint = self.file_index.get_checkpoint()
+            if checkpoint:
+                # La próxima búsqueda (o Reindexar) continúa desde la frontera guardada
+                self.index_status.config(
+                    text=f"Índice: interrumpido · {checkpoint['entries']} entradas · "
+                         f"{len(checkpoint['frontier'])} directorios pendientes"
                 )
-            parent = node_path
+            else:
+                self.index_status.config(text="Índice: sin construir")
+            return
+        stats = self.file_index.stats()
+        built_at = datetime.fromtimestamp(stats['built_at']).strftime('%d/%m/%Y %H:%M')
+        self.index_status.config(
+            text=f"Índice: {stats['entries']} entradas · {stats['build_seconds']:.1f} s · "
+                 f"{self.format_size(stats['size_bytes'])} · {built_at}"
+        )
+            
+    def open_fuzzy_finder(self):
+        if not self.file_index.is_built():
+            messagebox.showinfo("Búsqueda rápida", "La búsqueda rápida necesita el índice: pulse Reindexar")
+            return
+        FuzzyFinderWindow(self.master, self.name_table, self.file_index, on_pick=self.show_picked,
+                          snapshot=self.current_snapshot())
+        
+    def open_snapshot(self, rewrite=True):
+        # Columnas del índice en un archivo mapeado en memoria, compartido entre procesos.
+        # Si falta o acumula muchos cambios se reescribe en segundo plano
+        self.snapshot = load_snapshot(self.file_index) if self.file_index.is_built() else None
+        if rewrite:
+            self.check_snapshot_rewrite()
+            
+    def apply_snapshot_changes(self, changes):
+        # Hilo del vigilante, tras cada lote: la instantánea abierta se pone al día y,
+        # cuando el diario pasa de JOURNAL_LIMIT cambios, se pide reescribirla (y vaciarlo)
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        snapshot.apply_changes(changes)
+        if snapshot.needs_rewrite() and not self.snapshot_writing:
+            self.master.after(0, self.check_snapshot_rewrite)
+            
+    def check_snapshot_rewrite(self):
+        if self.file_index.is_built() and not self.snapshot_writing and (
+                self.snapshot is None or self.snapshot.needs_rewrite()):
+            self.snapshot_writing = True
+            threading.Thread(target=self.rewrite_snapshot, daemon=True).start()
+            
+    def rewrite_snapshot(self):
+        try:
+            write_snapshot(self.file_index)
+        except Exception:
+            pass   # sin instantánea se sigue consultando SQLite
+        finally:
+            self.snapshot_writing = False
+        self.master.after(0, self.open_snapshot, False)
+        
+    def current_snapshot(self):
+        # Solo vale la instantánea de la última reconstrucción del índice
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version[0] == self.file_index.get_meta('built_at'):
+            return snapshot
+        return None
+        
+    def show_picked(self, filepath):
+        try:
+            stats = os.stat(filepath)
+        except OSError:
+            messagebox.showwarning("Búsqueda rápida", f"Ya no existe:\n{filepath}")
+            return
+        iid = self.add_to_tree(filepath, stats.st_size, stats.st_mtime, os.path.isdir(filepath))
+        self.tree.selection_set(iid)
+        self.tree.see(iid)
             
-        self.master.after(0, self.update_tree_view)
+    def add_to_tree(self, filepath, size, mtime, is_dir):
+        # Un archivo elegido a mano puede estar ya en el árbol: add devuelve su nodo
+        node = self.path_table.add(filepath)
+        self.show_node(node, size, mtime, is_dir)
+        return str(node)
+        
+    def show_node(self, node, size, mtime, is_dir):
+        # iid = índice del nodo en path_table; la ruta completa solo se arma al pedirla
+        table = self.path_table
+        shown = self.shown
+        if len(shown) < len(table):
+            shown.extend(bytes(len(table) - len(shown)))
+        
+        # Antecesores que aún no están en el árbol, del más cercano al más lejano
+        missing = []
+        ancestor = table.parent(node)
+        while ancestor > ROOT and not shown[ancestor]:
+            missing.append(ancestor)
+            ancestor = table.parent(ancestor)
+        parent = str(ancestor) if ancestor > ROOT else ''
+        for ancestor in reversed(missing):
+            # Los ancestros de un resultado son directorios: no hace falta stat
+            parent = self.tree.insert(
+                parent, 'end', iid=str(ancestor), text=f" {table.name(ancestor)}", values=('', '📁', ''), tags=('dir',)
+            )
+            shown[ancestor] = 1
+        
+        iid = str(node)
+        values = (
+            self.format_size(size),
+            '📁' if is_dir else '📄',
+            datetime.fromtimestamp(mtime).strftime('%d/%m/%Y %H:%M')
+        )
+        tags = ('dir' if is_dir else 'file',)
+        if shown[node]:
+            # El nodo ya existía como ancestro de un resultado anterior
+            self.tree.item(iid, values=values, tags=tags)
+        else:
+            self.tree.insert(parent, 'end', iid=iid, text=f" {table.name(node)}", values=values, tags=tags)
+            shown[node] = 1
+        self.last_node = iid
+        
+    def add_match(self, node, size, mtime, line_no, offset, text):
+        if node >= len(self.shown) or not self.shown[node]:
+            self.show_node(node, size, mtime, False)
+        match = f"{node}\x1f{offset}"
+        self.tree.insert(
+            str(node), 'end', iid=match, text=f" {line_no}: {text}",
+            values=(f"byte {offset}", '🔎', ''), tags=('match',)
+        )
+        self.last_node = match
+        
+    def item_path(self, iid):
+        # Las copias de los grupos de duplicados usan la ruta como iid
+        if iid.startswith('/'):
+            return iid
+        return self.path_table.path(int(iid))
         
     def update_tree_view(self):
-        for node in self.tree_nodes.values():
-            self.tree.see(node)
+        # Solo se desplaza hasta el último nodo: coste constante por lote
+        if self.last_node:
+            self.tree.see(self.last_node)
             
     def format_size(self, size):
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -1,11 +1,25 @@
 import os
-import fnmatch
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
-import pwd
-import grp
+import stat
 import threading
+import queue
+from file_index import FileIndex
+from file_query import FileQuery, QueryError, looks_like_query
+from index_watcher import IndexWatcher
+from mounts import mount_exclusions
+from file_metadata import read_stat, user_name, group_name
+from virtual_table import VirtualTable, ResultStore, KIND_FILE, KIND_DIR, KIND_LINK
+from fuzzy_finder import NameTable, FuzzyFinderWindow
+from live_search import LiveSearch, SavedSearches
+
+# Entrega de resultados a la tabla: la búsqueda encola y la interfaz añade por lotes
+RESULT_QUEUE_SIZE = 10000
+RESULT_BATCH_SIZE = 5000
+PUMP_INTERVAL_MS = 50
+
+KIND_LABELS = {KIND_FILE: "Archivo", KIND_DIR: "Directorio", KIND_LINK: "Enlace"}
 
 class AdvancedFileSearch:
     def __init__(self, master):
@@ -21,10 +35,24 @@ class AdvancedFileSearch:
         self.search_pattern = tk.StringVar()
         self.stop_search = False
         self.search_thread = None
-        self.file_data = {}  # Almacenar metadatos de archivos
+        self.results_store = ResultStore()  # Resultados en arrays compactos, no un dict por ruta
+        self.result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        self.file_index = FileIndex()
+        self.name_table = NameTable()
+        # Búsqueda guardada en vivo: recibe los cambios del vigilante del índice
+        self.saved_searches = SavedSearches()
+        self.live_search = None
+        self.live_listener = None
+        self.live_name = None
+        self.live_counts = [0, 0]   # filas añadidas y quitadas desde la búsqueda inicial
+        self.live_pending = []      # eventos del vigilante aún no aplicados
+        self.live_lock = threading.Lock()
         
         self.create_widgets()
         self.configure_exclusions()
+        self.index_watcher = IndexWatcher(self.file_index, self.excluded_dirs)
+        if self.file_index.is_built():
+            self.index_watcher.start()
         
     def configure_styles(self):
         self.style.configure('TFrame', background='#3498db')
@@ -36,9 +64,9 @@ class AdvancedFileSearch:
         self.style.configure('Treeview.Heading', background='#2980b9', foreground='white', font=('Arial', 10, 'bold'))
         
     def configure_exclusions(self):
-        self.excluded_dirs = [
-            '/proc', '/sys', '/dev', '/run', '/snap',
-            '/var/lib', '/var/cache', '/tmp', '/lost+found'
+        # Los pseudo-sistemas, tmpfs, red, FUSE y overlays salen de la tabla de montajes
+        self.excluded_dirs = mount_exclusions(['/']) + [
+            '/snap', '/var/lib', '/var/cache', '/lost+found'
         ]
         
     def create_widgets(self):
@@ -49,7 +77,7 @@ class AdvancedFileSearch:
         search_frame = ttk.Frame(main_frame)
         search_frame.pack(pady=10, fill=tk.X)
         
-        ttk.Label(search_frame, text="Patrón de búsqueda (ej: *.py):").pack(side=tk.LEFT)
+        ttk.Label(search_frame, text="Patrón o consulta (ej: *.py, *.log and size>500M):").pack(side=tk.LEFT)
         self.entry = ttk.Entry(search_frame, textvariable=self.search_pattern, width=50)
         self.entry.pack(side=tk.LEFT, padx=10)
         
@@ -57,22 +85,36 @@ class AdvancedFileSearch:
         self.btn_search.pack(side=tk.LEFT)
         self.btn_stop = ttk.Button(search_frame, text="Detener", command=self.stop_search_process, state=tk.DISABLED)
         self.btn_stop.pack(side=tk.LEFT, padx=10)
+        self.btn_pause = ttk.Button(search_frame, text="Pausar", command=self.toggle_pause, state=tk.DISABLED)
+        self.btn_pause.pack(side=tk.LEFT, padx=(0, 10))
+        self.btn_reindex = ttk.Button(search_frame, text="Reindexar", command=self.rebuild_index)
+        self.btn_reindex.pack(side=tk.LEFT)
+        self.btn_quick = ttk.Button(search_frame, text="Búsqueda rápida", command=self.open_fuzzy_finder)
+        self.btn_quick.pack(side=tk.LEFT, padx=10)
+        self.master.bind('<Control-p>', lambda e: self.open_fuzzy_finder())
+        
+        # Búsquedas guardadas: al elegir una se busca y los resultados siguen al disco
+        ttk.Button(search_frame, text="Guardar", command=self.save_search).pack(side=tk.LEFT)
+        self.saved_combo = ttk.Combobox(search_frame, values=self.saved_searches.names(), state='readonly', width=20)
+        self.saved_combo.pack(side=tk.LEFT, padx=10)
+        self.saved_combo.bind('<<ComboboxSelected>>', lambda e: self.run_saved_search(self.saved_combo.get()))
         
         # Frame principal para resultados
         results_frame = ttk.Frame(main_frame)
         results_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Tabla de resultados a la derecha
-        self.results_table = ttk.Treeview(results_frame, columns=('Nombre', 'Modificación', 'Tipo', 'Tamaño'), show='headings')
-        self.results_table.heading('Nombre', text='Nombre')
-        self.results_table.heading('Modificación', text='Última Modificación')
-        self.results_table.heading('Tipo', text='Tipo')
-        self.results_table.heading('Tamaño', text='Tamaño')
-        
-        self.results_table.column('Nombre', width=300)
-        self.results_table.column('Modificación', width=200)
-        self.results_table.column('Tipo', width=100)
-        self.results_table.column('Tamaño', width=100)
+        # Tabla de resultados a la derecha (virtual: solo existen las filas visibles)
+        self.results_table = VirtualTable(
+            results_frame,
+            self.results_store,
+            columns=[
+                ('Nombre', 'Nombre', 300, 'name'),
+                ('Modificación', 'Última Modificación', 200, 'mtime'),
+                ('Tipo', 'Tipo', 100, 'kind'),
+                ('Tamaño', 'Tamaño', 100, 'size'),
+            ],
+            formatter=self.format_result_row
+        )
         
         # Detalles a la izquierda
         self.details_tree = ttk.Treeview(results_frame, columns=('Propiedad', 'Valor'), show='headings')
@@ -82,141 +124,347 @@ class AdvancedFileSearch:
         self.details_tree.column('Valor', width=400, anchor=tk.W)
         
         # Configurar scrollbars
-        scroll_results = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results_table.yview)
         scroll_details = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.details_tree.yview)
         
-        self.results_table.configure(yscrollcommand=scroll_results.set)
         self.details_tree.configure(yscrollcommand=scroll_details.set)
         
         # Diseño de la interfaz
         self.details_tree.grid(row=0, column=0, sticky='nsew', padx=(0, 10))
         scroll_details.grid(row=0, column=1, sticky='ns')
-        self.results_table.grid(row=0, column=2, sticky='nsew', padx=(10, 0))
-        scroll_results.grid(row=0, column=3, sticky='ns')
+        self.results_table.grid(row=0, column=2, columnspan=2, sticky='nsew', padx=(10, 0))
         
         results_frame.grid_columnconfigure(0, weight=1)
         results_frame.grid_columnconfigure(2, weight=3)
         
         # Configurar evento de selección
-        self.results_table.bind('<<TreeviewSelect>>', self.show_selected_details)
+        self.results_table.bind_select(self.show_selected_details)
         
         # Estado
         self.status = ttk.Label(main_frame, text="Listo")
         self.status.pack(fill=tk.X)
+        self.index_status = ttk.Label(main_frame, text="")
+        self.index_status.pack(fill=tk.X)
+        self.live_status = ttk.Label(main_frame, text="")
+        self.live_status.pack(fill=tk.X)
+        self.update_index_status()
         
-    def start_search(self):
+    def start_search(self, saved=None):
         pattern = self.search_pattern.get().strip()
         if not pattern:
             messagebox.showwarning("Advertencia", "Ingresa un patrón de búsqueda")
             return
+        query = None
+        if looks_like_query(pattern):
+            try:
+                query = FileQuery(pattern)
+                query.check_rows()
+            except QueryError as e:
+                messagebox.showerror("Error", f"Consulta no válida: {e}")
+                return
+            pattern = None  # el índice usa los globs de nombre de la consulta
         
-        self.results_table.delete(*self.results_table.get_children())
+        self.stop_live_search()
+        if saved:
+            self.start_live_search(saved)
+        self.results_table.clear()
         self.details_tree.delete(*self.details_tree.get_children())
-        self.file_data = {}
+        self.result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
         self.stop_search = False
         self.btn_search.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
         self.status.config(text="Buscando...")
         
-        self.search_thread = threading.Thread(target=self.search_files, args=(pattern,), daemon=True)
+        self.search_thread = threading.Thread(target=self.search_files, args=(pattern, query, self.live_search), daemon=True)
         self.search_thread.start()
         self.master.after(100, self.check_thread)
+        self.master.after(PUMP_INTERVAL_MS, self.pump_results, self.result_queue)
         
     def stop_search_process(self):
         self.stop_search = True
+        self.stop_live_search()
         self.btn_search.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
+        self.btn_pause.config(state=tk.DISABLED, text="Pausar")
         self.status.config(text="Búsqueda detenida")
         
+    def toggle_pause(self):
+        # Solo la construcción del índice se puede pausar: es el recorrido largo
+        walker = self.file_index.walker
+        if not walker or not walker.running:
+            return
+        if walker.is_paused():
+            walker.resume()
+            self.btn_pause.config(text="Pausar")
+            self.status.config(text="Indexando...")
+        else:
+            walker.pause()
+            self.btn_pause.config(text="Continuar")
+            self.status.config(text="Indexación en pausa")
+        
     def check_thread(self):
         if self.search_thread.is_alive():
+            walker = self.file_index.walker
+            self.btn_pause.config(state=tk.NORMAL if walker and walker.running else tk.DISABLED)
             self.master.after(100, self.check_thread)
         else:
             self.btn_search.config(state=tk.NORMAL)
-            self.btn_stop.config(state=tk.DISABLED)
-            self.status.config(text=f"Búsqueda completada. {len(self.results_table.get_children())} resultados encontrados")
+            # Una búsqueda en vivo sigue activa hasta Detener u otra búsqueda
+            self.btn_stop.config(state=tk.NORMAL if self.live_search else tk.DISABLED)
+            self.btn_pause.config(state=tk.DISABLED, text="Pausar")
+            self.status.config(text=f"Búsqueda completada. {len(self.results_store)} resultados encontrados")
         
-    def search_files(self, pattern):
+    def search_files(self, pattern, query=None, live=None):
+        results = self.result_queue
         try:
-            for root, dirs, files in os.walk('/'):
-                if self.stop_search:
-                    break
-                
-                if any(root.startswith(excl) for excl in self.excluded_dirs):
-                    dirs[:] = []
+            if not self.file_index.is_built():
+                if self.file_index.build(('/',), self.excluded_dirs, lambda: self.stop_search):
+                    self.index_watcher.restart()
+                self.master.after(0, self.update_index_status)
+            
+            for row in self.file_index.search(pattern, where=query):
+                # Una búsqueda guardada puede limitarse a unas raíces
+                if live and not live.within(row[0]):
                     continue
-                
-                for name in files + dirs:
-                    if fnmatch.fnmatch(name, pattern):
-                        filepath = os.path.join(root, name)
-                        file_info = self.get_file_info(filepath)
-                        self.file_data[filepath] = file_info
-                        self.master.after(0, self.add_to_results_table, file_info)
+                if not self.enqueue_result(results, row):
+                    break
                 
         except Exception as e:
             self.master.after(0, messagebox.showerror, "Error", str(e))
     
+    def enqueue_result(self, results, row):
+        while not self.stop_search:
+            try:
+                results.put(row, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def pump_results(self, results):
+        added = 0
+        while added < RESULT_BATCH_SIZE:
+            try:
+                filepath, size, mtime, is_dir = results.get_nowait()
+            except queue.Empty:
+                break
+            self.results_store.append(filepath, size, mtime, KIND_DIR if is_dir else KIND_FILE)
+            if self.live_search:
+                self.live_search.add_result(filepath)
+            added += 1
+        if added:
+            self.results_table.refresh()
+            self.status.config(text=f"Buscando... {len(self.results_store)} resultados")
+        if results is self.result_queue and (self.search_thread.is_alive() or not results.empty()):
+            self.master.after(PUMP_INTERVAL_MS, self.pump_results, results)
+    
+    def save_search(self):
+        text = self.search_pattern.get().strip()
+        if not text:
+            messagebox.showwarning("Advertencia", "Ingresa un patrón de búsqueda")
+            return
+        name = simpledialog.askstring("Guardar búsqueda", "Nombre:", initialvalue=text, parent=self.master)
+        if not name or not name.strip():
+            return
+        try:
+            self.saved_searches.put(name.strip(), text)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar: {e}")
+            return
+        self.saved_combo.config(values=self.saved_searches.names())
+        self.saved_combo.set(name.strip())
+    
+    def run_saved_search(self, name):
+        saved = self.saved_searches.get(name)
+        if saved:
+            self.search_pattern.set(saved['text'])
+            self.start_search(saved)
+    
+    def start_live_search(self, saved):
+        live = LiveSearch(saved['text'], saved.get('roots') or ('/',))
+        
+        def listener(changes):
+            # Hilo del vigilante: se filtra aquí y a Tk solo llega lo que afecta a la búsqueda.
+            # Los lotes seguidos se juntan: una sola llamada en Tk por ráfaga de cambios
+            events = live.changes(changes)
+            if not events:
+                return
+            with self.live_lock:
+                scheduled = bool(self.live_pending)
+                self.live_pending.extend(events)
+            if not scheduled:
+                self.master.after(PUMP_INTERVAL_MS, self.apply_live_events, live)
+        
+        self.live_search = live
+        self.live_listener = listener
+        self.live_name = saved['name']
+        self.live_counts = [0, 0]
+        with self.live_lock:
+            self.live_pending = []
+        self.results_store.track_paths()
+        self.index_watcher.subscribe(listener)
+        self.live_status.config(text=f"En vivo: {self.live_name}")
+    
+    def stop_live_search(self):
+        if self.live_listener:
+            self.index_watcher.unsubscribe(self.live_listener)
+        self.live_search = self.live_listener = None
+        self.results_store.track_paths(False)
+        self.live_status.config(text="")
+    
+    def apply_live_events(self, live):
+        if live is not self.live_search:
+            return   # llegaron después de cambiar o detener la búsqueda
+        if self.search_thread.is_alive() or not self.result_queue.empty():
+            # Los cambios se aplican sobre los resultados iniciales completos
+            self.master.after(PUMP_INTERVAL_MS, self.apply_live_events, live)
+            return
+        with self.live_lock:
+            events, self.live_pending = self.live_pending, []
+        store = self.results_store
+        removed = set()
+        removed_dirs = []
+        added_at = {}   # fila -> directorios borrados antes de que llegara (o cambiara)
+        for action, value in events:
+            if action == 'add':
+                path, size, mtime, is_dir = value
+                kind = KIND_DIR if is_dir else KIND_FILE
+                index = store.row_of(path)
+                if index is not None:
+                    store.update(index, size, mtime, kind)
+                    removed.discard(index)
+                else:
+                    index = store.append(path, size, mtime, kind)
+                    live.add_result(path)
+                    self.live_counts[0] += 1
+                added_at[index] = len(removed_dirs)
+            else:
+                index = store.row_of(value)
+                if index is not None:
+                    removed.add(index)
+                if value in live.result_dirs:
+                    removed_dirs.append(value.rstrip('/') + '/')
+        # Los subárboles borrados, en una sola pasada; se salva lo recreado después del borrado
+        if removed_dirs:
+            for path, index in store.rows_under(removed_dirs):
+                last = max(i for i, prefix in enumerate(removed_dirs) if path.startswith(prefix))
+                if added_at.get(index, -1) <= last:
+                    removed.add(index)
+        self.live_counts[1] += store.remove_rows(removed)
+        self.results_table.refresh()
+        added, removed = self.live_counts
+        self.live_status.config(
+            text=f"En vivo: {self.live_name} · {len(store)} resultados · +{added} / -{removed} "
+                 f"desde la búsqueda · {datetime.now().strftime('%H:%M:%S')}"
+        )
+    
+    def rebuild_index(self):
+        self.btn_reindex.config(state=tk.DISABLED)
+        self.index_status.config(text="Reindexando...")
+        self.file_index.build_in_background(
+            ('/',), self.excluded_dirs,
+            on_done=self.on_index_built
+        )
+    
+    def on_index_built(self, ok):
+        # Las vigilancias se registran de nuevo sobre los directorios del índice nuevo
+        if ok:
+            self.index_watcher.restart()
+        self.master.after(0, self.update_index_status)
+    
+    def update_index_status(self):
+        self.btn_reindex.config(state=tk.NORMAL)
+        if not self.file_index.is_built():
+            checkpoint = self.file_index.get_checkpoint()
+            if checkpoint:
+                # La próxima búsqueda (o Reindexar) continúa desde la frontera guardada
+                self.index_status.config(
+                    text=f"Índice: interrumpido · {checkpoint['entries']} entradas · "
+                         f"{len(checkpoint['frontier'])} directorios pendientes"
+                )
+            else:
+                self.index_status.config(text="Índice: sin construir")
+            return
+        stats = self.file_index.stats()
+        built_at = datetime.fromtimestamp(stats['built_at']).strftime('%Y-%m-%d %H:%M:%S')
+        self.index_status.config(
+            text=f"Índice: {stats['entries']} entradas · construido en {stats['build_seconds']:.1f} s · "
+                 f"{self.format_size(stats['size_bytes'])} · {built_at}"
+        )
+    
+    def open_fuzzy_finder(self):
+        if not self.file_index.is_built():
+            messagebox.showinfo("Búsqueda rápida", "La búsqueda rápida necesita el índice: pulse Reindexar")
+            return
+        FuzzyFinderWindow(self.master, self.name_table, self.file_index, on_pick=self.show_picked)
+    
+    def show_picked(self, filepath):
+        # El elegido se añade a la tabla y se muestran sus detalles
+        file_info = self.get_file_info(filepath)
+        if 'error' in file_info:
+            messagebox.showwarning("Búsqueda rápida", file_info['error'])
+            return
+        stats = file_info['stat']
+        if file_info['is_link']:
+            kind = KIND_LINK
+        elif stat.S_ISDIR(stats.st_mode):
+            kind = KIND_DIR
+        else:
+            kind = KIND_FILE
+        index = self.results_store.append(filepath, stats.st_size, stats.st_mtime, kind)
+        self.results_table.refresh()
+        self.show_selected_details(index)
+    
     def get_file_info(self, filepath):
+        # Solo el stat en bruto; el formato se hace al mostrar los detalles
         try:
-            stat = os.stat(filepath)
-            file_type = "Directorio" if os.path.isdir(filepath) else "Archivo"
-            if os.path.islink(filepath):
-                file_type = "Enlace"
-            
-            return {
-                'path': filepath,
-                'name': os.path.basename(filepath),
-                'type': file_type,
-                'size': self.format_size(stat.st_size),
-                'modification': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                'permissions': self.format_permissions(stat.st_mode),
-                'owner': pwd.getpwuid(stat.st_uid).pw_name,
-                'group': grp.getgrgid(stat.st_gid).gr_name,
-                'inode': stat.st_ino,
-                'creation': datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-            }
+            stats, is_link = read_stat(filepath)
+            return {'path': filepath, 'stat': stats, 'is_link': is_link}
         except Exception as e:
             return {'error': str(e)}
     
-    def add_to_results_table(self, file_info):
-        if 'error' in file_info:
-            return
-        
-        self.results_table.insert('', tk.END, 
-            values=(
-                file_info['name'],
-                file_info['modification'],
-                file_info['type'],
-                file_info['size']
-            ), 
-            iid=file_info['path']
+    def format_file_info(self, file_info):
+        stats = file_info['stat']
+        if file_info['is_link']:
+            file_type = "Enlace"
+        elif stat.S_ISDIR(stats.st_mode):
+            file_type = "Directorio"
+        else:
+            file_type = "Archivo"
+        return [
+            ("Ruta completa", file_info['path']),
+            ("Nombre", os.path.basename(file_info['path'])),
+            ("Tipo", file_type),
+            ("Tamaño", self.format_size(stats.st_size)),
+            ("Última modificación", datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')),
+            ("Fecha creación", datetime.fromtimestamp(stats.st_ctime).strftime('%Y-%m-%d %H:%M:%S')),
+            ("Permisos", self.format_permissions(stats.st_mode)),
+            ("Propietario", user_name(stats.st_uid)),
+            ("Grupo", group_name(stats.st_gid)),
+            ("Inodo", stats.st_ino)
+        ]
+    
+    def format_result_row(self, index):
+        store = self.results_store
+        return (
+            store.name(index),
+            datetime.fromtimestamp(store.mtimes[index]).strftime('%Y-%m-%d %H:%M:%S'),
+            KIND_LABELS[store.kinds[index]],
+            self.format_size(store.sizes[index])
         )
     
-    def show_selected_details(self, event):
+    def show_selected_details(self, index):
         self.details_tree.delete(*self.details_tree.get_children())
-        selected = self.results_table.selection()
-        if not selected:
+        if index is None:
             return
         
-        filepath = selected[0]
-        file_info = self.file_data.get(filepath, {})
+        # Los metadatos completos solo se obtienen para la fila seleccionada
+        file_info = self.get_file_info(self.results_store.path(index))
         
         if 'error' in file_info:
             self.details_tree.insert('', tk.END, values=("Error", file_info['error']))
             return
         
-        details = [
-            ("Ruta completa", file_info['path']),
-            ("Nombre", file_info['name']),
-            ("Tipo", file_info['type']),
-            ("Tamaño", file_info['size']),
-            ("Última modificación", file_info['modification']),
-            ("Fecha creación", file_info['creation']),
-            ("Permisos", file_info['permissions']),
-            ("Propietario", file_info['owner']),
-            ("Grupo", file_info['group']),
-            ("Inodo", file_info['inode'])
-        ]
+        details = self.format_file_info(file_info)
         
         for prop, val in details:
             self.details_tree.insert('', tk.END, values=(prop, val))
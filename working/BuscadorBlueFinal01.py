@@ -3,9 +3,9 @@ import fnmatch
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-import pwd
-import grp
 import threading
+from file_metadata import user_name, group_name
+from mounts import mount_exclusions, ExclusionTrie
 
 class AdvancedFileSearch:
     def __init__(self, master):
@@ -35,9 +35,9 @@ class AdvancedFileSearch:
         self.style.configure('Treeview.Heading', background='#2980b9', foreground='white', font=('Arial', 10, 'bold'))
         
     def configure_exclusions(self):
-        self.excluded_dirs = [
-            '/proc', '/sys', '/dev', '/run', '/snap',
-            '/var/lib', '/var/cache', '/tmp', '/lost+found'
+        # Los pseudo-sistemas, tmpfs, red, FUSE y overlays salen de la tabla de montajes
+        self.excluded_dirs = mount_exclusions(['/']) + [
+            '/snap', '/var/lib', '/var/cache', '/lost+found'
         ]
         
     def create_widgets(self):
@@ -102,13 +102,14 @@ class AdvancedFileSearch:
             self.status.config(text=f"Búsqueda completada. {len(self.tree.get_children())} resultados encontrados")
         
     def search_files(self, pattern):
+        exclusions = ExclusionTrie(self.excluded_dirs)
         try:
             for root, dirs, files in os.walk('/'):
                 if self.stop_search:
                     break
                 
-                # Saltar directorios excluidos
-                if any(root.startswith(excl) for excl in self.excluded_dirs):
+                # Saltar directorios excluidos (por componentes: '/tmp' no excluye '/tmpdata')
+                if exclusions.is_excluded(root):
                     dirs[:] = []
                     continue
                 
@@ -136,8 +137,8 @@ class AdvancedFileSearch:
                 'Último acceso': datetime.fromtimestamp(stat.st_atime).strftime('%Y-%m-%d %H:%M:%S'),
                 'Fecha creación': datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S'),
                 'Permisos': self.format_permissions(stat.st_mode),
-                'Propietario': pwd.getpwuid(stat.st_uid).pw_name,
-                'Grupo': grp.getgrgid(stat.st_gid).gr_name,
+                'Propietario': user_name(stat.st_uid),
+                'Grupo': group_name(stat.st_gid),
                 'Inodo': stat.st_ino,
                 'Dispositivo': f"{os.major(stat.st_dev)}:{os.minor(stat.st_dev)}",
                 'Enlaces duros': stat.st_nlink
@@ -0,0 +1,280 @@
+import lzma
+import multiprocessing
+import os
+import pickle
+import tarfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from content_search import search_buffer
+from pattern_matcher import PatternMatcher
+
+# Búsqueda dentro de .zip/.jar/.tar.gz sin extraer nada a disco: la lista de miembros
+# se lee del directorio central (zip) o recorriendo el flujo (tar) en un pool de
+# procesos, y se guarda por (tamaño, mtime) del comprimido para no releerla mientras
+# no cambie. En modo grep los miembros que casan se leen a memoria uno a uno.
+# Un miembro se nombra como en las URL jar: /ruta/app.jar!/META-INF/MANIFEST.MF
+
+ARCHIVE_PATTERNS = '*.zip;*.jar;*.war;*.ear;*.apk;*.whl;*.tar;*.tar.gz;*.tgz;*.tar.bz2;*.tbz2;*.tar.xz;*.txz'
+ZIP_SUFFIXES = ('.zip', '.jar', '.war', '.ear', '.apk', '.whl')
+MEMBER_SEP = '!/'
+MAX_MEMBER_BYTES = 64 * 1024 * 1024   # en modo grep, los miembros más grandes se saltan
+MAX_ARCHIVES = 10000                  # listas guardadas; se descarta la usada hace más tiempo
+STOP_POLL = 0.2                       # segundos entre comprobaciones de 'Detener' mientras espera
+DEFAULT_ARCHIVE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'papilink', 'comprimidos.pickle')
+ARCHIVE_MATCHER = PatternMatcher(ARCHIVE_PATTERNS, ignore_case=True)
+ARCHIVE_ERRORS = (OSError, EOFError, ValueError, zipfile.BadZipFile, tarfile.TarError, zlib.error, lzma.LZMAError)
+
+
+def member_path(archive, name):
+    return f"{archive}{MEMBER_SEP}{name}"
+
+
+def split_member(path):
+    # (comprimido, miembro) o (ruta, None) si no es un miembro
+    archive, sep, name = path.partition(MEMBER_SEP)
+    return (archive, name) if sep else (path, None)
+
+
+def archive_entries(entries):
+    # Los comprimidos de un listado (DirEntry): archivos normales con su extensión
+    found = []
+    for entry in ARCHIVE_MATCHER.filter_entries(entries):
+        try:
+            if entry.is_file(follow_symlinks=False):
+                found.append(entry)
+        except OSError:
+            pass
+    return found
+
+
+def is_zip(path):
+    return path.lower().endswith(ZIP_SUFFIXES)
+
+
+def tar_name(member):
+    name = member.name.rstrip('/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+def zip_mtime(date_time):
+    try:
+        return time.mktime(date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
+
+
+def list_members(path):
+    # [(miembro, tamaño, mtime, es_dir)] o None si no se puede leer
+    members = []
+    try:
+        if is_zip(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    name = info.filename.rstrip('/')
+                    if name:
+                        members.append((name, info.file_size, zip_mtime(info.date_time), info.is_dir()))
+        else:
+            # 'r|*': flujo secuencial; los datos de cada miembro se saltan sin guardarlos
+            with tarfile.open(path, 'r|*') as tar:
+                for member in tar:
+                    name = tar_name(member)
+                    if name and (member.isfile() or member.isdir()):
+                        members.append((name, member.size, float(member.mtime), member.isdir()))
+    except ARCHIVE_ERRORS:
+        return None
+    return members
+
+
+def read_member(read):
+    # Contenido de un miembro o None: cifrado (RuntimeError), compresión no soportada
+    # (NotImplementedError) o datos corruptos no deben cortar la búsqueda entera
+    try:
+        return read()
+    except (RuntimeError, NotImplementedError, *ARCHIVE_ERRORS):
+        return None
+
+
+def grep_members(path, names, query, regex, ignore_case, literal, max_matches):
+    # ([(miembro, tamaño, mtime, [(línea, offset, texto)])], fallos): los miembros con
+    # coincidencias y si alguno no se pudo leer
+    found = []
+    failed = False
+    wanted = set(names)
+    try:
+        if is_zip(path):
+            with zipfile.ZipFile(path) as zf:
+                for name in names:
+                    info = zf.getinfo(name)
+                    if info.file_size > MAX_MEMBER_BYTES:
+                        continue
+                    data = read_member(lambda: zf.read(info))
+                    if data is None:
+                        failed = True
+                        continue
+                    matches = search_buffer(data, query, regex, ignore_case, literal, max_matches)
+                    if matches:
+                        found.append((name, info.file_size, zip_mtime(info.date_time), matches))
+        else:
+            with tarfile.open(path, 'r|*') as tar:
+                for member in tar:
+                    name = tar_name(member)
+                    if name not in wanted or not member.isfile() or member.size > MAX_MEMBER_BYTES:
+                        continue
+                    data = read_member(lambda: tar.extractfile(member).read())
+                    if data is None:
+                        failed = True
+                        continue
+                    matches = search_buffer(data, query, regex, ignore_case, literal, max_matches)
+                    if matches:
+                        found.append((name, member.size, float(member.mtime), matches))
+                    wanted.discard(name)
+                    if not wanted:
+                        break
+    except (KeyError, RuntimeError, NotImplementedError, *ARCHIVE_ERRORS):
+        failed = True   # lo encontrado hasta el error vale
+    return found, failed
+
+
+class ArchiveCache:
+    # ruta del comprimido -> (tamaño, mtime, miembros); vale mientras ambos coincidan
+    def __init__(self, max_archives=MAX_ARCHIVES):
+        self.max_archives = max_archives
+        self.archives = {}
+
+    def __len__(self):
+        return len(self.archives)
+
+    def get(self, path, size, mtime):
+        entry = self.archives.get(path)
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            return None
+        # Se vuelve a poner al final: el primero del diccionario es el usado hace más tiempo
+        self.archives[path] = self.archives.pop(path)
+        return entry[2]
+
+    def put(self, path, size, mtime, members):
+        self.archives.pop(path, None)
+        self.archives[path] = (size, mtime, members)
+        while len(self.archives) > self.max_archives:
+            self.archives.pop(next(iter(self.archives)))
+
+    def save(self, path=DEFAULT_ARCHIVE_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.archives, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path=DEFAULT_ARCHIVE_CACHE_PATH):
+        try:
+            with open(path, 'rb') as f:
+                self.archives = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.archives = {}
+
+
+class ArchiveSearch:
+    def __init__(self, matcher, query=None, content=None, workers=None, cache=None):
+        # matcher/query: los mismos filtros que los archivos normales, aplicados a cada miembro.
+        # content: ContentSearch opcional (modo grep); se usan su consulta y su literal
+        self.matcher = matcher
+        self.query = query
+        self.content = content
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache if cache is not None else ArchiveCache()
+        self.stopped = False
+        self.pool = None
+        self.archives_listed = 0
+        self.archives_cached = 0
+        self.archives_failed = 0
+
+    def stop(self):
+        self.stopped = True
+        pool = self.pool
+        if pool is not None:
+            # Sin esperar a las tareas en curso: un comprimido grande retendría "Detener"
+            # hasta terminar. Los procesos acaban su tarea y salen por su cuenta
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def matching(self, archive, members):
+        rows = []
+        for name, size, mtime, is_dir in members:
+            path = member_path(archive, name)
+            if not self.matcher.match(name.rsplit('/', 1)[-1], path):
+                continue
+            if self.query is None or self.query.match_row(path, size, mtime, is_dir):
+                rows.append((path, size, mtime, is_dir))
+        return rows
+
+    def found(self, pool, in_flight, archive, members):
+        rows = self.matching(archive, members)
+        if self.content is None:
+            return rows
+        # Modo grep: el contenido de los que casan se lee en el pool
+        names = [split_member(path)[1] for path, _, _, is_dir in rows if not is_dir]
+        if names:
+            content = self.content
+            try:
+                future = pool.submit(grep_members, archive, names, content.query, content.regex,
+                                     content.ignore_case, content.literal, content.max_matches)
+            except RuntimeError:
+                return []   # detenida: el pool ya no admite tareas
+            in_flight[future] = ('grep', archive, None, None)
+        return []
+
+    def run(self, archives):
+        # archives: (ruta, tamaño, mtime) de cada comprimido. Produce (ruta, tamaño, mtime, es_dir)
+        # de los miembros que coinciden o, con content, (ruta, tamaño, mtime, línea, offset, texto)
+        # como ContentSearch.run. Un comprimido por tarea: uno grande no retiene a los demás
+        context = multiprocessing.get_context('spawn')  # sin fork del proceso con Tk e hilos
+        archives = iter(archives)
+        in_flight = {}   # futuro -> (tipo, comprimido, tamaño, mtime)
+        pool = self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        try:
+            while not self.stopped:
+                while not self.stopped and len(in_flight) < self.workers * 2:
+                    item = next(archives, None)
+                    if item is None:
+                        break
+                    path, size, mtime = item
+                    members = self.cache.get(path, size, mtime)
+                    if members is None:
+                        try:
+                            in_flight[pool.submit(list_members, path)] = ('list', path, size, mtime)
+                        except RuntimeError:
+                            break   # detenida: el pool ya no admite tareas
+                    else:
+                        self.archives_cached += 1
+                        yield from self.found(pool, in_flight, path, members)
+                if not in_flight:
+                    break
+                # Con plazo: al detener no se espera a que acabe la tarea en curso
+                done, _ = wait(in_flight, timeout=STOP_POLL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if self.stopped:
+                        break
+                    kind, path, size, mtime = in_flight.pop(future)
+                    if kind == 'list':
+                        members = future.result()
+                        if members is None:
+                            self.archives_failed += 1
+                            continue
+                        self.archives_listed += 1
+                        self.cache.put(path, size, mtime, members)
+                        yield from self.found(pool, in_flight, path, members)
+                    else:
+                        found, failed = future.result()
+                        if failed:
+                            self.archives_failed += 1
+                        for name, size, mtime, matches in found:
+                            for line_no, offset, text in matches:
+                                if self.stopped:
+                                    break
+                                yield member_path(path, name), size, mtime, line_no, offset, text
+        finally:
+            self.pool = None
+            pool.shutdown(wait=not self.stopped, cancel_futures=True)
@@ -0,0 +1,77 @@
+import argparse
+import fnmatch
+import random
+import string
+import time
+from pattern_matcher import PatternMatcher
+
+# Micro-benchmark: bucle fnmatch.fnmatch por nombre y patrón frente a PatternMatcher
+
+EXTENSIONS = ['py', 'txt', 'log', 'gz', 'so', 'json', 'md', 'c', 'h', 'png', 'jpg', 'conf']
+
+
+def synthetic_names(count, seed):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '_-'
+    names = []
+    for _ in range(count):
+        stem = ''.join(rng.choices(alphabet, k=rng.randint(3, 20)))
+        if rng.random() < 0.05:
+            names.append(f"core.{rng.randint(1, 99999)}")
+        else:
+            names.append(f"{stem}.{rng.choice(EXTENSIONS)}")
+    return names
+
+
+def listings(names, per_dir):
+    return [names[i:i + per_dir] for i in range(0, len(names), per_dir)]
+
+
+def fnmatch_loop(dirs, patterns):
+    matched = 0
+    for names in dirs:
+        for name in names:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                matched += 1
+    return matched
+
+
+def matcher_batch(dirs, matcher):
+    matched = 0
+    for names in dirs:
+        matched += len(matcher.filter_names(names))
+    return matched
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara fnmatch con PatternMatcher sobre nombres sintéticos")
+    parser.add_argument('--names', type=int, default=1000000)
+    parser.add_argument('--per-dir', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.names, args.seed)
+    dirs = listings(names, args.per_dir)
+    cases = [
+        ['*.py'],
+        ['*.py', '*.txt', '*.log', 'core.*'],
+        ['*[0-9][0-9].json', '?a*.md'],
+    ]
+    print(f"{args.names} nombres en {len(dirs)} directorios de {args.per_dir}")
+    for patterns in cases:
+        matcher = PatternMatcher(patterns)
+        t_loop, n_loop = timed(fnmatch_loop, dirs, patterns)
+        t_batch, n_batch = timed(matcher_batch, dirs, matcher)
+        assert n_loop == n_batch, (patterns, n_loop, n_batch)
+        print(f"{';'.join(patterns):<40} fnmatch {t_loop:7.3f} s  "
+              f"matcher {t_batch:7.3f} s  x{t_loop / t_batch:5.1f}  ({n_batch} coincidencias)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import psutil
+from process_monitor import ProcessSampler, SAMPLE_INTERVAL, OVERHEAD_BUDGET, SORT_KEYS
+
+# Coste del panel de procesos: lanza N procesos dormidos, hace varios barridos con
+# ProcessSampler y mide el tiempo de CPU de cada uno. El coste por segundo se compara
+# con OVERHEAD_BUDGET, tanto con el intervalo fijo como con el que elige el muestreo
+
+
+def spawn_sleepers(count):
+    sleepers = []
+    for _ in range(count):
+        sleepers.append(subprocess.Popen(['sleep', '3600'], stdin=subprocess.DEVNULL,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    return sleepers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el coste de muestrear procesos con psutil")
+    parser.add_argument('--processes', type=int, default=2000, help="procesos dormidos a lanzar")
+    parser.add_argument('--sweeps', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=SAMPLE_INTERVAL)
+    parser.add_argument('--sort', choices=SORT_KEYS, default='cpu')
+    parser.add_argument('--output', default=None, help="guardar el resultado en JSON")
+    args = parser.parse_args()
+
+    sleepers = spawn_sleepers(args.processes)
+    try:
+        sampler = ProcessSampler(sort_key=args.sort, interval=args.interval)
+        sampler.sweep()   # el primero solo fija las lecturas de referencia
+        costs = []
+        walls = []
+        for _ in range(args.sweeps):
+            costs.append(sampler.sweep())
+            walls.append(sampler.stats['sweep_ms'])
+        processes = sampler.stats['processes']
+    finally:
+        for proc in sleepers:
+            proc.kill()
+        for proc in sleepers:
+            proc.wait()
+
+    cost = sum(costs) / len(costs)
+    adaptive = max(args.interval, cost / OVERHEAD_BUDGET)
+    report = {
+        'python': platform.python_version(),
+        'psutil': psutil.__version__,
+        'cpu_count': os.cpu_count(),
+        'processes': processes,
+        'sweep_ms': round(sum(walls) / len(walls), 2),
+        'sweep_cpu_ms': round(cost * 1000, 2),
+        'overhead_fixed': round(cost / args.interval, 5),
+        'adaptive_interval_s': round(adaptive, 2),
+        'overhead_adaptive': round(cost / adaptive, 5),
+    }
+    print(f"{processes} procesos · barrido {report['sweep_ms']} ms ({report['sweep_cpu_ms']} ms de CPU)")
+    print(f"Cada {args.interval:g} s: {report['overhead_fixed']:.2%} de una CPU")
+    print(f"Intervalo ajustado {adaptive:.1f} s: {report['overhead_adaptive']:.2%} de una CPU "
+          f"(límite {OVERHEAD_BUDGET:.0%})")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['overhead_adaptive'] <= OVERHEAD_BUDGET else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
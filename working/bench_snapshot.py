@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from file_index import FileIndex, make_row
+from index_snapshot import write_snapshot, snapshot_path
+
+# Arranque con la instantánea frente a SQLite: genera un índice sintético de N filas,
+# escribe la instantánea y mide, cada vez en un proceso nuevo, cuánto tarda en llegar
+# el primer resultado (y el último) de varias consultas desde que se abre el índice
+
+EXTENSIONS = ['py', 'txt', 'log', 'gz', 'so', 'json', 'md', 'c', 'h', 'png', 'jpg', 'conf', 'crash']
+WORDS = ['datos', 'informe', 'copia', 'core', 'modulo', 'config', 'cache', 'test', 'img', 'nota']
+# (consulta, sin distinguir mayúsculas): las que SQLite no resuelve con GLOB sobre un
+# índice llaman a una función Python por fila
+QUERIES = [
+    ('*.crash', False), ('core_1*', False), ('*.log;*.gz', False), ('size>1M and *.png', False),
+    ('CONFIG_2*', True), ('*NOTA_7*.c', True),
+]
+TABLE_QUERY = '(búsqueda rápida)'
+
+
+class FakeStat:
+    def __init__(self, size, mtime, is_dir):
+        self.st_size = size
+        self.st_mtime = mtime
+        self.st_mode = 0o040755 if is_dir else 0o100644
+
+
+def build_index(db_path, entries, seed):
+    rng = random.Random(seed)
+    index = FileIndex(db_path)
+    conn = index.connect()
+    try:
+        index.create_tables(conn, 'files')
+        batch = []
+        dirs = ['/datos']
+        for i in range(entries):
+            parent = rng.choice(dirs[-200:])
+            if i % 20 == 0:
+                path = f"{parent}/dir_{i}"
+                dirs.append(path)
+                row = make_row(path, FakeStat(4096, 1.7e9, True))
+            else:
+                name = f"{rng.choice(WORDS)}_{i}.{rng.choice(EXTENSIONS)}"
+                row = make_row(f"{parent}/{name}", FakeStat(rng.randint(0, 1 << 22), 1.7e9, False))
+            batch.append(row)
+            if len(batch) >= 10000:
+                conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', batch)
+                conn.commit()   # una transacción enorme hace crecer el WAL sin límite
+                batch = []
+        conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', batch)
+        index.create_indexes(conn, 'files')
+        conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('built_at', str(time.time())))
+        conn.commit()
+    finally:
+        conn.close()
+    return index
+
+
+def peak_rss_kb():
+    # ru_maxrss se hereda del padre a través de fork/exec; VmHWM es solo de este proceso
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_query(db_path, source, query, ignore_case):
+    # Proceso nuevo: incluye abrir el índice, como al lanzar el explorador
+    from file_query import looks_like_query
+    from index_snapshot import load_snapshot
+    start = time.perf_counter()
+    index = FileIndex(db_path)
+    searcher = load_snapshot(index) if source == 'snapshot' else index
+    opened = time.perf_counter() - start
+    pattern, where = (None, query) if looks_like_query(query) else (query, None)
+    first = None
+    count = 0
+    for _ in searcher.search(pattern, ignore_case=ignore_case == 'i', where=where):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return {
+        'open_ms': round(opened * 1000, 1),
+        'first_ms': round(first * 1000, 1) if first is not None else None,
+        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+        'results': count,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def run_table(db_path, source):
+    # Tabla de la búsqueda rápida: cargar las filas de SQLite o usar las columnas del mmap
+    from fuzzy_finder import NameTable
+    from index_snapshot import load_snapshot
+    start = time.perf_counter()
+    index = FileIndex(db_path)
+    table = NameTable()
+    if source == 'snapshot':
+        table.load_snapshot(load_snapshot(index))
+    else:
+        table.load(index)
+    elapsed = time.perf_counter() - start
+    return {
+        'open_ms': round(elapsed * 1000, 1),
+        'first_ms': round(elapsed * 1000, 1),
+        'total_ms': round(elapsed * 1000, 1),
+        'results': len(table),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def measure(db_path, source, query, ignore_case=False):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', db_path, source, query, 'i' if ignore_case else '-'],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el arranque con la instantánea del índice")
+    parser.add_argument('--entries', type=int, default=2000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'papilink_bench'))
+    parser.add_argument('--output', default=None, help="guardar el resultado en JSON")
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        db_path, source, query, ignore_case = args.child
+        if query == TABLE_QUERY:
+            print(json.dumps(run_table(db_path, source)))
+        else:
+            print(json.dumps(run_query(db_path, source, query, ignore_case)))
+        return 0
+
+    os.makedirs(args.workdir, exist_ok=True)
+    db_path = os.path.join(args.workdir, f"indice-{args.entries}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    start = time.perf_counter()
+    index = build_index(db_path, args.entries, args.seed)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    write_snapshot(index)
+    written = time.perf_counter() - start
+    print(f"{args.entries} filas · índice {built:.1f} s · instantánea {written:.1f} s "
+          f"({os.path.getsize(snapshot_path(index)) / 1e6:.0f} MB)")
+
+    report = {'python': platform.python_version(), 'entries': args.entries,
+              'snapshot_write_s': round(written, 2), 'results': []}
+    for query, ignore_case in QUERIES + [(TABLE_QUERY, False)]:
+        for source in ('sqlite', 'snapshot'):
+            result = measure(db_path, source, query, ignore_case)
+            result.update({'query': query, 'ignore_case': ignore_case, 'source': source})
+            report['results'].append(result)
+            first = f"{result['first_ms']:7.1f}" if result['first_ms'] is not None else '      -'
+            label = f"{query} (-i)" if ignore_case else query
+            print(f"{label:<22} {source:<9} abrir {result['open_ms']:6.1f} ms · primero {first} ms · "
+                  f"todo {result['total_ms']:8.1f} ms · {result['results']} resultados · "
+                  f"RSS {result['peak_rss_kb'] // 1024} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
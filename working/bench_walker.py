@@ -0,0 +1,295 @@
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fast_walker import ParallelWalker
+from search_engine import SearchEngine
+
+# Banco de pruebas del recorrido: genera árboles sintéticos reproducibles (profundos
+# o anchos, con bucles de enlaces simbólicos y directorios sin permiso de lectura),
+# mide cada escenario en un proceso aparte y guarda los resultados en JSON para
+# comparar versiones del recorrido con --compare
+
+EXTENSIONS = ['py', 'txt', 'log', 'gz', 'so', 'json', 'md', 'c', 'h', 'png', 'jpg', 'conf']
+WORDS = ['datos', 'informe', 'copia', 'core', 'modulo', 'config', 'cache', 'test', 'img', 'nota']
+TREE_MARKER = '.bench_tree.json'
+
+# forma -> (archivos por directorio, subdirectorios por directorio)
+SHAPES = {
+    'deep': (6, 1),
+    'wide': (400, 40),
+}
+DEEP_CHAIN = 64
+LOOP_EVERY = 50          # un enlace a un directorio antecesor cada N directorios
+UNREADABLE_EVERY = 200   # un directorio sin permisos cada N directorios
+
+
+def build_tree(base, shape, entries, seed):
+    # Reutiliza el árbol si ya existe con los mismos parámetros: los de 2M tardan en crearse
+    params = {'shape': shape, 'entries': entries, 'seed': seed}
+    marker = os.path.join(base, TREE_MARKER)
+    try:
+        with open(marker) as f:
+            info = json.load(f)
+        if info['params'] == params:
+            return info
+    except (OSError, ValueError, KeyError):
+        pass
+    if os.path.exists(base):
+        remove_tree(base)
+    os.makedirs(base)
+
+    rng = random.Random(seed)
+    files_per_dir, subdirs_per_dir = SHAPES[shape]
+    info = {'params': params, 'files': 0, 'dirs': 0, 'symlinks': 0, 'unreadable': 0}
+    pending = [(base, 0)]
+    unreadable = []
+    created = 0
+    while pending and created < entries:
+        # deep: cadenas de DEEP_CHAIN niveles; wide: recorrido en anchura
+        path, depth = pending.pop() if shape == 'deep' else pending.pop(0)
+        for i in range(files_per_dir):
+            if created >= entries:
+                break
+            name = f"{rng.choice(WORDS)}_{i}_{rng.randint(0, 99999)}.{rng.choice(EXTENSIONS)}"
+            with open(os.path.join(path, name), 'wb') as f:
+                f.write(b'x' * rng.randint(0, 64))
+            created += 1
+            info['files'] += 1
+
+        subdirs = subdirs_per_dir
+        if shape == 'deep' and depth + 1 >= DEEP_CHAIN:
+            subdirs = 0
+        if shape == 'deep' and path == base:
+            subdirs = max(1, entries // (DEEP_CHAIN * (files_per_dir + 1)))
+        for i in range(subdirs):
+            if created >= entries:
+                break
+            sub = os.path.join(path, f"dir_{depth}_{i}")
+            os.mkdir(sub)
+            created += 1
+            info['dirs'] += 1
+            pending.append((sub, depth + 1))
+            if info['dirs'] % LOOP_EVERY == 0:
+                os.symlink('..', os.path.join(sub, 'bucle'))
+                os.symlink(base, os.path.join(sub, 'raiz'))
+                info['symlinks'] += 2
+                created += 2
+            if info['dirs'] % UNREADABLE_EVERY == 0:
+                unreadable.append(sub)
+
+    # Se quitan los permisos al final, cuando ya están llenos
+    for path in unreadable:
+        os.chmod(path, 0)
+    info['unreadable'] = len(unreadable)
+    info['entries'] = created
+    with open(marker, 'w') as f:
+        json.dump(info, f)
+    return info
+
+
+def remove_tree(base):
+    # Los directorios sin permisos se restauran antes de borrar
+    for root, dirs, files in os.walk(base):
+        for name in dirs:
+            path = os.path.join(root, name)
+            try:
+                if not os.path.islink(path):
+                    os.chmod(path, stat.S_IRWXU)
+            except OSError:
+                pass
+    shutil.rmtree(base, ignore_errors=True)
+
+
+def scan_oswalk(root, pattern, threads):
+    # Lo que hacía search_files antes del recorrido en paralelo
+    counters = {'stat_calls': 0, 'matches': 0, 'entries': 0}
+    for dirpath, dirs, files in os.walk(root):
+        counters['entries'] += len(dirs) + len(files)
+        for name in files:
+            if fnmatch.fnmatch(name, pattern):
+                path = os.path.join(dirpath, name)
+                counters['stat_calls'] += 1
+                try:
+                    os.stat(path)
+                except OSError:
+                    continue
+                counters['matches'] += 1
+                yield counters
+    yield counters
+
+
+def scan_engine(root, pattern, threads):
+    engine = SearchEngine(roots=[root], threads=threads, prune_mounts=False)
+    counters = {'stat_calls': 0, 'matches': 0, 'entries': 0}
+    for _ in engine.search(pattern):
+        counters['matches'] += 1
+        counters['stat_calls'] = engine.stat_calls
+        yield counters
+    counters['stat_calls'] = engine.stat_calls
+    counters['entries'] = engine.walker.entries_seen
+    yield counters
+
+
+def scan_walker_stat(root, pattern, threads):
+    # Equivalente a construir el índice: stat de todas las entradas
+    walker = ParallelWalker([root], workers=threads, with_stat=True)
+    counters = {'stat_calls': 0, 'matches': 0, 'entries': 0}
+    for _, dirs, files in walker.walk():
+        counters['matches'] += len(dirs) + len(files)
+        yield counters
+    counters['stat_calls'] = walker.stat_calls
+    counters['entries'] = walker.entries_seen
+    yield counters
+
+
+def scan_walker_follow(root, pattern, threads):
+    # Siguiendo los enlaces: los bucles ('bucle', 'raiz') no deben multiplicar el trabajo
+    walker = ParallelWalker([root], workers=threads, symlinks='follow')
+    counters = {'stat_calls': 0, 'matches': 0, 'entries': 0}
+    for _, dirs, files in walker.walk():
+        counters['matches'] += len(dirs) + len(files)
+        yield counters
+    counters['stat_calls'] = walker.stat_calls
+    counters['entries'] = walker.entries_seen
+    yield counters
+
+
+SCENARIOS = {
+    'oswalk-fnmatch': scan_oswalk,
+    'engine': scan_engine,
+    'walker-stat': scan_walker_stat,
+    'walker-follow': scan_walker_follow,
+}
+
+
+def run_scenario(name, root, pattern, threads):
+    # Se ejecuta en un proceso nuevo: ru_maxrss es el pico de ese escenario y nada más
+    start = time.perf_counter()
+    first = None
+    counters = {}
+    for counters in SCENARIOS[name](root, pattern, threads):
+        if first is None and counters['matches']:
+            first = time.perf_counter() - start
+    seconds = time.perf_counter() - start
+    return {
+        'scenario': name,
+        'seconds': round(seconds, 4),
+        'first_result_s': round(first, 4) if first is not None else None,
+        'entries': counters['entries'],
+        'entries_per_sec': round(counters['entries'] / seconds) if seconds > 0 else 0,
+        'matches': counters['matches'],
+        'stat_calls': counters['stat_calls'],
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def measure(name, root, pattern, threads, repeat):
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            runs.append(pool.submit(run_scenario, name, root, pattern, threads).result())
+    # La mejor de las repeticiones: la caché de inodos ya está caliente tras la primera
+    return min(runs, key=lambda r: r['seconds'])
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(previous_path, report):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    old = {(r['tree'], r['scenario']): r for r in previous['results']}
+    print(f"\nComparación con {previous_path} ({previous.get('label') or previous.get('revision')})")
+    for result in report['results']:
+        before = old.get((result['tree'], result['scenario']))
+        if not before or not before['seconds']:
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds'] * 100
+        flag = '  <-- más lento' if change > 10 else ''
+        print(f"{result['tree']:<14} {result['scenario']:<15} {before['seconds']:8.3f} s -> "
+              f"{result['seconds']:8.3f} s  {change:+6.1f}%{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el recorrido de búsqueda sobre árboles sintéticos")
+    parser.add_argument('--sizes', default='10000,100000',
+                        help="entradas por árbol, separadas por comas (hasta 2000000)")
+    parser.add_argument('--shapes', default=','.join(SHAPES))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--pattern', default='*.log')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'papilink_bench'),
+                        help="donde se crean (y se reutilizan) los árboles")
+    parser.add_argument('--keep', action='store_true', help="no borrar los árboles al terminar")
+    parser.add_argument('--label', default=None, help="nombre de esta versión del recorrido en el informe")
+    parser.add_argument('--output', default='bench_walker.json')
+    parser.add_argument('--compare', default=None, help="informe JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    if os.geteuid() == 0:
+        print("Aviso: como root los directorios sin permisos se pueden leer igualmente", file=sys.stderr)
+
+    report = {
+        'label': args.label,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pattern': args.pattern,
+        'threads': args.threads,
+        'trees': {},
+        'results': [],
+    }
+    try:
+        for shape in args.shapes.split(','):
+            for size in (int(s) for s in args.sizes.split(',')):
+                tree = f"{shape}-{size}"
+                base = os.path.join(args.workdir, tree)
+                start = time.perf_counter()
+                info = build_tree(base, shape, size, args.seed)
+                report['trees'][tree] = info
+                print(f"{tree}: {info['files']} archivos, {info['dirs']} directorios, "
+                      f"{info['symlinks']} enlaces, {info['unreadable']} sin permisos "
+                      f"({time.perf_counter() - start:.1f} s)")
+                for name in args.scenarios.split(','):
+                    result = measure(name, base, args.pattern, args.threads, args.repeat)
+                    result['tree'] = tree
+                    report['results'].append(result)
+                    first = result['first_result_s']
+                    print(f"  {name:<15} {result['seconds']:8.3f} s  {result['entries_per_sec']:>10} entradas/s  "
+                          f"primero {first if first is not None else '-':>7}  stat {result['stat_calls']:>8}  "
+                          f"RSS {result['peak_rss_kb'] // 1024} MB")
+    finally:
+        if not args.keep and os.path.isdir(args.workdir):
+            for tree in os.listdir(args.workdir):
+                remove_tree(os.path.join(args.workdir, tree))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from datetime import datetime
 import threading
 import psutil
 import platform
+from system_sampler import SystemSampler
+from time_series import Sparkline
 
 try:
     import cpuinfo
@@ -28,9 +30,13 @@ class FileSearchExplorer:
         self.stop_search = False
         self.search_thread = None
         self.tree_nodes = {}
+        # Historia de la última hora (CPU por núcleo, RAM, disco y red) en otro hilo
+        self.system_sampler = SystemSampler(self.format_size, publish_lines=False)
+        self.drawn_samples = 0
         
         self.create_widgets()
         self.configure_exclusions()
+        self.system_sampler.start()
         self.update_system_info()
     
     def configure_styles(self):
@@ -72,6 +78,19 @@ class FileSearchExplorer:
         self.tree.heading('modified', text='Modificación')
         self.tree.pack(fill=tk.BOTH, expand=True)
         
+        # Minigráficas del sistema
+        charts_frame = ttk.Frame(main_frame)
+        charts_frame.pack(fill=tk.X, padx=10, pady=(5, 0))
+        cores = self.system_sampler.history['cpu'].width
+        self.sparklines = {
+            'cpu': Sparkline(charts_frame, rows=cores, row_height=max(4, 56 // cores), maximum=100),
+            'ram': Sparkline(charts_frame, row_height=56, maximum=100),
+            'disk_io': Sparkline(charts_frame, rows=2, row_height=28),
+            'net_io': Sparkline(charts_frame, rows=2, row_height=28),
+        }
+        for chart in self.sparklines.values():
+            chart.pack(side=tk.LEFT, padx=(0, 8))
+        
         # Barra de progreso
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress.pack(fill=tk.X, padx=10, pady=5)
@@ -214,7 +233,23 @@ class FileSearchExplorer:
         return ["Instalar py-cpuinfo para más detalles"]
     
     def update_system_info(self):
-        self.master.after(5000, self.update_system_info)
+        # Se redibuja solo si el muestreador guardó una lectura nueva
+        sampler = self.system_sampler
+        if sampler.samples != self.drawn_samples:
+            self.drawn_samples = sampler.samples
+            history = sampler.history
+            captions = {}
+            cpu = history['cpu'].last()
+            if cpu:
+                captions['cpu'] = f"CPU {sum(cpu) / len(cpu):.0f}%"
+                captions['ram'] = f"RAM {history['ram'].last()[0]:.0f}%"
+                read, write = history['disk_io'].last()
+                captions['disk_io'] = f"Disco {self.format_size(read)}/s · {self.format_size(write)}/s"
+                received, sent = history['net_io'].last()
+                captions['net_io'] = f"Red {self.format_size(received)}/s · {self.format_size(sent)}/s"
+            for series, chart in self.sparklines.items():
+                chart.draw(history[series].values(), captions.get(series, ''))
+        self.master.after(1000, self.update_system_info)
 
 if __name__ == "__main__":
     root = tk.Tk()
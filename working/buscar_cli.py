@@ -0,0 +1,147 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from search_engine import SearchEngine, entry_type
+from file_query import FileQuery, QueryError
+from pattern_matcher import split_patterns
+from search_cache import SearchCache, DEFAULT_CACHE_PATH
+from archive_search import ArchiveCache, DEFAULT_ARCHIVE_CACHE_PATH
+
+# Búsqueda de archivos desde la línea de órdenes, sin pantalla. Ejemplos:
+#   python3 buscar_cli.py '*.log;core.*' --root /var --exclude /var/cache > hoy.jsonl
+#   python3 buscar_cli.py '*.py' --format csv --threads 16 | sort -t, -k2 -n
+#   python3 buscar_cli.py --where 'size>500M and mtime<7d and ext in (log,gz)' --root /var
+#   python3 buscar_cli.py '*.log' --root /srv --cache   # repetirla solo relee lo que cambió
+#   python3 buscar_cli.py '*.properties' --root /opt --archives   # también dentro de .jar/.zip/.tar.gz
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Busca archivos por nombre y escribe los resultados en JSONL o CSV")
+    parser.add_argument('patterns', nargs='*', help="patrones glob (separados por ';' o en varios argumentos)")
+    parser.add_argument('--where', '-w', default=None,
+                        help="filtro: 'size>500M and mtime<7d and ext in (log,gz)', 'type=d and name~^tmp'...")
+    parser.add_argument('--root', action='append', dest='roots', help="directorio de inicio (se puede repetir, por defecto /)")
+    parser.add_argument('--exclude', action='append', default=[], help="directorio a excluir (se puede repetir)")
+    parser.add_argument('--all-filesystems', action='store_true',
+                        help="entrar también en /proc, /sys, montajes de red, FUSE y overlays")
+    parser.add_argument('--one-file-system', '-x', action='store_true',
+                        help="no cruzar a otros sistemas de archivos (como find -xdev)")
+    parser.add_argument('--follow-symlinks', '-L', action='store_true',
+                        help="entrar en los enlaces simbólicos a directorios (sin repetir directorios)")
+    parser.add_argument('--unique-dirs', action='store_true',
+                        help="leer cada directorio una sola vez aunque aparezca por varios montajes bind")
+    parser.add_argument('--threads', type=int, default=None, help="hilos de lectura de directorios")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--ignore-case', '-i', action='store_true')
+    parser.add_argument('--regex', action='store_true', help="los patrones son expresiones regulares")
+    parser.add_argument('--index', action='store_true', help="consultar el índice persistente en lugar de recorrer el disco")
+    parser.add_argument('--archives', '-z', action='store_true',
+                        help="buscar también dentro de .zip, .jar y .tar(.gz/.bz2/.xz) sin extraerlos")
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, default=None, metavar='ARCHIVO',
+                        help="guardar el resultado y, al repetir la búsqueda, releer solo los directorios modificados")
+    args = parser.parse_args(argv)
+    # Cada argumento puede llevar varios patrones separados por ';'
+    args.patterns = [pattern for arg in args.patterns for pattern in split_patterns(arg)]
+    if not args.patterns and not args.where:
+        parser.error("indica al menos un patrón o --where")
+    return args
+
+
+def format_mtime(mtime):
+    return datetime.fromtimestamp(mtime, timezone.utc).isoformat()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.where:
+        try:
+            query = FileQuery(args.where)
+            if args.index:
+                query.check_rows()
+        except QueryError as e:
+            print(f"Consulta no válida: {e}", file=sys.stderr)
+            return 2
+    cache = None
+    if args.cache and not args.index:
+        cache = SearchCache()
+        cache.load(args.cache)
+    archive_cache = None
+    if args.archives:
+        archive_cache = ArchiveCache()
+        archive_cache.load(DEFAULT_ARCHIVE_CACHE_PATH)
+    engine = SearchEngine(
+        roots=args.roots or ['/'],
+        excluded_dirs=args.exclude,
+        prune_mounts=not args.all_filesystems,
+        one_file_system=args.one_file_system,
+        threads=args.threads,
+        ignore_case=args.ignore_case,
+        regex=args.regex,
+        use_index=args.index,
+        cache=cache,
+        symlinks='follow' if args.follow_symlinks else 'never',
+        unique_dirs=args.unique_dirs,
+        archives=args.archives,
+        archive_cache=archive_cache
+    )
+
+    out = sys.stdout
+    writer = None
+    if args.format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(['path', 'size', 'mtime', 'type'])
+
+    # stdout bloquea cuando el lector va lento: esa espera frena el recorrido (contrapresión)
+    count = 0
+    try:
+        for path, size, mtime, is_dir in engine.search(args.patterns, args.where):
+            if writer:
+                writer.writerow([path, size, format_mtime(mtime), entry_type(is_dir)])
+            else:
+                out.write(json.dumps({
+                    'path': path, 'size': size, 'mtime': format_mtime(mtime), 'type': entry_type(is_dir)
+                }, ensure_ascii=False) + '\n')
+            count += 1
+        out.flush()
+    except BrokenPipeError:
+        # El lector cerró la tubería (p. ej. '| head'): se termina sin traza
+        engine.stop()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except KeyboardInterrupt:
+        engine.stop()
+        return 130
+
+    if cache:
+        cache.save(args.cache)
+        stats = cache.stats
+        if stats['hit']:
+            print(f"Caché: {stats['dirs_checked']} directorios comprobados · {stats['dirs_rescanned']} releídos · "
+                  f"{stats['subtrees_walked']} subárboles nuevos", file=sys.stderr)
+
+    if archive_cache:
+        archive_cache.save(DEFAULT_ARCHIVE_CACHE_PATH)
+        archives = engine.archive_search
+        if archives:
+            print(f"Comprimidos: {archives.archives_listed} leídos · {archives.archives_cached} desde la caché · "
+                  f"{archives.archives_failed} ilegibles", file=sys.stderr)
+
+    walker = engine.walker
+    if walker:
+        print(f"{count} resultados · {walker.dirs_scanned} directorios · "
+              f"{walker.dirs_per_second():.0f} dir/s · {walker.errors} errores", file=sys.stderr)
+        if walker.repeated:
+            print(f"{len(walker.repeated)} subárboles repetidos (recorridos una sola vez):", file=sys.stderr)
+            for path in sorted(walker.repeated):
+                print(f"  {path}", file=sys.stderr)
+    else:
+        print(f"{count} resultados", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import mmap
+import multiprocessing
+import os
+import re
+import stat
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+
+# Búsqueda por contenido (modo grep): cada archivo se lee con mmap, se descarta
+# rápido con un literal obligatorio y el trabajo se reparte en un pool de procesos
+
+BINARY_SNIFF_BYTES = 8192
+CHUNK_FILES = 16
+SNIPPET_CHARS = 200
+REGEX_META = set('.^$*+?{}[]\\|()')
+QUANTIFIER = re.compile(r'\{\d*(?:,\d*)?\}')
+INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]+[:)]')
+
+
+def class_end(pattern, start):
+    # Posición del ']' que cierra la clase abierta en start: se saltan los escapes (\])
+    # y el ']' del principio ([]a], [^]a]), que son literales. len(pattern) si no cierra
+    i = start + 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            i += 2
+            continue
+        if pattern[i] == ']':
+            return i
+        i += 1
+    return len(pattern)
+
+
+def required_literal(pattern):
+    # Literal que toda coincidencia debe contener: la racha más larga de caracteres
+    # normales fuera de grupos. Con alternativas '|' no se puede garantizar nada
+    if '|' in pattern:
+        return b''
+    # (?i), (?x), (?s)...: el literal tal cual ya no es obligatorio
+    if INLINE_FLAGS.search(pattern):
+        return b''
+    best = ''
+    run = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            best = max(best, run, key=len)
+            run = ''
+            i += 2
+            continue
+        if c in REGEX_META:
+            if c in '*?{' and run:
+                # El cuantificador hace opcional el último carácter de la racha
+                run = run[:-1]
+            best = max(best, run, key=len)
+            run = ''
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+            elif c == '[':
+                i = class_end(pattern, i)
+            elif c == '{':
+                # Las cifras de {m,n} no son parte del texto buscado
+                quantifier = QUANTIFIER.match(pattern, i)
+                if quantifier:
+                    i = quantifier.end() - 1
+        elif depth == 0:
+            run += c
+        i += 1
+    best = max(best, run, key=len)
+    return best.encode('utf-8')
+
+
+@lru_cache(maxsize=8)
+def compile_query(query, regex, ignore_case):
+    flags = re.IGNORECASE if ignore_case else 0
+    source = query if regex else re.escape(query)
+    return re.compile(source.encode('utf-8'), flags | re.MULTILINE)
+
+
+def search_buffer(data, query, regex, ignore_case, literal, max_matches):
+    # data: mmap o bytes. Devuelve [(línea, offset, texto)]; vacía si es binario
+    if b'\0' in data[:BINARY_SNIFF_BYTES]:
+        return []
+    if literal and data.find(literal) == -1:
+        return []
+    matches = []
+    line_no = 1
+    counted_to = 0
+    for match in compile_query(query, regex, ignore_case).finditer(data):
+        offset = match.start()
+        line_no += data[counted_to:offset].count(b'\n')
+        counted_to = offset
+        line_start = data.rfind(b'\n', 0, offset) + 1
+        line_end = data.find(b'\n', offset)
+        if line_end == -1:
+            line_end = len(data)
+        text = data[line_start:min(line_end, line_start + SNIPPET_CHARS)].decode('utf-8', 'replace')
+        matches.append((line_no, offset, text.strip()))
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+def search_file(path, query, regex, ignore_case, literal, max_matches):
+    # Devuelve (ruta, tamaño, mtime, [(línea, offset, texto)]) o None si se descarta
+    try:
+        # O_NONBLOCK: abrir un FIFO no debe bloquear al proceso
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        stats = os.fstat(fd)
+        if not stat.S_ISREG(stats.st_mode) or stats.st_size == 0:
+            return None
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            matches = search_buffer(mm, query, regex, ignore_case, literal, max_matches)
+        return (path, stats.st_size, stats.st_mtime, matches) if matches else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+
+
+def search_chunk(paths, query, regex, ignore_case, literal, max_matches):
+    found = []
+    for path in paths:
+        result = search_file(path, query, regex, ignore_case, literal, max_matches)
+        if result:
+            found.append(result)
+    return len(paths), found
+
+
+class ContentSearch:
+    def __init__(self, query, regex=False, ignore_case=False, workers=None, max_matches_per_file=100):
+        self.query = query
+        self.regex = regex
+        self.ignore_case = ignore_case
+        self.workers = workers or os.cpu_count() or 1
+        self.max_matches = max_matches_per_file
+        # Con ignore_case el literal no sirve de filtro: mmap.find distingue mayúsculas
+        if ignore_case:
+            self.literal = b''
+        elif regex:
+            self.literal = required_literal(query)
+        else:
+            self.literal = query.encode('utf-8')
+        compile_query(query, regex, ignore_case)  # errores de sintaxis en el hilo que llama
+        self.stopped = False
+        self.files_scanned = 0
+        self.files_matched = 0
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self, paths):
+        # Produce (ruta, tamaño, mtime, línea, offset, texto) según van terminando los lotes.
+        # Lotes pequeños y pocas tareas en vuelo: los primeros resultados llegan enseguida
+        args = (self.query, self.regex, self.ignore_case, self.literal, self.max_matches)
+        context = multiprocessing.get_context('spawn')  # sin fork del proceso con Tk e hilos
+        paths = iter(paths)
+        in_flight = set()
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            try:
+                while True:
+                    while not self.stopped and len(in_flight) < self.workers * 2:
+                        chunk = [p for _, p in zip(range(CHUNK_FILES), paths)]
+                        if not chunk:
+                            break
+                        in_flight.add(pool.submit(search_chunk, chunk, *args))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        scanned, found = future.result()
+                        self.files_scanned += scanned
+                        self.files_matched += len(found)
+                        for path, size, mtime, matches in found:
+                            for line_no, offset, text in matches:
+                                yield path, size, mtime, line_no, offset, text
+                    if self.stopped:
+                        break
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+
+def check_required_literal(rounds=20000, seed=1):
+    # Comprobación: el filtro del literal nunca descarta un texto en el que la regex coincide
+    import random
+    rng = random.Random(seed)
+    pieces = ['a', 'b', 'c', 'ab', 'x{2}', 'b{1,3}', 'c{2,}', '1', '0', '{', '}', ',', '.', '*', '?', '+',
+              '[ab]', '[a\\]b]', '[]a]', '[^]b]', '(ab)', '(?:bc)', '(?i)', '(?s)', '\\d', '^', '$', '|']
+    alphabet = 'abcABC01{},x\n'
+    for _ in range(rounds):
+        pattern = ''.join(rng.choices(pieces, k=rng.randint(1, 6)))
+        try:
+            regex = compile_query(pattern, True, False)
+        except re.error:
+            continue
+        literal = required_literal(pattern)
+        data = ''.join(rng.choices(alphabet, k=rng.randint(0, 12))).encode()
+        assert not (regex.search(data) and data.find(literal) == -1), (pattern, literal, data)
+    for pattern, literal in (('x{10}', b''), ('ab{2,3}c', b'a'), ('(?i)error', b''), ('error{', b'erro'),
+                             ('conn(ect)? refused', b' refused'), ('[a\\]b]c', b'c'), ('x[]y]zz', b'zz')):
+        assert required_literal(pattern) == literal, (pattern, required_literal(pattern))
+
+
+if __name__ == "__main__":
+    check_required_literal()
+    print("required_literal: ok")
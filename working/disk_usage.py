@@ -0,0 +1,234 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk
+from array import array
+from fast_walker import ParallelWalker
+
+# Uso de disco por directorio (como du) en un solo recorrido paralelo. Cada directorio
+# es un índice en arrays compactos (padre, bytes propios, archivos) y los totales
+# recursivos se suman al final de una pasada; navegar no vuelve a leer el disco
+
+CHILD_LIMIT = 200   # hijos mostrados por nivel; el resto se resume en una fila
+BAR_WIDTH = 20
+
+
+class DiskUsage:
+    def __init__(self, root, excluded_dirs=(), workers=None):
+        self.root = os.path.abspath(root)
+        self.excluded_dirs = list(excluded_dirs)
+        self.workers = workers
+        self.parents = array('i')      # índice del directorio padre (-1 en la raíz)
+        self.names = []                # nombre de cada directorio (la raíz lleva la ruta entera)
+        self.own_bytes = array('q')    # bytes ocupados (st_blocks) de los archivos directos
+        self.own_files = array('q')
+        self.totals = None             # bytes recursivos, tras aggregate()
+        self.file_totals = None
+        self.child_start = None        # hijos de i: child_index[child_start[i]:child_start[i + 1]]
+        self.child_index = None
+        self.walker = None
+        self.stopped = False
+        self.complete = False
+        self.bytes_seen = 0
+
+    def __len__(self):
+        return len(self.parents)
+
+    def stop(self):
+        self.stopped = True
+        if self.walker:
+            self.walker.stop()
+
+    def add_dir(self, parent, name):
+        self.parents.append(parent)
+        self.names.append(name)
+        self.own_bytes.append(0)
+        self.own_files.append(0)
+        return len(self.parents) - 1
+
+    def scan(self):
+        index_of = {self.root: self.add_dir(-1, self.root)}
+
+        def index_for(path):
+            # Un hijo puede llegar antes que el listado de su padre: se crean los que falten.
+            # El padre siempre recibe un índice menor que sus hijos
+            idx = index_of.get(path)
+            if idx is None:
+                parent = index_for(os.path.dirname(path))
+                idx = index_of[path] = self.add_dir(parent, os.path.basename(path))
+            return idx
+
+        # Los enlaces duros se cuentan una sola vez, como du; los directorios repetidos
+        # por montajes bind ni siquiera se leen
+        seen_inodes = set()
+        self.walker = ParallelWalker([self.root], self.excluded_dirs, workers=self.workers, with_stat=True,
+                                     unique_dirs=True)
+        for root, dirs, files in self.walker.walk():
+            if self.stopped:
+                break
+            idx = index_for(root)
+            used = 0
+            for entry in files:
+                try:
+                    stats = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stats.st_nlink > 1:
+                    key = (stats.st_dev, stats.st_ino)
+                    if key in seen_inodes:
+                        continue
+                    seen_inodes.add(key)
+                used += stats.st_blocks * 512
+            for entry in dirs:
+                index_for(entry.path)
+                try:
+                    used += entry.stat(follow_symlinks=False).st_blocks * 512
+                except OSError:
+                    pass
+            self.own_bytes[idx] += used
+            self.own_files[idx] += len(files)
+            self.bytes_seen += used
+        self.complete = not self.stopped
+        self.aggregate()
+
+    def aggregate(self):
+        count = len(self.parents)
+        totals = array('q', self.own_bytes)
+        file_totals = array('q', self.own_files)
+        parents = self.parents
+        # De las hojas hacia la raíz: basta una pasada porque padre < hijo
+        for i in range(count - 1, 0, -1):
+            parent = parents[i]
+            totals[parent] += totals[i]
+            file_totals[parent] += file_totals[i]
+
+        # Hijos agrupados por padre (ordenación por conteo)
+        start = array('i', bytes(4 * (count + 1)))
+        for i in range(1, count):
+            start[parents[i] + 1] += 1
+        for i in range(count):
+            start[i + 1] += start[i]
+        cursor = array('i', start)
+        child_index = array('i', bytes(4 * max(0, count - 1)))
+        for i in range(1, count):
+            parent = parents[i]
+            child_index[cursor[parent]] = i
+            cursor[parent] += 1
+
+        self.totals = totals
+        self.file_totals = file_totals
+        self.child_start = start
+        self.child_index = child_index
+
+    def children(self, idx):
+        # Subdirectorios de idx, los más grandes primero
+        kids = self.child_index[self.child_start[idx]:self.child_start[idx + 1]]
+        return sorted(kids, key=self.totals.__getitem__, reverse=True)
+
+    def path(self, idx):
+        parts = []
+        while idx > 0:
+            parts.append(self.names[idx])
+            idx = self.parents[idx]
+        parts.append(self.root)
+        return os.path.join(*reversed(parts))
+
+
+class DiskUsageWindow(tk.Toplevel):
+    def __init__(self, master, root, excluded_dirs, format_size):
+        super().__init__(master)
+        self.title(f"Uso de disco: {root}")
+        self.geometry("900x600")
+        self.format_size = format_size
+        self.usage = DiskUsage(root, excluded_dirs)
+
+        self.status = ttk.Label(self, text="Analizando...")
+        self.status.pack(fill=tk.X, padx=10, pady=5)
+        self.tree = ttk.Treeview(self, columns=('total', 'share', 'files'))
+        self.tree.heading('#0', text='Directorio', anchor=tk.W)
+        self.tree.heading('total', text='Tamaño')
+        self.tree.heading('share', text='% del padre')
+        self.tree.heading('files', text='Archivos')
+        self.tree.column('#0', width=400)
+        self.tree.column('total', width=100)
+        self.tree.column('share', width=220)
+        self.tree.column('files', width=90)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind('<<TreeviewOpen>>', self.on_open)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.thread = threading.Thread(target=self.usage.scan, daemon=True)
+        self.thread.start()
+        self.pending_check = self.after(200, self.check_scan)
+
+    def on_close(self):
+        # El after ya programado correría sobre widgets destruidos
+        if self.pending_check:
+            self.after_cancel(self.pending_check)
+            self.pending_check = None
+        self.usage.stop()
+        self.destroy()
+
+    def check_scan(self):
+        self.pending_check = None
+        if not self.winfo_exists():
+            return
+        walker = self.usage.walker
+        if self.thread.is_alive():
+            if walker:
+                self.status.config(
+                    text=f"Analizando: {walker.dirs_scanned} directorios · "
+                         f"{self.format_size(self.usage.bytes_seen)} · {walker.dirs_per_second():.0f} dir/s"
+                )
+            self.pending_check = self.after(200, self.check_scan)
+            return
+        usage = self.usage
+        state = "" if usage.complete else " (incompleto)"
+        self.status.config(
+            text=f"{usage.root}: {self.format_size(usage.totals[0])} en {usage.file_totals[0]} archivos y "
+                 f"{len(usage)} directorios · {walker.elapsed():.1f} s{state}"
+        )
+        self.insert_node('', 0, usage.totals[0])
+        self.tree.item('0', open=True)
+        self.fill_children('0')
+
+    def insert_node(self, parent, idx, parent_total):
+        usage = self.usage
+        total = usage.totals[idx]
+        share = total / parent_total if parent_total else 0.0
+        bar = '█' * round(share * BAR_WIDTH)
+        iid = str(idx)
+        self.tree.insert(
+            parent, 'end', iid=iid, text=f" {usage.names[idx]}",
+            values=(self.format_size(total), f"{bar:<{BAR_WIDTH}} {share:6.1%}", usage.file_totals[idx])
+        )
+        if usage.child_start[idx + 1] > usage.child_start[idx]:
+            # Hijo provisional para que aparezca el desplegable; se rellena al abrir
+            self.tree.insert(iid, 'end', iid=f"{iid}:pending", text="...")
+
+    def on_open(self, event):
+        iid = self.tree.focus()
+        if iid and self.tree.exists(f"{iid}:pending"):
+            self.fill_children(iid)
+
+    def fill_children(self, iid):
+        pending = f"{iid}:pending"
+        if self.tree.exists(pending):
+            self.tree.delete(pending)
+        usage = self.usage
+        idx = int(iid)
+        total = usage.totals[idx]
+        children = usage.children(idx)
+        for child in children[:CHILD_LIMIT]:
+            self.insert_node(iid, child, total)
+        rest = children[CHILD_LIMIT:]
+        if rest:
+            rest_total = sum(usage.totals[child] for child in rest)
+            self.tree.insert(iid, 'end', text=f" … y {len(rest)} directorios más",
+                             values=(self.format_size(rest_total), '', ''))
+        if usage.own_files[idx]:
+            self.tree.insert(iid, 'end', text=" (archivos en este directorio)",
+                             values=(self.format_size(usage.own_bytes[idx]), '', usage.own_files[idx]))
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import stat
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from fast_walker import ParallelWalker
+
+# Buscador de duplicados por etapas: tamaño -> hash de los extremos -> hash completo.
+# Solo se leen enteros los archivos que siguen empatados tras las etapas baratas;
+# los enlaces duros se agrupan por (st_dev, st_ino) y se leen una sola vez
+
+EDGE_BYTES = 4096
+READ_CHUNK = 1024 * 1024
+SIZE_GROUPS_PER_BATCH = 256
+
+
+class DuplicateFinder:
+    def __init__(self, roots=('/',), excluded_dirs=(), min_size=1, edge_bytes=EDGE_BYTES, workers=None):
+        self.roots = list(roots)
+        self.excluded_dirs = list(excluded_dirs)
+        self.min_size = min_size
+        self.edge_bytes = edge_bytes
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.walker = None
+        self.stopped = False
+        self.stage = ''
+        self.files_seen = 0
+        self.hardlinks = 0
+        self.bytes_total = 0
+        self.bytes_read = 0
+        self.lock = threading.Lock()
+
+    def stop(self):
+        self.stopped = True
+        if self.walker:
+            self.walker.stop()
+
+    def collect_by_size(self):
+        # tamaño -> {(st_dev, st_ino): [rutas]}
+        self.stage = 'tamaños'
+        by_size = defaultdict(lambda: defaultdict(list))
+        self.walker = ParallelWalker(self.roots, self.excluded_dirs, with_stat=True)
+        for root, dirs, files in self.walker.walk():
+            if self.stopped:
+                break
+            for entry in files:
+                try:
+                    stats = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if not stat.S_ISREG(stats.st_mode) or stats.st_size < self.min_size:
+                    continue
+                inodes = by_size[stats.st_size]
+                key = (stats.st_dev, stats.st_ino)
+                if key in inodes:
+                    self.hardlinks += 1
+                inodes[key].append(entry.path)
+                self.files_seen += 1
+                self.bytes_total += stats.st_size
+        return by_size
+
+    def count_read(self, nbytes):
+        with self.lock:
+            self.bytes_read += nbytes
+
+    def edge_hash(self, size, paths):
+        try:
+            with open(paths[0], 'rb') as f:
+                head = f.read(self.edge_bytes)
+                if size > 2 * self.edge_bytes:
+                    f.seek(size - self.edge_bytes)
+                tail = f.read(self.edge_bytes)
+        except OSError:
+            return None
+        self.count_read(len(head) + len(tail))
+        return hashlib.blake2b(head + tail, digest_size=16).digest()
+
+    def full_hash(self, size, paths):
+        digest = hashlib.blake2b(digest_size=32)
+        try:
+            with open(paths[0], 'rb') as f:
+                while not self.stopped:
+                    chunk = f.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    self.count_read(len(chunk))
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.digest()
+
+    def hash_items(self, pool, items, hash_func):
+        # items: [(tamaño, inodo, rutas)] -> {(tamaño, hash): [(inodo, rutas)]} con 2 o más
+        buckets = defaultdict(list)
+        digests = pool.map(lambda item: hash_func(item[0], item[2]), items)
+        for (size, key, paths), digest in zip(items, digests):
+            if digest is not None:
+                buckets[(size, digest)].append((key, paths))
+        return {k: group for k, group in buckets.items() if len(group) > 1}
+
+    def run(self):
+        # Produce (tamaño, hash, [[rutas del mismo inodo], ...]) por cada grupo confirmado
+        self.stopped = False
+        by_size = self.collect_by_size()
+        candidates = [
+            (size, list(inodes.items()))
+            for size, inodes in by_size.items() if len(inodes) > 1
+        ]
+        # Los más grandes primero: son los que más espacio liberan
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        del by_size
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Por lotes de tamaños: todos los hilos trabajan a la vez y los grupos
+            # confirmados salen sin esperar al final
+            for start in range(0, len(candidates), SIZE_GROUPS_PER_BATCH):
+                if self.stopped:
+                    return
+                batch = candidates[start:start + SIZE_GROUPS_PER_BATCH]
+                self.stage = 'extremos'
+                items = [(size, key, paths) for size, group in batch for key, paths in group]
+                full_items = []
+                for (size, digest), group in self.hash_items(pool, items, self.edge_hash).items():
+                    if size <= 2 * self.edge_bytes:
+                        # Los extremos ya cubren el archivo entero
+                        yield size, digest.hex(), [paths for _, paths in group]
+                    else:
+                        full_items.extend((size, key, paths) for key, paths in group)
+                if self.stopped:
+                    return
+                self.stage = 'contenido'
+                full_groups = self.hash_items(pool, full_items, self.full_hash)
+                if self.stopped:
+                    return  # los hashes a medias no confirman nada
+                for (size, digest), group in full_groups.items():
+                    yield size, digest.hex(), [paths for _, paths in group]
@@ -0,0 +1,267 @@
+import os
+import queue
+import threading
+import time
+from mounts import ExclusionTrie
+
+# Recorrido de directorios en paralelo con os.scandir: varios hilos leen directorios
+# a la vez para mantener varias peticiones de E/S en vuelo sobre discos fríos o NAS
+
+DONE = object()
+
+# Enlaces simbólicos a directorios: 'never' los entrega como archivos sin entrar en
+# ellos; 'follow' los recorre. Al seguirlos (o con unique_dirs) cada directorio se
+# identifica por (st_dev, st_ino) y se lee una sola vez: los bucles de enlaces y los
+# montajes bind que repiten un árbol no multiplican el trabajo
+SYMLINK_POLICIES = ('never', 'follow')
+
+
+class VisitedSet:
+    # Un set de inodos por dispositivo: cada directorio ocupa un entero, sin tuplas
+    def __init__(self):
+        self.devices = {}
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, stats):
+        # True si el directorio no se había visto
+        with self.lock:
+            inodes = self.devices.get(stats.st_dev)
+            if inodes is None:
+                inodes = self.devices[stats.st_dev] = set()
+            if stats.st_ino in inodes:
+                return False
+            inodes.add(stats.st_ino)
+            self.count += 1
+            return True
+
+
+class ParallelWalker:
+    def __init__(self, roots=('/',), excluded_dirs=(), workers=None, with_stat=False, result_queue_size=256,
+                 entry_filter=None, symlinks='never', unique_dirs=False, before_scan=None):
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Política de enlaces desconocida: {symlinks}")
+        self.roots = list(roots)
+        self.excluded_dirs = list(excluded_dirs)
+        self.exclusions = ExclusionTrie(self.excluded_dirs)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.with_stat = with_stat
+        # entry_filter(lista de DirEntry) -> las que se entregan; corre en los hilos del
+        # recorrido, así el stat que necesite un predicado se hace en paralelo
+        self.entry_filter = entry_filter
+        # before_scan(ruta): en el hilo, justo antes de leer cada directorio
+        self.before_scan = before_scan
+        self.symlinks = symlinks
+        # Seguir enlaces sin conjunto de visitados podría no terminar nunca
+        self.unique_dirs = unique_dirs or symlinks == 'follow'
+        self.visited = None
+        self.repeated = []         # rutas de los subárboles ya recorridos por otro camino
+        self.result_queue_size = result_queue_size
+        self.stopped = False
+        self.running = False
+        self.dirs_scanned = 0
+        self.entries_seen = 0
+        self.errors = 0
+        self.stat_calls = 0
+        self.started_at = None
+        self.finished_at = None
+        self.paused_at = None
+        self.paused_total = 0.0
+        self.outstanding = set()   # directorios cuyo resultado aún no ha consumido el generador
+        self.unpaused = threading.Event()
+        self.unpaused.set()
+        self.lock = threading.Lock()
+
+    def stop(self):
+        self.stopped = True
+        self.resume()
+
+    def pause(self):
+        # Los hilos terminan el directorio en curso y esperan antes de coger otro
+        if self.unpaused.is_set():
+            self.paused_at = time.perf_counter()
+            self.unpaused.clear()
+
+    def resume(self):
+        if not self.unpaused.is_set():
+            self.paused_total += time.perf_counter() - self.paused_at
+            self.paused_at = None
+            self.unpaused.set()
+
+    def is_paused(self):
+        return not self.unpaused.is_set()
+
+    def frontier(self):
+        # Directorios pendientes o leídos pero sin consumir: recorrerlos de nuevo
+        # como raíces completa el recorrido interrumpido
+        with self.lock:
+            return sorted(self.outstanding)
+
+    def is_excluded(self, path):
+        return self.exclusions.is_excluded(path)
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        if self.paused_at is not None:
+            end = min(end, self.paused_at)
+        return end - self.started_at - self.paused_total
+
+    def dirs_per_second(self):
+        elapsed = self.elapsed()
+        return self.dirs_scanned / elapsed if elapsed > 0 else 0.0
+
+    def walk(self):
+        # Produce (directorio, [DirEntry de subdirectorios], [DirEntry del resto]).
+        # El orden no es determinista: cada directorio sale cuando un hilo termina de leerlo
+        self.stopped = False
+        self.running = True
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.paused_total = 0.0
+        self.outstanding = set()
+        self.dirs_scanned = self.entries_seen = self.errors = self.stat_calls = 0
+        self.visited = VisitedSet() if self.unique_dirs else None
+        self.repeated = []
+
+        pending_dirs = queue.LifoQueue()  # LIFO: recorrido en profundidad, frontera acotada
+        results = queue.Queue(maxsize=self.result_queue_size)
+        state = {'pending': 0, 'done': False}
+        for root in self.roots:
+            if not self.is_excluded(root):
+                state['pending'] += 1
+                self.outstanding.add(root)
+                pending_dirs.put(root)
+
+        threads = []
+        if state['pending']:
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self.worker, args=(pending_dirs, results, state), daemon=True)
+                thread.start()
+                threads.append(thread)
+        else:
+            results.put(DONE)
+
+        try:
+            while True:
+                item = results.get()
+                if item is DONE:
+                    break
+                yield item
+                with self.lock:
+                    self.outstanding.discard(item[0])
+        finally:
+            # Si el consumidor abandona el generador, los hilos deben terminar también
+            self.stopped = True
+            self.resume()
+            with self.lock:
+                state['done'] = True
+                state['closed'] = True
+            self.wake_workers(pending_dirs)
+            for thread in threads:
+                thread.join(timeout=1)
+            self.finished_at = time.perf_counter()
+            self.running = False
+
+    def worker(self, pending_dirs, results, state):
+        while not state['done']:
+            try:
+                path = pending_dirs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if path is None:
+                break
+
+            self.unpaused.wait()
+            if not self.stopped and self.first_visit(path):
+                if self.before_scan:
+                    self.before_scan(path)
+                dirs, files = self.scan_dir(path)
+                for entry in dirs:
+                    # El destino de un enlace seguido también puede estar excluido (/proc...)
+                    if not self.is_excluded(entry.path) and not (
+                            entry.is_symlink() and self.is_excluded(os.path.realpath(entry.path))):
+                        with self.lock:
+                            state['pending'] += 1
+                            self.outstanding.add(entry.path)
+                        pending_dirs.put(entry.path)
+                if self.entry_filter:
+                    # Se filtra después de encolar: los subdirectorios se recorren igualmente
+                    dirs, files = self.entry_filter(dirs), self.entry_filter(files)
+                self.put_result(results, state, (path, dirs, files))
+
+            with self.lock:
+                state['pending'] -= 1
+                finished = state['pending'] == 0 or (self.stopped and not state['done'])
+                if finished:
+                    state['done'] = True
+            if finished:
+                self.wake_workers(pending_dirs)
+                self.put_result(results, state, DONE, force=True)
+
+    def first_visit(self, path):
+        # Un directorio repetido se anota una vez y no se lee: nada de lo que cuelga de
+        # él se vuelve a entregar. Si stat falla, scan_dir contará el error
+        if self.visited is None:
+            return True
+        try:
+            stats = os.stat(path)
+        except OSError:
+            return True
+        with self.lock:
+            self.stat_calls += 1
+        if self.visited.add(stats):
+            return True
+        with self.lock:
+            self.repeated.append(path)
+            self.outstanding.discard(path)
+        return False
+
+    def wake_workers(self, pending_dirs):
+        for _ in range(self.workers):
+            pending_dirs.put(None)
+
+    def put_result(self, results, state, item, force=False):
+        # La cola de resultados es acotada: si el consumidor va lento, los hilos esperan
+        while True:
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if state.get('closed') or (state['done'] and not force):
+                    return
+
+    def scan_dir(self, path):
+        dirs = []
+        files = []
+        stat_calls = 0
+        follow = self.symlinks == 'follow'
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # d_type evita un stat por entrada; los enlaces solo se siguen con 'follow'
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if follow and not is_dir and entry.is_symlink():
+                            # stat del destino; un enlace roto sigue siendo un archivo
+                            is_dir = entry.is_dir()
+                        if self.with_stat:
+                            stat_calls += 1
+                            entry.stat(follow_symlinks=False)
+                    except OSError:
+                        with self.lock:
+                            self.errors += 1
+                        continue
+                    (dirs if is_dir else files).append(entry)
+        except OSError:
+            with self.lock:
+                self.errors += 1
+        with self.lock:
+            self.dirs_scanned += 1
+            self.entries_seen += len(dirs) + len(files)
+            self.stat_calls += stat_calls
+        return dirs, files
@@ -0,0 +1,320 @@
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from fast_walker import ParallelWalker
+from pattern_matcher import PatternMatcher
+from file_query import FileQuery
+from index_snapshot import write_snapshot, append_journal
+
+# Índice persistente de nombres de archivo (SQLite) para no recorrer '/' en cada búsqueda
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'papilink', 'indice_archivos.db')
+
+GLOB_CHARS = '*?['
+
+CHECKPOINT_INTERVAL = 30  # segundos entre puntos de control durante la construcción
+
+# Recorrido de los hijos de un directorio por la clave primaria, fila a fila
+NEXT_CHILD_QUERY = 'SELECT path FROM files WHERE path > ? AND path < ? ORDER BY path LIMIT 1'
+SKIP_SUBTREE_QUERY = 'SELECT path FROM files WHERE path >= ? AND path < ? ORDER BY path LIMIT 1'
+
+
+def make_row(path, stats, is_dir=None):
+    if is_dir is None:
+        is_dir = stat.S_ISDIR(stats.st_mode)
+    name = os.path.basename(path)
+    return (path, name, name[::-1], stats.st_size, stats.st_mtime, int(is_dir))
+
+
+def subtree_bounds(path):
+    # Los descendientes de 'path' son las claves entre 'path/' y 'path0' ('0' sigue a '/')
+    path = path.rstrip('/')
+    return path + '/', path + '0'
+
+
+class FileIndex:
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        self.build_lock = threading.Lock()
+        self.build_thread = None
+        self.walker = None
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self.connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.create_tables(conn, 'files')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self):
+        # Una conexión por operación: la construcción y las consultas corren en hilos distintos
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def create_tables(self, conn, table):
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            rname TEXT NOT NULL,
+            size INTEGER,
+            mtime REAL,
+            is_dir INTEGER
+        )''')
+
+    def create_indexes(self, conn, table):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_name ON {table}(name)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_rname ON {table}(rname)')
+
+    def is_built(self):
+        return self.get_meta('built_at') is not None
+
+    def get_meta(self, key, default=None):
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else default
+
+    def build(self, roots=('/',), excluded_dirs=(), should_stop=None, resume=True):
+        # Se construye en una tabla nueva y se intercambia al final, así las consultas
+        # siguen respondiendo con el índice anterior mientras se reindexa.
+        # Si se detiene, las filas de files_new y la frontera del recorrido quedan
+        # guardadas y la siguiente llamada continúa desde ahí
+        with self.build_lock:
+            start = time.perf_counter()
+            roots = list(roots)
+            conn = self.connect()
+            try:
+                checkpoint = self.get_checkpoint(conn) if resume else None
+                if checkpoint and (checkpoint['roots'] != roots or checkpoint['excluded'] != list(excluded_dirs)):
+                    checkpoint = None
+                if checkpoint:
+                    scan_roots = checkpoint['frontier']
+                    previous_seconds = checkpoint['elapsed']
+                else:
+                    conn.execute('DROP TABLE IF EXISTS files_new')
+                    conn.execute("DELETE FROM meta WHERE key = 'checkpoint'")
+                    self.create_tables(conn, 'files_new')
+                    conn.commit()
+                    scan_roots = roots
+                    previous_seconds = 0.0
+
+                def save_checkpoint():
+                    frontier = self.walker.frontier() if self.walker else scan_roots
+                    conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('checkpoint', json.dumps({
+                        'roots': roots,
+                        'excluded': list(excluded_dirs),
+                        'frontier': frontier,
+                        'elapsed': previous_seconds + time.perf_counter() - start,
+                        'saved_at': time.time(),
+                    })))
+                    conn.commit()
+
+                batch = []
+                last_checkpoint = time.monotonic()
+                for row in self.scan(scan_roots, excluded_dirs, should_stop):
+                    batch.append(row)
+                    if len(batch) >= 5000:
+                        conn.executemany('INSERT OR REPLACE INTO files_new VALUES (?, ?, ?, ?, ?, ?)', batch)
+                        batch = []
+                        if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                            # También se guarda por el camino: un cierre inesperado no pierde el trabajo
+                            save_checkpoint()
+                            last_checkpoint = time.monotonic()
+                conn.executemany('INSERT OR REPLACE INTO files_new VALUES (?, ?, ?, ?, ?, ?)', batch)
+                # Con la frontera sin vaciar el recorrido se detuvo antes de terminar
+                if (should_stop and should_stop()) or (self.walker and self.walker.frontier()):
+                    save_checkpoint()
+                    return False
+                conn.execute('DROP TABLE IF EXISTS files')
+                conn.execute('ALTER TABLE files_new RENAME TO files')
+                self.create_indexes(conn, 'files')
+                count = conn.execute('SELECT count(*) FROM files').fetchone()[0]
+                elapsed = previous_seconds + time.perf_counter() - start
+                conn.execute("DELETE FROM meta WHERE key = 'checkpoint'")
+                conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                    ('built_at', str(time.time())),
+                    ('build_seconds', f"{elapsed:.3f}"),
+                    ('entries', str(count)),
+                    ('roots', os.pathsep.join(roots)),
+                ])
+                conn.commit()
+            finally:
+                conn.close()
+            # Instantánea mmap para que los exploradores arranquen sin cargar filas
+            write_snapshot(self)
+            return True
+
+    def get_checkpoint(self, conn=None):
+        # Construcción interrumpida: {'roots', 'excluded', 'frontier', 'elapsed', 'saved_at'} o None
+        own = conn is None
+        if own:
+            conn = self.connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'checkpoint'").fetchone()
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_new'"
+            ).fetchone()
+            partial = conn.execute('SELECT count(*) FROM files_new').fetchone()[0] if row and has_table else 0
+        finally:
+            if own:
+                conn.close()
+        if not row or not has_table:
+            return None
+        checkpoint = json.loads(row[0])
+        checkpoint['entries'] = partial
+        return checkpoint
+
+    def scan(self, roots, excluded_dirs, should_stop):
+        # El stat de cada entrada se hace dentro de los hilos del recorrido (with_stat),
+        # aquí solo se lee el resultado ya cacheado en el DirEntry. Los montajes bind que
+        # repiten un árbol se indexan una sola vez
+        self.walker = ParallelWalker(roots, excluded_dirs, with_stat=True, unique_dirs=True)
+        walk = self.walker.walk()
+        try:
+            for root, dirs, files in walk:
+                if should_stop and should_stop():
+                    self.walker.stop()
+                    return
+                for entries, is_dir in ((files, 0), (dirs, 1)):
+                    for entry in entries:
+                        try:
+                            stats = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        yield make_row(entry.path, stats, is_dir)
+        finally:
+            walk.close()
+
+    def build_in_background(self, roots=('/',), excluded_dirs=(), should_stop=None, on_done=None, resume=True):
+        if self.build_thread and self.build_thread.is_alive():
+            return self.build_thread
+
+        def run():
+            ok = self.build(roots, excluded_dirs, should_stop, resume)
+            if on_done:
+                on_done(ok)
+
+        self.build_thread = threading.Thread(target=run, daemon=True)
+        self.build_thread.start()
+        return self.build_thread
+
+    def search(self, pattern, ignore_case=False, where=None):
+        # pattern: texto ('*.py;*.txt') o un PatternMatcher ya compilado.
+        # where: FileQuery o texto ('size>500M and mtime<7d'); sus globs de nombre, si los
+        # tiene, sirven de patrón cuando no se da otro, y el resto se evalúa sobre cada fila
+        if isinstance(where, str):
+            where = FileQuery(where, ignore_case=ignore_case)
+        if where is not None:
+            where.check_rows()
+        if pattern is None:
+            pattern = (where and where.name_prefilter()) or '*'
+        matcher = pattern if isinstance(pattern, PatternMatcher) else PatternMatcher(pattern, ignore_case=ignore_case)
+        glob = matcher.simple_glob()
+        conn = self.connect()
+        try:
+            if glob is None:
+                # Varios patrones, regex, rutas o sin mayúsculas: una sola regex compilada
+                conn.create_function('matches', 2, matcher.match, deterministic=True)
+                query = 'SELECT path, size, mtime, is_dir FROM files WHERE matches(name, path)'
+                args = ()
+            elif glob.startswith('*') and not any(c in glob[1:] for c in GLOB_CHARS):
+                # '*.py' y similares se resuelven por el índice del nombre invertido
+                # (sufijo literal -> búsqueda por prefijo)
+                query = 'SELECT path, size, mtime, is_dir FROM files WHERE rname GLOB ?'
+                args = (glob[1:][::-1] + '*',)
+            else:
+                query = 'SELECT path, size, mtime, is_dir FROM files WHERE name GLOB ?'
+                args = (glob,)
+            for row in conn.execute(query, args):
+                if where is None or where.match_row(*row):
+                    yield row
+        finally:
+            conn.close()
+
+    def apply_changes(self, changes):
+        # changes: lista ordenada de ('upsert', fila) o ('remove', ruta); un único commit
+        if not changes:
+            return
+        conn = self.connect()
+        try:
+            for action, value in changes:
+                if action == 'upsert':
+                    conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', value)
+                else:
+                    low, high = subtree_bounds(value)
+                    conn.execute('DELETE FROM files WHERE path = ? OR (path > ? AND path < ?)', (value, low, high))
+            conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('updated_at', str(time.time())))
+            conn.commit()
+        finally:
+            conn.close()
+        append_journal(self, changes)
+
+    def directories(self):
+        conn = self.connect()
+        try:
+            for row in conn.execute('SELECT path, mtime FROM files WHERE is_dir = 1'):
+                yield row
+        finally:
+            conn.close()
+
+    def entries(self):
+        conn = self.connect()
+        try:
+            for row in conn.execute('SELECT path, is_dir FROM files'):
+                yield row
+        finally:
+            conn.close()
+
+    def version(self):
+        # Cambia con cada reconstrucción y con cada lote del vigilante
+        return (self.get_meta('built_at'), self.get_meta('updated_at'))
+
+    def children(self, directory):
+        # Solo los hijos directos: al llegar a un descendiente se salta el subárbol entero
+        # de su hijo ('hijo/' .. 'hijo0'). Cuesta una búsqueda en el índice por hijo, no
+        # una fila por descendiente
+        low, high = subtree_bounds(directory)
+        start = len(low)
+        found = []
+        conn = self.connect()
+        try:
+            row = conn.execute(NEXT_CHILD_QUERY, (low, high)).fetchone()
+            while row:
+                path = row[0]
+                slash = path.find('/', start)
+                if slash == -1:
+                    found.append(path)
+                    row = conn.execute(NEXT_CHILD_QUERY, (path, high)).fetchone()
+                else:
+                    row = conn.execute(SKIP_SUBTREE_QUERY, (path[:slash] + '0', high)).fetchone()
+        finally:
+            conn.close()
+        return found
+
+    def stats(self):
+        size = 0
+        for suffix in ('', '-wal'):
+            try:
+                size += os.path.getsize(self.db_path + suffix)
+            except OSError:
+                pass
+        conn = self.connect()
+        try:
+            # El recuento se calcula en vivo: el vigilante modifica el índice entre reconstrucciones
+            entries = conn.execute('SELECT count(*) FROM files').fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'entries': entries,
+            'build_seconds': float(self.get_meta('build_seconds', 0)),
+            'built_at': float(self.get_meta('built_at', 0)),
+            'size_bytes': size,
+        }
@@ -0,0 +1,45 @@
+import os
+import stat
+from functools import lru_cache
+
+try:
+    import pwd
+    import grp
+    NSS_AVAILABLE = True
+except ImportError:
+    NSS_AVAILABLE = False
+
+# Metadatos bajo demanda: se guarda el stat en bruto y solo se formatea lo que se muestra.
+# Las búsquedas de usuario/grupo (NSS: /etc/passwd, LDAP, sssd...) se cachean por uid/gid
+
+
+@lru_cache(maxsize=4096)
+def user_name(uid):
+    if not NSS_AVAILABLE:
+        return str(uid)
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@lru_cache(maxsize=4096)
+def group_name(gid):
+    if not NSS_AVAILABLE:
+        return str(gid)
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return str(gid)
+
+
+def read_stat(filepath):
+    # Un lstat; solo si es un enlace se hace además el stat del destino.
+    # Devuelve (stat del archivo o del destino, es_enlace)
+    link_stats = os.lstat(filepath)
+    if not stat.S_ISLNK(link_stats.st_mode):
+        return link_stats, False
+    try:
+        return os.stat(filepath), True
+    except OSError:
+        return link_stats, True
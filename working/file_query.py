@@ -0,0 +1,409 @@
+import re
+import time
+from datetime import datetime
+from pattern_matcher import PatternMatcher, translate_glob, split_patterns
+
+# Lenguaje de consulta para filtrar archivos:
+#   *.log and size>500M and mtime<7d
+#   ext in (log,gz) and not path=*/node_modules/*
+#   (type=d or size>=1G) and name~'^backup'
+# Un término suelto es un glob del nombre, o de la ruta si lleva '/' (como en la caja de
+# patrones). Campos: name, path (glob con '=' / '!=', regex con '~'), ext (=, !=, in),
+# size (K/M/G/T), mtime (edad: 7d, 12h, 30m... o fecha AAAA-MM-DD[THH:MM]) y type
+# (f, d, l). Sin 'or' explícito, los términos se unen con 'and'.
+#
+# La consulta se compila a funciones sobre DirEntry: las pruebas de nombre, ruta, ext
+# y tipo (d_type) van primero y el stat solo se hace si un predicado de size/mtime
+# llega a necesitarlo
+
+TOKEN_RE = re.compile(r'''\s*(?:(?P<quoted>'[^']*'|"[^"]*")|(?P<op>>=|<=|!=|[=<>~(),])|(?P<word>(?:\[[^\]]*\]|[^\s=<>!~(),'"\[])+))''')
+KEYWORDS = {'and', 'or', 'not', 'in'}
+QUERY_KEYWORDS = {'and', 'or', 'not'}   # 'in' solo cuenta detrás de un campo
+FIELDS = {'name', 'path', 'ext', 'size', 'mtime', 'type'}
+STAT_FIELDS = {'size', 'mtime'}
+COMPARE_OPS = ('>=', '<=', '!=', '=', '>', '<')
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)([KMGT]?)(?:I?B)?$', re.IGNORECASE)
+AGE_UNITS = {'s': 1, 'm': 60, 'min': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400, 'y': 365 * 86400}
+AGE_RE = re.compile(r'(\d+(?:\.\d+)?)(s|min|m|h|d|w|y)$', re.IGNORECASE)
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S')
+TYPE_NAMES = {'f': 'f', 'file': 'f', 'd': 'd', 'dir': 'd', 'l': 'l', 'link': 'l'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def looks_like_query(text):
+    # Distingue una consulta de un glob normal para las cajas de búsqueda: hace falta un
+    # término 'campo op valor' o una palabra clave. Así 'file(1).txt' o '*~' siguen siendo
+    # nombres, y lo que no se deja analizar también se busca como glob
+    try:
+        tokens = tokenize(text)
+    except QueryError:
+        return False
+    for i, (kind, value) in enumerate(tokens):
+        if kind != 'word':
+            continue
+        word = value.lower()
+        if word in QUERY_KEYWORDS:
+            break
+        if word in FIELDS and i + 1 < len(tokens):
+            next_kind, next_value = tokens[i + 1]
+            if (next_kind == 'op' and next_value in COMPARE_OPS + ('~',)) or \
+                    (next_kind == 'word' and next_value.lower() == 'in'):
+                break
+    else:
+        return False
+    try:
+        FileQuery(text)
+    except QueryError:
+        return False
+    return True
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"Carácter inesperado en la posición {pos}: {text[pos:pos + 10]!r}")
+        pos = match.end()
+        if match.group('quoted') is not None:
+            tokens.append(('word', match.group('quoted')[1:-1]))
+        elif match.group('op') is not None:
+            tokens.append(('op', match.group('op')))
+        else:
+            tokens.append(('word', match.group('word')))
+    return tokens
+
+
+def compare(left, op, right):
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '=':
+        return left == right
+    return left != right
+
+
+def parse_size(text):
+    match = SIZE_RE.match(text)
+    if not match:
+        raise QueryError(f"Tamaño no válido: {text!r} (ej: 500M, 1.5G, 4096)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+class RowEntry:
+    # Fila del índice con la interfaz de DirEntry que usan los predicados
+    __slots__ = ('name', 'path', 'dir', 'st_size', 'st_mtime')
+
+    def __init__(self, path, size, mtime, is_dir):
+        self.path = path
+        self.name = path.rsplit('/', 1)[-1]
+        self.dir = bool(is_dir)
+        self.st_size = size
+        self.st_mtime = mtime
+
+    def is_dir(self, follow_symlinks=True):
+        return self.dir
+
+    def is_symlink(self):
+        # El índice no guarda si la entrada era un enlace (ver FileQuery.check_rows)
+        return False
+
+    def stat(self, follow_symlinks=True):
+        return self
+
+
+class FileQuery:
+    def __init__(self, text, ignore_case=False):
+        self.text = text
+        self.ignore_case = ignore_case
+        self.now = time.time()
+        self.stat_calls = 0
+        self.link_type = False   # la consulta pregunta por enlaces simbólicos (type=l)
+        self.tokens = tokenize(text)
+        self.pos = 0
+        if not self.tokens:
+            raise QueryError("Consulta vacía")
+        self.tree = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise QueryError(f"Sobra a partir de {self.tokens[self.pos][1]!r}")
+        self.test, self.needs_stat = self.compile(self.tree)
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def peek_keyword(self, keyword):
+        kind, value = self.peek()
+        return kind == 'word' and value.lower() == keyword
+
+    def expect(self, op):
+        kind, value = self.take()
+        if kind != 'op' or value != op:
+            raise QueryError(f"Se esperaba {op!r}")
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek_keyword('or'):
+            self.pos += 1
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while True:
+            kind, value = self.peek()
+            if kind is None or self.peek_keyword('or') or (kind == 'op' and value == ')'):
+                break
+            if self.peek_keyword('and'):
+                self.pos += 1
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.peek_keyword('not'):
+            self.pos += 1
+            return ('not', self.parse_not())
+        kind, value = self.peek()
+        if kind == 'op' and value == '(':
+            self.pos += 1
+            node = self.parse_or()
+            self.expect(')')
+            return node
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        kind, word = self.take()
+        if kind != 'word':
+            raise QueryError(f"Se esperaba un término y llegó {word!r}" if word else "Consulta incompleta")
+        field = word.lower()
+        next_kind, next_value = self.peek()
+        if field in FIELDS and self.peek_keyword('in'):
+            self.pos += 1
+            self.expect('(')
+            values = []
+            while True:
+                kind, value = self.take()
+                if kind != 'word':
+                    raise QueryError(f"Lista de valores no válida en '{field} in (...)'")
+                values.append(value)
+                kind, value = self.take()
+                if value == ')':
+                    break
+                if value != ',':
+                    raise QueryError("Se esperaba ',' o ')'")
+            return (field, 'in', values)
+        if field in FIELDS and next_kind == 'op' and next_value in COMPARE_OPS + ('~',):
+            self.pos += 1
+            kind, value = self.take()
+            if kind != 'word':
+                raise QueryError(f"Falta el valor de '{field} {next_value}'")
+            return (field, next_value, value)
+        # Término suelto: globs como en la caja de patrones ('*.py;src/**/*.py'); se
+        # compilan con PatternMatcher para que la consulta y el prefiltro del índice
+        # entiendan igual los que llevan '/'
+        return ('glob', 'in', split_patterns(word))
+
+    def compile(self, node):
+        # Devuelve (función(entry, cache) -> bool, necesita_stat)
+        kind = node[0]
+        if kind in ('and', 'or'):
+            parts = [self.compile(child) for child in node[1]]
+            # Primero lo barato: así el stat solo se hace si lo demás ya ha pasado
+            parts.sort(key=lambda part: part[1])
+            tests = [test for test, _ in parts]
+            needs_stat = any(stat_needed for _, stat_needed in parts)
+            if kind == 'and':
+                def test(entry, cache):
+                    for t in tests:
+                        if not t(entry, cache):
+                            return False
+                    return True
+            else:
+                def test(entry, cache):
+                    for t in tests:
+                        if t(entry, cache):
+                            return True
+                    return False
+            return test, needs_stat
+        if kind == 'not':
+            inner, needs_stat = self.compile(node[1])
+            return (lambda entry, cache: not inner(entry, cache)), needs_stat
+        field, op, value = node
+        return getattr(self, f'compile_{field}')(op, value), field in STAT_FIELDS
+
+    def compile_text(self, op, value, path_aware, attr):
+        flags = re.DOTALL | (re.IGNORECASE if self.ignore_case else 0)
+        if op == '~':
+            try:
+                regex = re.compile(value, flags)
+            except re.error as e:
+                raise QueryError(f"Regex no válida {value!r}: {e}")
+            return lambda entry, cache: regex.search(getattr(entry, attr)) is not None
+        if op == 'in':
+            source = '|'.join(f'(?:{translate_glob(v, path_aware)})' for v in value)
+        elif op in ('=', '!='):
+            source = translate_glob(value, path_aware)
+        else:
+            raise QueryError(f"'{attr}' solo admite =, !=, ~ e in")
+        match = re.compile(source, flags).fullmatch
+        if op == '!=':
+            return lambda entry, cache: match(getattr(entry, attr)) is None
+        return lambda entry, cache: match(getattr(entry, attr)) is not None
+
+    def compile_glob(self, op, value):
+        match = PatternMatcher(value, ignore_case=self.ignore_case).match
+        return lambda entry, cache: match(entry.name, entry.path)
+
+    def compile_name(self, op, value):
+        return self.compile_text(op, value, False, 'name')
+
+    def compile_path(self, op, value):
+        return self.compile_text(op, value, True, 'path')
+
+    def compile_ext(self, op, value):
+        values = value if op == 'in' else [value]
+        exts = {v.lstrip('.').lower() if self.ignore_case else v.lstrip('.') for v in values}
+        if op not in ('=', '!=', 'in'):
+            raise QueryError("'ext' solo admite =, != e in")
+        negate = op == '!='
+        lower = self.ignore_case
+
+        def test(entry, cache):
+            name = entry.name
+            dot = name.rfind('.')
+            ext = name[dot + 1:] if dot > 0 else ''
+            return ((ext.lower() if lower else ext) in exts) != negate
+        return test
+
+    def compile_type(self, op, value):
+        values = value if op == 'in' else [value]
+        try:
+            kinds = {TYPE_NAMES[v.lower()] for v in values}
+        except KeyError:
+            raise QueryError(f"Tipo no válido en {values}: usa f, d o l")
+        if op not in ('=', '!=', 'in'):
+            raise QueryError("'type' solo admite =, != e in")
+        negate = op == '!='
+        if 'l' in kinds:
+            self.link_type = True
+
+        def test(entry, cache):
+            # d_type del listado: no hace falta stat
+            try:
+                if entry.is_symlink():
+                    kind = 'l'
+                elif entry.is_dir(follow_symlinks=False):
+                    kind = 'd'
+                else:
+                    kind = 'f'
+            except OSError:
+                return False
+            return (kind in kinds) != negate
+        return test
+
+    def stat(self, entry, cache):
+        # Un stat como mucho por entrada, compartido por todos los predicados
+        if not cache:
+            self.stat_calls += 1
+            try:
+                cache.append(entry.stat(follow_symlinks=False))
+            except OSError:
+                cache.append(None)
+        return cache[0]
+
+    def compile_size(self, op, value):
+        if op == 'in' or op == '~':
+            raise QueryError("'size' admite >, >=, <, <=, = y !=")
+        limit = parse_size(value)
+
+        def test(entry, cache):
+            stats = self.stat(entry, cache)
+            return stats is not None and compare(stats.st_size, op, limit)
+        return test
+
+    def compile_mtime(self, op, value):
+        if op == 'in' or op == '~':
+            raise QueryError("'mtime' admite >, >=, <, <=, = y !=")
+        age = AGE_RE.match(value)
+        if age:
+            # Edad: 'mtime<7d' = modificado hace menos de 7 días
+            seconds = float(age.group(1)) * AGE_UNITS[age.group(2).lower()]
+            now = self.now
+
+            def test(entry, cache):
+                stats = self.stat(entry, cache)
+                return stats is not None and compare(now - stats.st_mtime, op, seconds)
+            return test
+        for fmt in DATE_FORMATS:
+            try:
+                timestamp = datetime.strptime(value, fmt).timestamp()
+                break
+            except ValueError:
+                continue
+        else:
+            raise QueryError(f"Fecha o edad no válida: {value!r} (ej: 7d, 12h, 2024-01-31)")
+
+        def test(entry, cache):
+            stats = self.stat(entry, cache)
+            return stats is not None and compare(stats.st_mtime, op, timestamp)
+        return test
+
+    def match(self, entry):
+        return self.test(entry, [])
+
+    def filter_entries(self, entries):
+        test = self.test
+        return [entry for entry in entries if test(entry, [])]
+
+    def check_rows(self):
+        # Para consultas sobre filas del índice o de la instantánea: no distinguen los
+        # enlaces simbólicos de los archivos, así que 'type=l' no coincidiría nunca (y
+        # 'type!=l' con todos). Mejor un error que un resultado vacío sin explicación
+        if self.link_type:
+            raise QueryError("'type=l' no se puede usar con el índice: no guarda los enlaces simbólicos")
+
+    def match_row(self, path, size, mtime, is_dir):
+        return self.test(RowEntry(path, size, mtime, is_dir), [])
+
+    def name_prefilter(self):
+        # Globs de nombre que toda coincidencia cumple (para la consulta GLOB del índice)
+        # o None si la consulta no los garantiza
+        return self.prefilter(self.tree)
+
+    def prefilter(self, node):
+        kind = node[0]
+        if kind == 'and':
+            for child in node[1]:
+                globs = self.prefilter(child)
+                if globs is not None:
+                    return globs
+            return None
+        if kind == 'or':
+            globs = []
+            for child in node[1]:
+                child_globs = self.prefilter(child)
+                if child_globs is None:
+                    return None
+                globs.extend(child_globs)
+            return globs
+        if kind in ('glob', 'name') and node[1] in ('=', 'in'):
+            return list(node[2]) if node[1] == 'in' else [node[2]]
+        if kind == 'ext' and node[1] in ('=', 'in'):
+            values = node[2] if node[1] == 'in' else [node[2]]
+            return [f"*.{v.lstrip('.')}" for v in values]
+        return None
@@ -0,0 +1,366 @@
+import heapq
+import os
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from array import array
+from index_snapshot import CHAR_BITS, name_masks
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Búsqueda difusa mientras se escribe (al estilo fzf) sobre una tabla de nombres en
+# memoria. Cada tecla refina el resultado de la anterior en lugar de empezar de cero,
+# y el trabajo se corta en porciones de STEP_BUDGET para no bloquear la interfaz
+
+STEP_BUDGET = 0.04      # segundos por porción: cada tecla responde en menos de 50 ms
+TOP_RESULTS = 100
+PREFIX_CACHE = 32       # búsquedas anteriores guardadas (para el retroceso)
+
+# Puntuación inspirada en fzf: coincidencia, huecos, inicio de palabra y consecutivas
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = 8
+BONUS_CAMEL = 7
+BONUS_CONSECUTIVE = 4
+BONUS_FIRST_CHAR = 8
+SEPARATORS = set('/_-. ')
+
+# Los caracteres de la consulta como máscara de 64 bits; si a un nombre le falta alguno
+# (máscaras de index_snapshot.name_masks), se descarta sin mirarlo
+def query_mask(query):
+    mask = 0
+    for ch in query.lower():
+        mask |= CHAR_BITS.get(ch, 0)
+    return mask
+
+
+def fuzzy_score(query, text, original):
+    # query y text ya en el mismo caso; original conserva las mayúsculas (camelCase).
+    # Devuelve None si query no es subsecuencia de text
+    pos = -1
+    for ch in query:
+        pos = text.find(ch, pos + 1)
+        if pos < 0:
+            return None
+    # Hacia atrás desde el final: el inicio más ajustado, como fzf v1
+    start = pos + 1
+    for ch in reversed(query):
+        start = text.rfind(ch, 0, start)
+
+    score = 0
+    prev = -1
+    pos = start - 1
+    for i, ch in enumerate(query):
+        pos = text.find(ch, pos + 1)
+        bonus = 0
+        if pos == 0 or text[pos - 1] in SEPARATORS:
+            bonus = BONUS_BOUNDARY
+        elif original[pos].isupper() and original[pos - 1].islower():
+            bonus = BONUS_CAMEL
+        if prev >= 0:
+            if pos == prev + 1:
+                bonus = max(bonus, BONUS_CONSECUTIVE)
+            else:
+                score += SCORE_GAP_START + SCORE_GAP_EXTENSION * (pos - prev - 2)
+        if i == 0:
+            bonus += BONUS_FIRST_CHAR if bonus else 0
+        score += SCORE_MATCH + bonus
+        prev = pos
+    # A igualdad, los nombres cortos primero
+    return score - len(text) / 256
+
+
+class NameTable:
+    def __init__(self):
+        self.dirs = []                      # rutas de directorio padre
+        self.parents = array('I')           # índice en dirs de cada entrada
+        self.offsets = array('Q', [0])      # nombres en UTF-8, uno tras otro
+        self.blob = bytearray()
+        self.masks = array('Q')
+        self.version = None
+        self.generation = 0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.parents)
+
+    def load(self, file_index, should_stop=None):
+        dir_ids = {}
+        dirs = []
+        parents = array('I')
+        offsets = array('Q', [0])
+        blob = bytearray()
+        version = file_index.version()
+        for path, is_dir in file_index.entries():
+            if should_stop and should_stop():
+                return False
+            parent, _, name = path.rpartition('/')
+            dir_id = dir_ids.get(parent)
+            if dir_id is None:
+                dir_id = dir_ids[parent] = len(dirs)
+                dirs.append(parent)
+            parents.append(dir_id)
+            blob += os.fsencode(name)
+            offsets.append(len(blob))
+        masks = name_masks(blob, offsets)
+        # Se publica todo a la vez: las búsquedas en curso siguen con la tabla anterior
+        self.dirs, self.parents, self.offsets, self.blob, self.masks = dirs, parents, offsets, blob, masks
+        self.version = version
+        self.generation += 1
+        self.loaded = True
+        return True
+
+    def load_snapshot(self, snapshot):
+        # Las columnas se usan tal cual desde el mmap de la instantánea: no se copia nada.
+        # Lleva la versión de la instantánea, no la del índice: los cambios del diario
+        # (snapshot.changed/removed) no están en estas columnas, y con ellos la versión
+        # no coincide y la tabla se vuelve a cargar desde el índice
+        self.dirs, self.parents, self.offsets, self.blob, self.masks = (
+            snapshot.dirs, snapshot.parents, snapshot.offsets, snapshot.blob, snapshot.masks
+        )
+        self.version = snapshot.version
+        self.generation += 1
+        self.loaded = True
+
+    def name(self, idx):
+        return os.fsdecode(bytes(self.blob[self.offsets[idx]:self.offsets[idx + 1]]))
+
+    def path(self, idx):
+        return f"{self.dirs[self.parents[idx]]}/{self.name(idx)}"
+
+    def filter_mask(self, candidates, mask):
+        # candidates: None (todas) o array('I'); devuelve los índices que tienen
+        # todos los caracteres de la consulta
+        if NUMPY_AVAILABLE:
+            masks = np.frombuffer(self.masks, dtype=np.uint64)
+            need = np.uint64(mask)
+            if candidates is None:
+                found = np.flatnonzero((masks & need) == need).astype(np.uint32)
+            else:
+                idx = np.frombuffer(candidates, dtype=np.uint32)
+                found = idx[(masks[idx] & need) == need]
+            result = array('I')
+            result.frombytes(found.tobytes())
+            return result
+        masks = self.masks
+        source = range(len(masks)) if candidates is None else candidates
+        return array('I', [i for i in source if masks[i] & mask == mask])
+
+
+class FuzzySearch:
+    # Una consulta en curso: se avanza por porciones con step() y se puede usar como
+    # base de la siguiente tecla aunque no haya terminado
+    def __init__(self, table, query, base=None):
+        self.table = table
+        self.generation = table.generation
+        self.query = query
+        self.case_sensitive = query != query.lower()   # mayúsculas inteligentes, como fzf
+        self.needle = query if self.case_sensitive else query.lower()
+        self.mask = query_mask(query)
+        # Se fija la tabla de ahora: si se recarga, esta búsqueda sigue siendo coherente
+        self.blob = table.blob
+        self.offsets = table.offsets
+        self.masks = table.masks
+        if NUMPY_AVAILABLE:
+            self.candidates = table.filter_mask(base, self.mask)
+            self.prefiltered = True
+        else:
+            # Sin numpy el filtro por máscara se hace dentro de step(), también por porciones
+            self.candidates = range(len(self.masks)) if base is None else base
+            self.prefiltered = False
+        self.position = 0
+        self.matches = array('I')
+        self.top = []          # montículo de (puntuación, índice) con los mejores
+        self.done = False
+
+    def step(self, budget=STEP_BUDGET):
+        deadline = time.perf_counter() + budget
+        blob = self.blob
+        offsets = self.offsets
+        masks = None if self.prefiltered else self.masks
+        mask = self.mask
+        candidates = self.candidates
+        needle = self.needle
+        lower = not self.case_sensitive
+        top = self.top
+        matches = self.matches
+        position = self.position
+        end = len(candidates)
+        while position < end:
+            # Se comprueba el reloj cada 256 candidatos
+            chunk_end = min(end, position + 256)
+            for idx in candidates[position:chunk_end]:
+                if masks is not None and masks[idx] & mask != mask:
+                    continue
+                original = blob[offsets[idx]:offsets[idx + 1]].decode('utf-8', 'surrogateescape')
+                score = fuzzy_score(needle, original.lower() if lower else original, original)
+                if score is None:
+                    continue
+                matches.append(idx)
+                if len(top) < TOP_RESULTS:
+                    heapq.heappush(top, (score, idx))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, idx))
+            position = chunk_end
+            if time.perf_counter() >= deadline:
+                break
+        self.position = position
+        self.done = position >= end
+        return self.done
+
+    def remaining(self):
+        # Coincidencias confirmadas más lo que falta por mirar: base válida para
+        # una consulta que extiende a esta
+        base = array('I', self.matches)
+        base.extend(self.candidates[self.position:])
+        return base
+
+    def results(self):
+        return [idx for score, idx in sorted(self.top, reverse=True)]
+
+
+class FuzzyFinder:
+    def __init__(self, table):
+        self.table = table
+        self.cache = {}    # consulta -> FuzzySearch (orden de inserción = antigüedad)
+
+    def search(self, query):
+        cached = self.cache.pop(query, None)
+        if any(s.generation != self.table.generation for s in self.cache.values()):
+            self.cache.clear()   # la tabla se recargó: los índices antiguos no valen
+            cached = None
+        if cached is not None:
+            self.cache[query] = cached
+            return cached
+        # La base es la búsqueda guardada más larga de la que esta consulta es extensión
+        base = None
+        for previous in sorted(self.cache, key=len, reverse=True):
+            if query.startswith(previous) and self.cache[previous].case_sensitive == (query != query.lower()):
+                base = self.cache[previous].remaining()
+                break
+        result = FuzzySearch(self.table, query, base)
+        self.cache[query] = result
+        while len(self.cache) > PREFIX_CACHE:
+            self.cache.pop(next(iter(self.cache)))
+        return result
+
+
+class FuzzyFinderWindow(tk.Toplevel):
+    def __init__(self, master, table, file_index, on_pick=None, snapshot=None):
+        super().__init__(master)
+        self.title("Búsqueda rápida")
+        self.geometry("800x500")
+        self.table = table
+        self.file_index = file_index
+        self.on_pick = on_pick
+        self.finder = None
+        self.current = None
+        self.pending_step = None
+        self.closed = False
+
+        self.query = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.query)
+        self.entry.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.status = ttk.Label(self, text="")
+        self.status.pack(fill=tk.X, padx=10)
+        self.results = ttk.Treeview(self, columns=('path',), show='headings', selectmode='browse')
+        self.results.heading('path', text='Ruta', anchor=tk.W)
+        self.results.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.query.trace_add('write', lambda *args: self.on_query())
+        self.entry.bind('<Return>', self.pick)
+        self.entry.bind('<Down>', lambda e: self.move(1))
+        self.entry.bind('<Up>', lambda e: self.move(-1))
+        self.entry.bind('<Escape>', lambda e: self.close())
+        self.results.bind('<Double-1>', self.pick)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.entry.focus_set()
+
+        current = table.loaded and table.version == file_index.version()
+        if snapshot is not None and not current:
+            # Con la instantánea la tabla está lista al momento; si el diario trae cambios
+            # posteriores se busca en ella mientras se recarga desde el índice
+            table.load_snapshot(snapshot)
+            current = table.version == file_index.version()
+            self.finder = FuzzyFinder(table)
+        if current:
+            self.finder = FuzzyFinder(table)
+            self.status.config(text=f"{len(table)} nombres")
+        else:
+            # Primera vez o índice cambiado: la tabla se (re)carga sin bloquear la ventana
+            self.status.config(text="Cargando nombres del índice...")
+            threading.Thread(target=self.load_table, daemon=True).start()
+
+    def load_table(self):
+        if self.table.load(self.file_index, lambda: self.closed):
+            self.after(0, self.on_loaded)
+
+    def on_loaded(self):
+        if self.closed:
+            return
+        self.finder = FuzzyFinder(self.table)
+        self.status.config(text=f"{len(self.table)} nombres")
+        self.on_query()
+
+    def close(self):
+        self.closed = True
+        self.destroy()
+
+    def on_query(self):
+        if self.pending_step:
+            self.after_cancel(self.pending_step)
+            self.pending_step = None
+        query = self.query.get().strip()
+        if not self.finder:
+            return
+        if not query:
+            self.current = None
+            self.results.delete(*self.results.get_children())
+            self.status.config(text=f"{len(self.table)} nombres")
+            return
+        self.current = self.finder.search(query)
+        self.run_step()
+
+    def run_step(self):
+        self.pending_step = None
+        search = self.current
+        start = time.perf_counter()
+        done = search.done or search.step()
+        self.show(search, (time.perf_counter() - start) * 1000)
+        if not done:
+            # Lo que queda se sigue puntuando entre eventos; la próxima tecla lo cancela
+            self.pending_step = self.after(1, self.run_step)
+
+    def show(self, search, elapsed_ms):
+        table = self.table
+        self.results.delete(*self.results.get_children())
+        for idx in search.results():
+            self.results.insert('', 'end', iid=str(idx), values=(table.path(idx),))
+        children = self.results.get_children()
+        if children:
+            self.results.selection_set(children[0])
+        state = "" if search.done else f" · revisados {search.position}/{len(search.candidates)}"
+        self.status.config(text=f"{len(search.matches)} coincidencias{state} · {elapsed_ms:.0f} ms")
+
+    def move(self, delta):
+        children = self.results.get_children()
+        if not children:
+            return 'break'
+        selection = self.results.selection()
+        position = children.index(selection[0]) + delta if selection else 0
+        position = min(max(0, position), len(children) - 1)
+        self.results.selection_set(children[position])
+        self.results.see(children[position])
+        return 'break'
+
+    def pick(self, event=None):
+        selection = self.results.selection()
+        if selection and self.on_pick:
+            self.on_pick(self.table.path(int(selection[0])))
+        return 'break'
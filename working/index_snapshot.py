@@ -0,0 +1,333 @@
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from pattern_matcher import PatternMatcher
+from file_query import FileQuery
+from mounts import ExclusionTrie
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Instantánea binaria del índice por columnas (nombres uno tras otro con sus offsets,
+# directorio padre, tamaño, mtime, tipo y máscara de caracteres) que se abre con mmap:
+# abrirla no carga nada y varios procesos comparten las mismas páginas. Los cambios
+# posteriores del vigilante se anotan en un diario (JSON por líneas) que se aplica
+# encima al abrirla, así la instantánea no se reescribe en cada lote
+
+SNAPSHOT_SUFFIX = '.snap'
+JOURNAL_SUFFIX = '.snap.log'
+MAGIC = b'PAPISNP1'
+SECTIONS = ('meta', 'names', 'name_offsets', 'parents', 'dirs', 'dir_offsets', 'sizes', 'mtimes', 'kinds', 'masks')
+TYPECODES = {
+    'name_offsets': 'Q', 'parents': 'I', 'dir_offsets': 'Q',
+    'sizes': 'q', 'mtimes': 'd', 'kinds': 'B', 'masks': 'Q',
+}
+HEADER = struct.Struct('<8s' + 'QQ' * len(SECTIONS))   # (inicio, longitud) por sección
+JOURNAL_LIMIT = 100000   # cambios en el diario a partir de los que conviene reescribirla
+# El vigilante añade al diario mientras otro hilo lo poda al reescribir la instantánea:
+# sin el cerrojo, lo añadido entre la lectura y el os.replace de la poda se perdería
+JOURNAL_LOCK = threading.Lock()
+
+# Una máscara de 64 bits por nombre con los caracteres que contiene (búsqueda rápida)
+MASK_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789._- '
+CHAR_BITS = {ch: 1 << i for i, ch in enumerate(MASK_CHARS)}
+BYTE_BITS = [0] * 256
+for ch, bit in CHAR_BITS.items():
+    BYTE_BITS[ord(ch)] = bit
+    BYTE_BITS[ord(ch.upper())] = bit
+
+
+def name_masks(blob, offsets):
+    count = len(offsets) - 1
+    if NUMPY_AVAILABLE and count:
+        data = np.frombuffer(bytes(blob), dtype=np.uint8)
+        bits = np.array(BYTE_BITS, dtype=np.uint64)[data]
+        starts = np.frombuffer(offsets, dtype=np.uint64)[:-1].astype(np.intp)
+        lengths = np.diff(np.frombuffer(offsets, dtype=np.uint64))
+        # reduceat no admite tramos vacíos: los nombres vacíos quedan con máscara 0
+        masks = np.bitwise_or.reduceat(bits, np.minimum(starts, len(bits) - 1)) if len(bits) else bits
+        masks = np.where(lengths > 0, masks, 0).astype(np.uint64)
+        result = array('Q')
+        result.frombytes(masks.tobytes())
+        return result
+    result = array('Q')
+    for i in range(count):
+        mask = 0
+        for byte in set(blob[offsets[i]:offsets[i + 1]]):
+            mask |= BYTE_BITS[byte]
+        result.append(mask)
+    return result
+
+
+def snapshot_path(file_index):
+    return os.path.splitext(file_index.db_path)[0] + SNAPSHOT_SUFFIX
+
+
+def journal_path(file_index):
+    return os.path.splitext(file_index.db_path)[0] + JOURNAL_SUFFIX
+
+
+def literal_of(pattern):
+    # El trozo sin comodines más largo del nombre: toda coincidencia lo contiene
+    name = pattern.rsplit('/', 1)[-1]
+    return max(re.split(r'\*|\?|\[[^\]]*\]?', name), key=len)
+
+
+def write_snapshot(file_index, should_stop=None):
+    # Se escribe a un temporal y se sustituye: quien tenga abierta la anterior sigue
+    # leyendo su inodo sin ver el cambio
+    taken_at = time.time()
+    version = file_index.version()
+    dir_ids = {}
+    dirs = []
+    parents = array('I')
+    offsets = array('Q', [0])
+    blob = bytearray()
+    sizes = array('q')
+    mtimes = array('d')
+    kinds = array('B')
+    conn = file_index.connect()
+    try:
+        for path, size, mtime, is_dir in conn.execute('SELECT path, size, mtime, is_dir FROM files'):
+            if should_stop and should_stop():
+                return False
+            parent, _, name = path.rpartition('/')
+            dir_id = dir_ids.get(parent)
+            if dir_id is None:
+                dir_id = dir_ids[parent] = len(dirs)
+                dirs.append(parent)
+            parents.append(dir_id)
+            blob += os.fsencode(name)
+            offsets.append(len(blob))
+            sizes.append(size or 0)
+            mtimes.append(mtime or 0.0)
+            kinds.append(1 if is_dir else 0)
+    finally:
+        conn.close()
+    masks = name_masks(blob, offsets)
+    dir_blob = bytearray()
+    dir_offsets = array('Q', [0])
+    for directory in dirs:
+        dir_blob += os.fsencode(directory)
+        dir_offsets.append(len(dir_blob))
+
+    meta = json.dumps({'version': version, 'taken_at': taken_at, 'entries': len(parents)}).encode()
+    sections = {
+        'meta': meta, 'names': blob, 'name_offsets': offsets, 'parents': parents,
+        'dirs': dir_blob, 'dir_offsets': dir_offsets, 'sizes': sizes, 'mtimes': mtimes,
+        'kinds': kinds, 'masks': masks,
+    }
+    # Los offsets se guardan absolutos (posición en el archivo): el mmap entero hace de blob
+    layout = []
+    position = HEADER.size
+    for section in SECTIONS:
+        position += -position % 8
+        data = sections[section]
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout.append((position, length))
+        position += length
+    for section, base in (('name_offsets', layout[1][0]), ('dir_offsets', layout[4][0])):
+        sections[section] = array('Q', [base + offset for offset in sections[section]])
+
+    path = snapshot_path(file_index)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, *[value for pair in layout for value in pair]))
+        for section, (start, length) in zip(SECTIONS, layout):
+            f.write(b'\0' * (start - f.tell()))
+            data = sections[section]
+            f.write(data.tobytes() if isinstance(data, array) else data)
+    os.replace(tmp, path)
+    prune_journal(journal_path(file_index), taken_at)
+    return True
+
+
+def append_journal(file_index, changes):
+    # Solo hace falta si hay una instantánea que poner al día
+    if not changes or not os.path.exists(snapshot_path(file_index)):
+        return
+    line = json.dumps([time.time(), changes], ensure_ascii=True) + '\n'
+    with JOURNAL_LOCK:
+        with open(journal_path(file_index), 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def read_journal(path, since):
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    written_at, changes = json.loads(line)
+                except ValueError:
+                    continue   # una línea a medio escribir
+                if written_at >= since:
+                    yield changes
+    except OSError:
+        return
+
+
+def prune_journal(path, since):
+    # Las líneas anteriores a la instantánea ya están dentro de ella
+    with JOURNAL_LOCK:
+        kept = [json.dumps([since, changes]) + '\n' for changes in read_journal(path, since)]
+        if not kept and not os.path.exists(path):
+            return
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(tmp, path)
+
+
+def load_snapshot(file_index):
+    # La instantánea de la última reconstrucción con el diario aplicado, o None
+    try:
+        snapshot = IndexSnapshot(snapshot_path(file_index))
+    except (OSError, ValueError):
+        return None
+    if snapshot.version[0] != file_index.get_meta('built_at'):
+        return None
+    for changes in read_journal(journal_path(file_index), snapshot.taken_at):
+        snapshot.apply_changes(changes)
+    return snapshot
+
+
+class BlobList:
+    # Secuencia de cadenas guardadas una tras otra; cada una se decodifica al pedirla
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return os.fsdecode(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+
+class IndexSnapshot:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size:
+            raise ValueError("Instantánea incompleta")
+        fields = HEADER.unpack_from(self.mm)
+        if fields[0] != MAGIC:
+            raise ValueError("No es una instantánea del índice")
+        columns = {}
+        for i, section in enumerate(SECTIONS):
+            start, length = fields[1 + 2 * i], fields[2 + 2 * i]
+            if start + length > len(self.mm):
+                raise ValueError("Instantánea incompleta")
+            view = memoryview(self.mm)[start:start + length]
+            columns[section] = view.cast(TYPECODES[section]) if section in TYPECODES else view
+        meta = json.loads(bytes(columns['meta']))
+        self.version = tuple(meta['version'])
+        self.taken_at = meta['taken_at']
+        # Los offsets son posiciones en el archivo: el propio mmap hace de blob
+        self.blob = self.mm
+        self.offsets = columns['name_offsets']
+        self.parents = columns['parents']
+        self.dirs = BlobList(self.mm, columns['dir_offsets'])
+        self.sizes = columns['sizes']
+        self.mtimes = columns['mtimes']
+        self.kinds = columns['kinds']
+        self.masks = columns['masks']
+        # Cambios posteriores a la instantánea: filas nuevas o modificadas y borrados
+        self.changed = {}
+        self.removed = ExclusionTrie()
+        self.pending_changes = 0
+
+    def __len__(self):
+        return len(self.parents)
+
+    def name(self, index):
+        return os.fsdecode(self.mm[self.offsets[index]:self.offsets[index + 1]])
+
+    def path(self, index):
+        return f"{self.dirs[self.parents[index]]}/{self.name(index)}"
+
+    def apply_changes(self, changes):
+        # Mismo formato que FileIndex.apply_changes; también sirve de oyente de IndexWatcher
+        for action, value in changes:
+            if action == 'upsert':
+                path, _, _, size, mtime, is_dir = value
+                self.changed[path] = (size, mtime, is_dir)
+            else:
+                prefix = value.rstrip('/') + '/'
+                for path in [p for p in self.changed if p == value or p.startswith(prefix)]:
+                    del self.changed[path]
+                self.removed.add(value)
+        self.pending_changes += len(changes)
+
+    def needs_rewrite(self):
+        return self.pending_changes > JOURNAL_LIMIT
+
+    def search(self, pattern, ignore_case=False, where=None):
+        # Mismos argumentos y filas que FileIndex.search: (ruta, tamaño, mtime, es_dir)
+        if isinstance(where, str):
+            where = FileQuery(where, ignore_case=ignore_case)
+        if where is not None:
+            where.check_rows()
+        if pattern is None:
+            pattern = (where and where.name_prefilter()) or '*'
+        matcher = pattern if isinstance(pattern, PatternMatcher) else PatternMatcher(pattern, ignore_case=ignore_case)
+        changed = self.changed
+        removed = self.removed if len(self.removed) else None
+        for index in self.candidates(matcher):
+            name = self.name(index)
+            path = f"{self.dirs[self.parents[index]]}/{name}"
+            if not matcher.match(name, path):
+                continue
+            if path in changed or (removed and removed.is_excluded(path)):
+                continue   # la versión buena está en changed, o ya no existe
+            row = (path, self.sizes[index], self.mtimes[index], self.kinds[index])
+            if where is None or where.match_row(*row):
+                yield row
+        for path, (size, mtime, is_dir) in list(changed.items()):
+            if matcher.match(path.rsplit('/', 1)[-1], path) and (where is None or where.match_row(path, size, mtime, is_dir)):
+                yield path, size, mtime, is_dir
+
+    def candidates(self, matcher):
+        # Índices de los nombres que contienen el trozo literal de cada patrón, buscado
+        # con una regex sobre el mmap (en C). Sin literal se miran todos
+        if matcher.regex:
+            return range(len(self))
+        literals = [literal_of(pattern) for pattern in matcher.patterns]
+        if not all(literals) or (matcher.ignore_case and not all(lit.isascii() for lit in literals)):
+            return range(len(self))
+        if len(literals) == 1:
+            return self.find_literal(literals[0], matcher.ignore_case)
+        return self.merge_unique(heapq.merge(*[self.find_literal(lit, matcher.ignore_case) for lit in literals]))
+
+    def merge_unique(self, indices):
+        # Cada literal da índices crecientes: se mezclan sin esperar a tenerlos todos
+        last = -1
+        for index in indices:
+            if index != last:
+                yield index
+                last = index
+
+    def find_literal(self, literal, ignore_case):
+        regex = re.compile(re.escape(os.fsencode(literal)), re.IGNORECASE if ignore_case else 0)
+        offsets = self.offsets
+        if not len(self):
+            return
+        position, end = offsets[0], offsets[len(self)]
+        while True:
+            found = regex.search(self.mm, position, end)
+            if found is None:
+                return
+            # Puede empezar en un nombre y acabar en el siguiente: lo descarta matcher.match
+            index = bisect_right(offsets, found.start()) - 1
+            yield index
+            position = offsets[index + 1]
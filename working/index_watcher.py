@@ -0,0 +1,354 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from file_index import make_row
+from mounts import ExclusionTrie
+
+# Mantiene el índice de archivos al día sin volver a recorrer el disco:
+# inotify en Linux y, para los directorios que no se pueden vigilar (límite de
+# max_user_watches o sistema sin inotify), un barrido periódico de mtime
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF |
+              IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1
+    INOTIFY_AVAILABLE = True
+except (OSError, AttributeError):
+    _libc = None
+    INOTIFY_AVAILABLE = False
+
+
+class Inotify:
+    def __init__(self):
+        self.fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        _libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield wd, mask, cookie, name
+
+    def close(self):
+        os.close(self.fd)
+
+
+class IndexWatcher:
+    def __init__(self, file_index, excluded_dirs=(), sweep_interval=300, flush_interval=1.0):
+        self.file_index = file_index
+        self.excluded_dirs = list(excluded_dirs)
+        self.exclusions = ExclusionTrie(self.excluded_dirs)
+        self.sweep_interval = sweep_interval
+        self.flush_interval = flush_interval
+        self.inotify = None
+        self.watches = {}       # wd -> ruta del directorio
+        self.unwatched = {}     # ruta -> último mtime visto (barrido periódico)
+        self.pending = {}       # (acción, ruta) -> ('upsert', fila) | ('remove', ruta), en orden de llegada
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+        self.events_applied = 0
+        self.last_sweep = 0.0
+        # Funciones que reciben cada lote ya aplicado al índice (búsquedas en vivo). Se
+        # llaman desde el hilo del vigilante y solo cuando hubo cambios
+        self.listeners = []
+
+    def is_excluded(self, path):
+        return self.exclusions.is_excluded(path)
+
+    def subscribe(self, listener):
+        with self.lock:
+            self.listeners = self.listeners + [listener]
+
+    def unsubscribe(self, listener):
+        with self.lock:
+            # Con == y no 'is': cada acceso a un método enlazado crea un objeto nuevo
+            self.listeners = [other for other in self.listeners if other != listener]
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def restart(self):
+        # Tras reconstruir el índice se registran de nuevo todas las vigilancias
+        self.stop()
+        self.start()
+
+    def run(self):
+        self.watches.clear()
+        self.unwatched.clear()
+        if INOTIFY_AVAILABLE:
+            try:
+                self.inotify = Inotify()
+            except OSError:
+                self.inotify = None
+        roots = self.file_index.get_meta('roots', '')
+        for path in filter(None, roots.split(os.pathsep)):
+            self.watch_dir(path)
+        for path, mtime in self.file_index.directories():
+            if self.stopped:
+                break
+            self.watch_dir(path, mtime)
+        self.last_sweep = time.monotonic()
+
+        try:
+            while not self.stopped:
+                if self.inotify:
+                    ready, _, _ = select.select([self.inotify.fd], [], [], self.flush_interval)
+                    if ready:
+                        for event in self.inotify.read_events():
+                            self.handle_event(*event)
+                else:
+                    time.sleep(self.flush_interval)
+                if time.monotonic() - self.last_sweep >= self.sweep_interval:
+                    self.sweep()
+                self.flush()
+        finally:
+            self.flush()
+            if self.inotify:
+                self.inotify.close()
+                self.inotify = None
+
+    def watch_dir(self, path, mtime=None):
+        if self.inotify:
+            try:
+                wd = self.inotify.add_watch(path)
+                self.watches[wd] = path
+                return
+            except OSError as e:
+                # ENOSPC: se agotó max_user_watches; el resto pasa al barrido periódico
+                if e.errno not in (errno.ENOSPC, errno.ENOMEM):
+                    return
+        if mtime is None:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                return
+        self.unwatched[path] = mtime
+
+    def queue_change(self, path, change):
+        # Un 'remove' borra el subárbol entero, así que un alta posterior de la misma ruta
+        # (mv logs logs.1; mkdir logs) va detrás de él en vez de sustituirlo. Un 'remove'
+        # nuevo sí deja sin efecto el alta pendiente
+        key = (change[0], path)
+        with self.lock:
+            if change[0] == 'remove':
+                self.pending.pop(('upsert', path), None)
+            self.pending.pop(key, None)
+            self.pending[key] = change
+
+    def queue_upsert(self, path):
+        try:
+            stats = os.lstat(path)
+        except OSError:
+            self.queue_change(path, ('remove', path))
+            return None
+        self.queue_change(path, ('upsert', make_row(path, stats)))
+        return stats
+
+    def queue_subtree(self, path):
+        # Directorio nuevo o movido dentro de la zona vigilada: se indexa y se vigila entero
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            self.watch_dir(current)
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if self.is_excluded(entry.path):
+                    continue
+                try:
+                    stats = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                self.queue_change(entry.path, ('upsert', make_row(entry.path, stats, is_dir)))
+                if is_dir:
+                    stack.append(entry.path)
+
+    def forget_subtree(self, path):
+        prefix = path.rstrip('/') + '/'
+        for wd, watched in list(self.watches.items()):
+            if watched == path or watched.startswith(prefix):
+                del self.watches[wd]
+                if self.inotify:
+                    self.inotify.rm_watch(wd)
+        for watched in list(self.unwatched):
+            if watched == path or watched.startswith(prefix):
+                del self.unwatched[watched]
+        self.queue_change(path, ('remove', path))
+
+    def handle_event(self, wd, mask, cookie, name):
+        if mask & IN_Q_OVERFLOW:
+            # Se perdieron eventos: solo un barrido completo deja el índice coherente
+            self.sweep(everything=True)
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        directory = self.watches.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+        if self.is_excluded(path):
+            return
+
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            if mask & IN_ISDIR:
+                self.forget_subtree(path)
+            else:
+                self.queue_change(path, ('remove', path))
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            stats = self.queue_upsert(path)
+            if stats is not None and mask & IN_ISDIR:
+                self.queue_subtree(path)
+        elif mask & (IN_CLOSE_WRITE | IN_ATTRIB):
+            self.queue_upsert(path)
+
+    def sweep(self, everything=False):
+        self.last_sweep = time.monotonic()
+        if everything:
+            targets = {path: None for path in self.watches.values()}
+            targets.update(self.unwatched)
+        else:
+            targets = dict(self.unwatched)
+        for path, known_mtime in targets.items():
+            if self.stopped:
+                return
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                self.forget_subtree(path)
+                continue
+            if mtime != known_mtime:
+                self.rescan_dir(path)
+                if path in self.unwatched:
+                    self.unwatched[path] = mtime
+
+    def rescan_dir(self, path):
+        # Compara los hijos directos en disco con los del índice
+        self.flush()
+        indexed = set(self.file_index.children(path))
+        try:
+            with os.scandir(path) as it:
+                entries = [entry for entry in it if not self.is_excluded(entry.path)]
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                stats = entry.stat(follow_symlinks=False)
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            self.queue_change(entry.path, ('upsert', make_row(entry.path, stats, is_dir)))
+            if is_dir and entry.path not in indexed:
+                self.queue_subtree(entry.path)
+            indexed.discard(entry.path)
+        for missing in indexed:
+            self.forget_subtree(missing)
+
+    def flush(self):
+        with self.lock:
+            changes = list(self.pending.values())
+            self.pending.clear()
+        if changes:
+            self.file_index.apply_changes(changes)
+            self.events_applied += len(changes)
+            for listener in self.listeners:
+                listener(changes)
+
+
+def check_rename_recreate():
+    # Comprobación: mv logs logs.1; mkdir logs en la misma ventana no deja en el índice
+    # las filas viejas de logs/ junto a las de logs.1/
+    import shutil
+    import tempfile
+    from file_index import FileIndex
+    root = tempfile.mkdtemp()
+    index_dir = tempfile.mkdtemp()
+    try:
+        logs = os.path.join(root, 'logs')
+        os.makedirs(os.path.join(logs, 'sub'))
+        for name in ('old.log', 'sub/deep.log'):
+            with open(os.path.join(logs, name), 'w') as f:
+                f.write('x')
+        file_index = FileIndex(os.path.join(index_dir, 'index.db'))
+        file_index.build((root,), ())
+        watcher = IndexWatcher(file_index)
+        watcher.inotify = Inotify()
+        watcher.watch_dir(root)
+        for path, mtime in file_index.directories():
+            watcher.watch_dir(path, mtime)
+        os.rename(logs, os.path.join(root, 'logs.1'))
+        os.mkdir(logs)
+        time.sleep(0.1)
+        for event in watcher.inotify.read_events():
+            watcher.handle_event(*event)
+        watcher.flush()
+        watcher.inotify.close()
+        indexed = {path[len(root):] for path, _ in file_index.entries() if path.startswith(root + '/')}
+        expected = {'/logs', '/logs.1', '/logs.1/old.log', '/logs.1/sub', '/logs.1/sub/deep.log'}
+        assert indexed == expected, sorted(indexed)
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(index_dir)
+
+
+if __name__ == "__main__":
+    check_rename_recreate()
+    print("rename + recreate: ok")
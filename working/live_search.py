@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from pattern_matcher import PatternMatcher
+from file_query import FileQuery, looks_like_query
+from mounts import ExclusionTrie
+
+# Búsquedas guardadas que siguen vivas: tras los resultados iniciales se suscriben a los
+# cambios que IndexWatcher aplica al índice (inotify) y deciden qué filas añadir,
+# actualizar o quitar. Sin cambios en disco no se ejecuta nada: no hay sondeo
+
+DEFAULT_SAVED_PATH = os.path.join(os.path.expanduser('~'), '.config', 'papilink', 'busquedas_guardadas.json')
+QUERY_REFRESH = 60   # segundos: las edades relativas ('mtime<1h') se recalculan cada tanto
+
+
+class LiveSearch:
+    def __init__(self, text, roots=('/',), ignore_case=False):
+        self.text = text
+        self.roots = list(roots)
+        self.ignore_case = ignore_case
+        # Mismo criterio que el explorador: una consulta o patrones de nombre
+        self.query = None
+        self.compiled_at = 0.0
+        if looks_like_query(text):
+            self.compile_query()
+            pattern = self.query.name_prefilter() or '*'
+        else:
+            pattern = text
+        self.matcher = PatternMatcher(pattern, ignore_case=ignore_case)
+        self.scope = ExclusionTrie(self.roots)   # "excluido" = dentro de alguna raíz
+        # Directorios con algún resultado debajo: un borrado que no coincide con el patrón
+        # solo interesa si es uno de ellos. Lo rellena la interfaz con add_result
+        self.result_dirs = set()
+
+    def compile_query(self):
+        self.query = FileQuery(self.text, ignore_case=self.ignore_case)
+        self.query.check_rows()
+        self.compiled_at = time.monotonic()
+
+    def within(self, path):
+        return self.scope.is_excluded(path)
+
+    def add_result(self, path):
+        directory = os.path.dirname(path)
+        while directory not in self.result_dirs and directory != '/':
+            self.result_dirs.add(directory)
+            directory = os.path.dirname(directory)
+
+    def changes(self, changes):
+        # changes: lo mismo que recibe FileIndex.apply_changes. Devuelve una lista de
+        # ('add', (ruta, tamaño, mtime, es_dir)) y ('remove', ruta); 'remove' de un
+        # directorio quita también las filas que cuelgan de él
+        if self.query is not None and time.monotonic() - self.compiled_at > QUERY_REFRESH:
+            self.compile_query()
+        events = []
+        for action, value in changes:
+            if action == 'upsert':
+                path, name, _, size, mtime, is_dir = value
+                # Si el nombre no coincide nunca pudo ser un resultado: nada que hacer
+                if not self.within(path) or not self.matcher.match(name, path):
+                    continue
+                if self.query is None or self.query.match_row(path, size, mtime, is_dir):
+                    events.append(('add', (path, size, mtime, bool(is_dir))))
+                else:
+                    # Sigue existiendo pero ya no cumple la consulta (tamaño, fecha...)
+                    events.append(('remove', path))
+            elif value in self.result_dirs or (self.within(value) and self.matcher.match(os.path.basename(value), value)):
+                # Con el borrado el vigilante no dice si era un directorio: se decide por
+                # el nombre o por los directorios que contienen resultados
+                events.append(('remove', value))
+        return events
+
+
+class SavedSearches:
+    # Lista de {'name', 'text', 'roots'} en JSON; el orden es el de la lista desplegable
+    def __init__(self, path=DEFAULT_SAVED_PATH):
+        self.path = path
+        self.items = []
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.items = [item for item in json.load(f) if item.get('name') and item.get('text')]
+        except (OSError, ValueError, AttributeError):
+            self.items = []
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.items, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def names(self):
+        return [item['name'] for item in self.items]
+
+    def get(self, name):
+        for item in self.items:
+            if item['name'] == name:
+                return item
+        return None
+
+    def put(self, name, text, roots=('/',)):
+        # Guardar con un nombre existente sustituye la búsqueda
+        self.items = [item for item in self.items if item['name'] != name]
+        self.items.append({'name': name, 'text': text, 'roots': list(roots)})
+        self.save()
+
+    def remove(self, name):
+        self.items = [item for item in self.items if item['name'] != name]
+        self.save()
@@ -0,0 +1,136 @@
+import os
+from collections import namedtuple
+
+# Tabla de montajes (/proc/self/mounts) clasificada por tipo de sistema de archivos,
+# para podar pseudo-sistemas, montajes de red, FUSE y overlays sin lista fija,
+# y un trie de componentes de ruta para las exclusiones
+
+MOUNTS_FILE = '/proc/self/mounts'
+
+VIRTUAL_FSTYPES = {
+    'proc', 'sysfs', 'devtmpfs', 'devpts', 'cgroup', 'cgroup2', 'securityfs', 'debugfs',
+    'tracefs', 'pstore', 'bpf', 'mqueue', 'hugetlbfs', 'configfs', 'fusectl', 'autofs',
+    'binfmt_misc', 'efivarfs', 'rpc_pipefs', 'nsfs', 'selinuxfs', 'nfsd',
+}
+MEMORY_FSTYPES = {'tmpfs', 'ramfs'}
+NETWORK_FSTYPES = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'afs', 'ceph', 'glusterfs', 'lustre',
+    'davfs', 'ncpfs', 'coda',
+}
+OVERLAY_FSTYPES = {'overlay', 'aufs', 'squashfs'}
+
+# Lo que se poda por defecto: todo menos los discos locales
+DEFAULT_SKIP_KINDS = ('virtual', 'memory', 'network', 'fuse', 'overlay')
+
+Mount = namedtuple('Mount', 'device mount_point fstype options')
+
+
+def unescape(field):
+    # El kernel escapa espacio, tabulador, salto de línea y '\' como \ooo en octal
+    if '\\' not in field:
+        return field
+    out = []
+    i = 0
+    while i < len(field):
+        if field[i] == '\\' and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return ''.join(out)
+
+
+def read_mounts(path=MOUNTS_FILE):
+    mounts = []
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 4:
+                    continue
+                mounts.append(Mount(unescape(fields[0]), unescape(fields[1]), fields[2], fields[3].split(',')))
+    except OSError:
+        pass
+    return mounts
+
+
+def classify(fstype):
+    if fstype in VIRTUAL_FSTYPES:
+        return 'virtual'
+    if fstype in MEMORY_FSTYPES:
+        return 'memory'
+    if fstype in NETWORK_FSTYPES:
+        return 'network'
+    if fstype == 'fuse' or fstype.startswith('fuse.'):
+        # fuseblk (ntfs-3g, exfat) es un disco local y se recorre
+        return 'fuse'
+    if fstype in OVERLAY_FSTYPES:
+        return 'overlay'
+    return 'local'
+
+
+def is_within(path, directory):
+    directory = directory.rstrip('/')
+    return path == directory or path.startswith(directory + '/') or directory == ''
+
+
+def mount_exclusions(roots=('/',), skip_kinds=DEFAULT_SKIP_KINDS, one_file_system=False, mounts=None):
+    # Puntos de montaje por debajo de las raíces que no se deben recorrer. El montaje
+    # que contiene a una raíz nunca se poda (p. ej. '/' sobre overlay en un contenedor)
+    if mounts is None:
+        mounts = read_mounts()
+    roots = [os.path.abspath(root) for root in roots]
+    excluded = []
+    for mount in mounts:
+        point = mount.mount_point
+        if any(is_within(root, point) for root in roots):
+            continue
+        if not any(is_within(point, root) for root in roots):
+            continue
+        if one_file_system or classify(mount.fstype) in skip_kinds:
+            excluded.append(point)
+    # Los montajes anidados dentro de otro ya excluido sobran
+    pruned = []
+    for point in sorted(set(excluded)):
+        if not pruned or not is_within(point, pruned[-1]):
+            pruned.append(point)
+    return pruned
+
+
+class ExclusionTrie:
+    # Cada comprobación cuesta O(profundidad de la ruta), no O(número de exclusiones),
+    # y compara componentes enteros: excluir '/tmp' no excluye '/tmpdata'
+    END = ''
+
+    def __init__(self, paths=()):
+        self.root = {}
+        self.count = 0
+        for path in paths:
+            self.add(path)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, path):
+        node = self.root
+        for part in path.split('/'):
+            if part:
+                node = node.setdefault(part, {})
+        if self.END not in node:
+            node[self.END] = True
+            self.count += 1
+
+    def is_excluded(self, path):
+        node = self.root
+        if self.END in node:
+            return True
+        for part in path.split('/'):
+            if not part:
+                continue
+            node = node.get(part)
+            if node is None:
+                return False
+            if self.END in node:
+                return True
+        return False
@@ -0,0 +1,95 @@
+import threading
+from array import array
+from archive_search import MEMBER_SEP, split_member
+
+# Tabla compacta de rutas: cada nodo es un índice con su padre y el id de su nombre
+# (los nombres se guardan una sola vez). Sustituye al diccionario de rutas completas:
+# ni se repiten los prefijos ni se construye una cadena por cada antecesor. La llena
+# el hilo de búsqueda y el Treeview usa los índices como iid.
+# Los miembros de un comprimido (/d/app.jar!/a/b) cuelgan del nodo del comprimido
+
+ROOT = 0
+
+
+class PathTable:
+    def __init__(self):
+        self.parents = array('i', [-1])    # nodo 0: '/'
+        self.name_ids = array('i', [0])
+        self.names = ['']                  # componentes únicos
+        self.name_index = {'': 0}
+        # (padre << 32) | id del nombre -> nodo, para archivos y directorios: la misma
+        # ruta añadida dos veces (eventos repetidos del vigilante) es el mismo nodo
+        self.children = {}
+        self.archives = set()              # nodos de comprimidos con miembros debajo
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.parents)
+
+    def intern(self, name):
+        name_id = self.name_index.get(name)
+        if name_id is None:
+            name_id = self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def child(self, parent, name_id):
+        key = (parent << 32) | name_id
+        node = self.children.get(key)
+        if node is None:
+            node = self.children[key] = len(self.parents)
+            self.parents.append(parent)
+            self.name_ids.append(name_id)
+        return node
+
+    def descend(self, node, path):
+        for part in path.split('/'):
+            if part:
+                node = self.child(node, self.intern(part))
+        return node
+
+    def add(self, path):
+        # Ruta absoluta -> nodo; los antecesores que falten se crean
+        archive, member = split_member(path)
+        with self.lock:
+            node = self.descend(ROOT, archive)
+            if member is not None:
+                self.archives.add(node)
+                node = self.descend(node, member)
+        return node
+
+    def parent(self, node):
+        return self.parents[node]
+
+    def name(self, node):
+        return self.names[self.name_ids[node]]
+
+    def path(self, node):
+        nodes = []
+        while node > ROOT:
+            nodes.append(node)
+            node = self.parents[node]
+        parts = []
+        for node in reversed(nodes):
+            parts.append(MEMBER_SEP if self.parents[node] in self.archives else '/')
+            parts.append(self.names[self.name_ids[node]])
+        return ''.join(parts) or '/'
+
+    def lookup(self, node, path):
+        for part in path.split('/'):
+            if not part:
+                continue
+            name_id = self.name_index.get(part)
+            node = None if name_id is None else self.children.get((node << 32) | name_id)
+            if node is None:
+                return None
+        return node
+
+    def find(self, path):
+        # Nodo ya creado para una ruta, o None
+        archive, member = split_member(path)
+        with self.lock:
+            node = self.lookup(ROOT, archive)
+            if node is not None and member is not None:
+                node = self.lookup(node, member) if node in self.archives else None
+        return node
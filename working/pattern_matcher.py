@@ -0,0 +1,120 @@
+import re
+
+# Compila uno o varios patrones (glob o regex) en una sola expresión regular,
+# en lugar de llamar a fnmatch.fnmatch por cada nombre y cada patrón.
+# Los patrones con '/' se comparan con la ruta completa ('src/**/*.py').
+
+PATTERN_SEPARATOR = ';'
+
+
+def split_patterns(patterns):
+    if isinstance(patterns, str):
+        patterns = patterns.split(PATTERN_SEPARATOR)
+    return [p.strip() for p in patterns if p.strip()]
+
+
+def translate_glob(pattern, path_aware=False):
+    # Igual que fnmatch.translate, pero con '*' y '?' sin cruzar '/' y '**' para
+    # cualquier número de directorios cuando el patrón es de ruta
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if path_aware and pattern.startswith('**', i):
+                i += 2
+                if i < n and pattern[i] == '/':
+                    out.append('(?:.*/)?')
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*' if path_aware else '.*')
+        elif c == '?':
+            out.append('[^/]' if path_aware else '.')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                out.append('\\[')
+            else:
+                stuff = pattern[i + 1:j].replace('\\', '\\\\')
+                if stuff[0] == '!':
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] == '^':
+                    stuff = '\\' + stuff
+                out.append(f'[{stuff}]')
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class PatternMatcher:
+    def __init__(self, patterns, ignore_case=False, regex=False):
+        self.patterns = split_patterns(patterns)
+        self.ignore_case = ignore_case
+        self.regex = regex
+        flags = re.DOTALL | (re.IGNORECASE if ignore_case else 0)
+
+        name_parts = []
+        path_parts = []
+        for pattern in self.patterns:
+            if regex:
+                name_parts.append(pattern)
+            elif '/' in pattern:
+                # Sin '/' inicial el patrón puede empezar en cualquier directorio
+                prefix = '' if pattern.startswith('/') else '(?:.*/)?'
+                path_parts.append(prefix + translate_glob(pattern, path_aware=True))
+            else:
+                name_parts.append(translate_glob(pattern))
+
+        self.name_regex = re.compile('|'.join(f'(?:{p})' for p in name_parts), flags) if name_parts else None
+        self.path_regex = re.compile('|'.join(f'(?:{p})' for p in path_parts), flags) if path_parts else None
+        # Glob: el nombre entero debe coincidir; regex: basta con encontrarla
+        if self.name_regex is None:
+            self.name_test = None
+        elif regex:
+            self.name_test = self.name_regex.search
+        else:
+            self.name_test = self.name_regex.fullmatch
+        self.path_test = self.path_regex.fullmatch if self.path_regex else None
+
+    def simple_glob(self):
+        # Un único glob de nombre, sensible a mayúsculas: se puede resolver con GLOB en SQLite.
+        # Los conjuntos '[...]' no: SQLite niega con '^' y fnmatch con '!'
+        if (len(self.patterns) == 1 and not self.regex and not self.ignore_case
+                and self.path_test is None and '[' not in self.patterns[0]):
+            return self.patterns[0]
+        return None
+
+    def match(self, name, path=None):
+        if self.name_test and self.name_test(name):
+            return True
+        return bool(self.path_test and path is not None and self.path_test(path))
+
+    def filter_names(self, names, root=None):
+        # Un listado de directorio entero por llamada: filter() con el método del
+        # patrón compilado evita el bucle en Python para los patrones de nombre.
+        # root: directorio del listado, obligatorio si hay patrones de ruta
+        if self.path_test is None:
+            return list(filter(self.name_test, names)) if self.name_test else []
+        if root is None:
+            raise ValueError("filter_names: los patrones de ruta necesitan el directorio (root)")
+        matched = list(filter(self.name_test, names)) if self.name_test else []
+        seen = set(matched)
+        prefix = root.rstrip('/') + '/'
+        matched.extend(n for n in names if n not in seen and self.path_test(prefix + n))
+        return matched
+
+    def filter_entries(self, entries):
+        if self.path_test is None:
+            test = self.name_test
+            return [entry for entry in entries if test(entry.name)] if test else []
+        return [entry for entry in entries if self.match(entry.name, entry.path)]
@@ -0,0 +1,156 @@
+import heapq
+import queue
+import threading
+import time
+from operator import itemgetter
+import psutil
+
+# Procesos que más consumen (CPU, memoria residente o E/S) con un único barrido de
+# psutil.process_iter por ciclo. CPU y E/S son contadores acumulados: se guarda la
+# lectura anterior de cada PID para calcular la diferencia. El propio muestreo mide
+# su coste y alarga el intervalo si haría falta para no pasar de OVERHEAD_BUDGET
+
+# Atributo de psutil de cada columna. El barrido pide solo el de la columna por la que
+# se ordena; las otras se leen únicamente para las filas que se muestran
+METRIC_ATTRS = {'cpu': 'cpu_times', 'rss': 'memory_info', 'io': 'io_counters'}
+CUMULATIVE = ('cpu', 'io')
+SAMPLE_INTERVAL = 5.0     # segundos entre barridos como mínimo
+OVERHEAD_BUDGET = 0.01    # fracción de una CPU que puede gastar el muestreo (1%)
+TOP_PROCESSES = 15
+SORT_KEYS = tuple(METRIC_ATTRS)
+
+
+def metric_value(metric, value):
+    # Segundos de CPU, bytes residentes o bytes de E/S leídos y escritos
+    if value is None:
+        return None
+    if metric == 'cpu':
+        return value.user + value.system
+    if metric == 'rss':
+        return value.rss
+    return value.read_bytes + value.write_bytes
+
+
+class ProcessSampler:
+    def __init__(self, top_n=TOP_PROCESSES, sort_key='cpu', interval=SAMPLE_INTERVAL, budget=OVERHEAD_BUDGET):
+        self.top_n = top_n
+        self.sort_key = sort_key
+        self.interval = interval
+        self.budget = budget
+        # (filas, cifras): filas = [(pid, nombre, %cpu, rss, bytes/s de E/S)] ya ordenadas;
+        # una columna vale None si el proceso no deja leerla (E/S de otros usuarios)
+        self.updates = queue.Queue(maxsize=1)
+        self.previous = {}      # 'cpu'/'io' -> {pid: lectura acumulada del barrido anterior}
+        self.previous_at = None
+        self.last_rows = None
+        self.stats = {}
+        self.thread = None
+        self.stopped = False
+        self.wakeup = threading.Event()
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopped = False
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def set_sort_key(self, sort_key):
+        # El orden se aplica en el siguiente barrido; se adelanta para no esperar
+        self.sort_key = sort_key
+        self.last_rows = None
+        self.wakeup.set()
+
+    def run(self):
+        while not self.stopped:
+            self.wakeup.clear()
+            cost = self.sweep()
+            # Intervalo efectivo: el configurado o el necesario para respetar el presupuesto
+            wait = max(self.interval, cost / self.budget) if self.budget else self.interval
+            self.stats['interval'] = wait
+            self.wakeup.wait(wait)
+
+    def sweep(self):
+        # Devuelve los segundos de CPU que ha costado el barrido (solo este hilo)
+        started_cpu = time.thread_time()
+        started = time.perf_counter()
+        now = time.monotonic()
+        elapsed = now - self.previous_at if self.previous_at else 0.0
+        sort_key = self.sort_key
+        attr = METRIC_ATTRS[sort_key]
+        readings = {metric: {} for metric in CUMULATIVE}
+
+        ranked = []
+        processes = 0
+        for proc in psutil.process_iter(['pid', 'name', attr], ad_value=None):
+            processes += 1
+            value = metric_value(sort_key, proc.info[attr])
+            if value is None:
+                continue
+            if sort_key in CUMULATIVE:
+                readings[sort_key][proc.pid] = value
+                value = self.rate(sort_key, proc.pid, value, elapsed)
+            ranked.append((value, proc))
+        top = heapq.nlargest(self.top_n, ranked, key=itemgetter(0))
+
+        rows = []
+        for value, proc in top:
+            columns = {sort_key: value}
+            # Las demás columnas solo para las filas visibles, con una lectura de /proc por PID
+            with proc.oneshot():
+                for metric, other_attr in METRIC_ATTRS.items():
+                    if metric == sort_key:
+                        continue
+                    try:
+                        other = metric_value(metric, getattr(proc, other_attr)())
+                    except psutil.Error:
+                        other = None
+                    if other is not None and metric in CUMULATIVE:
+                        readings[metric][proc.pid] = other
+                        other = self.rate(metric, proc.pid, other, elapsed)
+                    columns[metric] = other
+            rows.append((proc.pid, proc.info['name'] or '?', columns['cpu'], columns['rss'], columns['io']))
+        self.previous = readings
+        self.previous_at = now
+
+        cost = time.thread_time() - started_cpu
+        self.stats.update({
+            'processes': processes,
+            'sweep_ms': (time.perf_counter() - started) * 1000,
+            'cpu_seconds': cost,
+        })
+        if rows != self.last_rows:
+            self.last_rows = rows
+            self.publish(rows)
+        return cost
+
+    def rate(self, metric, pid, value, elapsed):
+        # %CPU o bytes/s desde el barrido anterior; sin lectura previa (proceso nuevo,
+        # PID reutilizado o recién visible) no hay diferencia que calcular
+        old = self.previous.get(metric, {}).get(pid)
+        if old is None or elapsed <= 0 or value < old:
+            return 0.0
+        if metric == 'cpu':
+            return (value - old) / elapsed * 100
+        return (value - old) / elapsed
+
+    def overhead(self):
+        # Fracción de una CPU usada por el muestreo con el intervalo actual
+        interval = self.stats.get('interval') or self.interval
+        return self.stats.get('cpu_seconds', 0.0) / interval
+
+    def publish(self, rows):
+        # Solo interesa el último resultado: si la interfaz no lo recogió, se sustituye
+        try:
+            self.updates.get_nowait()
+        except queue.Empty:
+            pass
+        self.updates.put((rows, dict(self.stats)))
@@ -0,0 +1,212 @@
+import os
+import pickle
+import stat
+from fast_walker import ParallelWalker
+from archive_search import ARCHIVE_MATCHER, archive_entries
+
+# Caché de resultados de búsqueda por (raíces, exclusiones, patrones, filtros). Para cada
+# directorio recorrido se guarda su mtime y los nombres que pasaron el filtro; al repetir
+# la búsqueda basta un stat por directorio: solo se vuelven a leer los que cambiaron
+# (el mtime de un directorio cambia al crear, borrar o renombrar algo dentro) y solo se
+# recorren enteros los subdirectorios nuevos
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'papilink', 'busquedas.pickle')
+MAX_SEARCHES = 16   # búsquedas guardadas; se descarta la usada hace más tiempo
+
+
+class StatEntry:
+    # Candidato guardado con la interfaz de DirEntry que usan los predicados de FileQuery
+    __slots__ = ('name', 'path', 'stats')
+
+    def __init__(self, path, stats):
+        self.path = path
+        self.name = path.rsplit('/', 1)[-1]
+        self.stats = stats
+
+    def is_dir(self, follow_symlinks=True):
+        return stat.S_ISDIR(self.stats.st_mode)
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self.stats.st_mode)
+
+    def stat(self, follow_symlinks=True):
+        return self.stats
+
+
+def search_key(roots, excluded_dirs, matcher, query, archives=False, symlinks='never', unique_dirs=False):
+    patterns = (tuple(matcher.patterns), matcher.ignore_case, matcher.regex) if matcher else None
+    filters = (query.text, query.ignore_case) if query else None
+    # Seguir enlaces o no repetir directorios cambia lo recorrido: son búsquedas distintas
+    walk = (symlinks, unique_dirs or symlinks == 'follow')
+    return (tuple(roots), tuple(sorted(excluded_dirs)), patterns, filters, archives, walk)
+
+
+class SearchCache:
+    def __init__(self, max_searches=MAX_SEARCHES):
+        self.max_searches = max_searches
+        self.searches = {}   # clave -> {directorio: (mtime_ns, [(nombre, es_dir)])}
+        self.stats = {}      # cifras de la última búsqueda
+        self.walker = None
+        self.stopped = False
+        self.symlinks = 'never'    # opciones del recorrido de la búsqueda en curso
+        self.unique_dirs = False
+
+    def __len__(self):
+        return len(self.searches)
+
+    def stop(self):
+        self.stopped = True
+        if self.walker:
+            self.walker.stop()
+
+    def clear(self):
+        self.searches.clear()
+
+    def search(self, roots, excluded_dirs, matcher, query=None, workers=None, archives=None,
+               symlinks='never', unique_dirs=False):
+        # Produce (ruta, tamaño, mtime, es_directorio), como SearchEngine.search.
+        # archives: lista donde dejar (ruta, tamaño, mtime) de los comprimidos que aparezcan;
+        # se guardan en la misma entrada de la caché, junto a los resultados
+        self.stopped = False
+        self.walker = None
+        self.symlinks = symlinks
+        self.unique_dirs = unique_dirs
+        key = search_key(roots, excluded_dirs, matcher, query, archives is not None, symlinks, unique_dirs)
+        dirs = self.searches.pop(key, None)
+        self.stats = {'hit': dirs is not None, 'dirs_checked': 0, 'dirs_rescanned': 0, 'subtrees_walked': 0}
+        complete = True
+        if dirs is None:
+            dirs = {}
+            complete = yield from self.walk(roots, excluded_dirs, matcher, query, dirs, workers, archives)
+        else:
+            complete = yield from self.revalidate(excluded_dirs, matcher, query, dirs, workers, archives)
+        # Una búsqueda interrumpida no se guarda: le faltarían directorios
+        if complete:
+            self.searches[key] = dirs
+            while len(self.searches) > self.max_searches:
+                self.searches.pop(next(iter(self.searches)))
+
+    def candidate_filter(self, matcher, query, archives=None):
+        # Si la consulta depende de tamaño o fecha se guardan los que pasan los patrones
+        # y la consulta se evalúa en cada búsqueda: cambiar un archivo no toca el mtime
+        # de su directorio
+        final_query = query if query and not query.needs_stat else None
+
+        def entry_filter(entries):
+            found = entries
+            if matcher:
+                found = matcher.filter_entries(found)
+            if final_query and found:
+                found = final_query.filter_entries(found)
+            if archives is not None:
+                # Los comprimidos también se guardan; rows() los separa de los resultados
+                passed = {id(entry) for entry in found}
+                found = list(found) + [entry for entry in archive_entries(entries) if id(entry) not in passed]
+            return found
+        return entry_filter
+
+    def rows(self, directory, names, matcher, query, archives=None):
+        prefix = directory.rstrip('/') + '/'
+        check = query if query and query.needs_stat else None
+        if archives is not None:
+            # Con comprimidos mezclados hay que volver a mirar los patrones y la consulta entera
+            check = query
+        for name, is_dir in names:
+            path = prefix + name
+            try:
+                stats = os.lstat(path)
+            except OSError:
+                continue
+            if archives is not None:
+                if not is_dir and stat.S_ISREG(stats.st_mode) and ARCHIVE_MATCHER.match(name, path):
+                    archives.append((path, stats.st_size, stats.st_mtime))
+                if matcher and not matcher.match(name, path):
+                    continue
+            if check and not check.match(StatEntry(path, stats)):
+                continue
+            # es_dir del listado: con 'follow' un enlace a directorio cuenta como directorio
+            yield path, stats.st_size, stats.st_mtime, is_dir
+
+    def walk(self, roots, excluded_dirs, matcher, query, dirs, workers, archives=None):
+        # Recorrido completo que además anota el mtime de cada directorio. Se toma en el
+        # hilo justo antes de leerlo: un cambio durante la lectura deja un mtime anterior
+        # al cambio y el directorio se relee la próxima vez, nunca al revés
+        mtimes = {}
+
+        def before_scan(path):
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+
+        self.walker = ParallelWalker(roots, excluded_dirs, workers=workers,
+                                     entry_filter=self.candidate_filter(matcher, query, archives),
+                                     before_scan=before_scan, symlinks=self.symlinks, unique_dirs=self.unique_dirs)
+        walk = self.walker.walk()
+        try:
+            for root, subdirs, files in walk:
+                if self.stopped:
+                    return False
+                names = [(entry.name, False) for entry in files] + [(entry.name, True) for entry in subdirs]
+                # Sin mtime conocido el directorio se releerá la próxima vez
+                dirs[root] = (mtimes.pop(root, None), names)
+                yield from self.rows(root, names, matcher, query, archives)
+        finally:
+            walk.close()
+        return not self.stopped
+
+    def revalidate(self, excluded_dirs, matcher, query, dirs, workers, archives=None):
+        changed = []
+        for directory, (mtime_ns, names) in list(dirs.items()):
+            if self.stopped:
+                return False
+            self.stats['dirs_checked'] += 1
+            try:
+                stats = os.stat(directory)
+            except OSError:
+                # Borrado o sin acceso: sus descendientes también fallarán el stat
+                del dirs[directory]
+                continue
+            if not stat.S_ISDIR(stats.st_mode):
+                del dirs[directory]
+            elif stats.st_mtime_ns != mtime_ns:
+                changed.append((directory, stats.st_mtime_ns))
+            else:
+                yield from self.rows(directory, names, matcher, query, archives)
+
+        candidates = self.candidate_filter(matcher, query, archives)
+        walker = ParallelWalker((), excluded_dirs, symlinks=self.symlinks)
+        new_roots = []
+        for directory, mtime_ns in changed:
+            if self.stopped:
+                return False
+            self.stats['dirs_rescanned'] += 1
+            subdirs, files = walker.scan_dir(directory)
+            for entry in subdirs:
+                if entry.path not in dirs and not walker.is_excluded(entry.path):
+                    new_roots.append(entry.path)
+            names = [(entry.name, False) for entry in candidates(files)]
+            names += [(entry.name, True) for entry in candidates(subdirs)]
+            dirs[directory] = (mtime_ns, names)
+            yield from self.rows(directory, names, matcher, query, archives)
+
+        if new_roots:
+            # Subárboles que aparecieron desde la última vez: se recorren enteros
+            self.stats['subtrees_walked'] = len(new_roots)
+            complete = yield from self.walk(new_roots, excluded_dirs, matcher, query, dirs, workers, archives)
+            return complete
+        return not self.stopped
+
+    def save(self, path=DEFAULT_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.searches, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path=DEFAULT_CACHE_PATH):
+        try:
+            with open(path, 'rb') as f:
+                self.searches = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.searches = {}
@@ -0,0 +1,152 @@
+import os
+from fast_walker import ParallelWalker
+from pattern_matcher import PatternMatcher
+from file_query import FileQuery
+from file_index import FileIndex
+from mounts import mount_exclusions, DEFAULT_SKIP_KINDS
+from archive_search import ArchiveSearch, ARCHIVE_MATCHER, archive_entries
+
+# Motor de búsqueda sin interfaz: el mismo recorrido y los mismos patrones que usan
+# los exploradores Tk, para usarlo desde scripts, cron o la línea de órdenes
+
+class SearchEngine:
+    def __init__(self, roots=('/',), excluded_dirs=(), threads=None, ignore_case=False, regex=False,
+                 use_index=False, index_path=None, prune_mounts=True, one_file_system=False, cache=None,
+                 symlinks='never', unique_dirs=False, archives=False, archive_cache=None):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.excluded_dirs = list(excluded_dirs)
+        if prune_mounts or one_file_system:
+            # /proc, /sys, red, FUSE...: se deciden por la tabla de montajes, no por una lista fija
+            skip_kinds = DEFAULT_SKIP_KINDS if prune_mounts else ()
+            self.excluded_dirs += mount_exclusions(self.roots, skip_kinds, one_file_system)
+        self.threads = threads
+        self.ignore_case = ignore_case
+        self.regex = regex
+        self.use_index = use_index
+        self.index_path = index_path
+        # cache: SearchCache opcional; repetir una búsqueda solo relee los directorios cambiados
+        self.cache = cache
+        # symlinks='follow' o unique_dirs: cada directorio (st_dev, st_ino) se lee una vez
+        self.symlinks = symlinks
+        self.unique_dirs = unique_dirs
+        # archives: buscar también dentro de .zip/.jar/.tar.gz; archive_cache (ArchiveCache)
+        # guarda la lista de miembros de cada comprimido por (tamaño, mtime)
+        self.archives = archives
+        self.archive_cache = archive_cache
+        self.archive_search = None
+        self.walker = None
+        self.stopped = False
+        self.stat_calls = 0
+
+    def stop(self):
+        self.stopped = True
+        if self.walker:
+            self.walker.stop()
+        if self.cache:
+            self.cache.stop()
+        if self.archive_search:
+            self.archive_search.stop()
+
+    def search(self, patterns=None, where=None):
+        # Produce (ruta, tamaño, mtime, es_directorio). El consumidor marca el ritmo:
+        # si deja de leer, la cola acotada del recorrido frena a los hilos.
+        # where: consulta como 'size>500M and mtime<7d' (ver file_query)
+        self.stopped = False
+        self.stat_calls = 0
+        matcher = PatternMatcher(patterns, ignore_case=self.ignore_case, regex=self.regex) if patterns else None
+        query = FileQuery(where, ignore_case=self.ignore_case) if where else None
+        if matcher is None and query is None:
+            matcher = PatternMatcher('*')
+        # Los comprimidos se anotan durante la misma búsqueda: (ruta, tamaño, mtime)
+        archives = [] if self.archives else None
+        if self.use_index:
+            yield from self.search_index(matcher, query, archives)
+        elif self.cache is not None:
+            yield from self.search_cached(matcher, query, archives)
+        else:
+            yield from self.search_walk(matcher, query, archives)
+        if archives and not self.stopped:
+            yield from self.search_archives(matcher or PatternMatcher('*'), query, archives)
+
+    def search_archives(self, matcher, query, archives):
+        # Los miembros pasan por los mismos patrones y la misma consulta que los archivos
+        self.archive_search = ArchiveSearch(matcher, query, cache=self.archive_cache)
+        results = self.archive_search.run(archives)
+        try:
+            for row in results:
+                if self.stopped:
+                    return
+                yield row
+        finally:
+            results.close()
+
+    def search_walk(self, matcher, query, archives=None):
+        def entry_filter(entries):
+            if archives is not None:
+                # En los hilos del recorrido, como el resto del filtro
+                for entry in archive_entries(entries):
+                    try:
+                        stats = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    archives.append((entry.path, stats.st_size, stats.st_mtime))
+            # Primero los patrones de nombre; la consulta solo ve lo que ha pasado
+            if matcher:
+                entries = matcher.filter_entries(entries)
+            if query and entries:
+                entries = query.filter_entries(entries)
+            return entries
+
+        self.walker = ParallelWalker(self.roots, self.excluded_dirs, workers=self.threads, entry_filter=entry_filter,
+                                     symlinks=self.symlinks, unique_dirs=self.unique_dirs)
+        walk = self.walker.walk()
+        try:
+            for root, dirs, files in walk:
+                if self.stopped:
+                    return
+                # Solo llegan las entradas que coinciden; si la consulta ya hizo stat,
+                # DirEntry lo tiene en caché y no hay otra llamada al sistema
+                for entries, is_dir in ((files, False), (dirs, True)):
+                    for entry in entries:
+                        if not (query and query.needs_stat):
+                            self.stat_calls += 1
+                        try:
+                            stats = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        yield entry.path, stats.st_size, stats.st_mtime, is_dir
+        finally:
+            walk.close()
+            if query:
+                self.stat_calls += query.stat_calls
+
+    def search_cached(self, matcher, query, archives=None):
+        results = self.cache.search(self.roots, self.excluded_dirs, matcher, query, self.threads, archives=archives,
+                                    symlinks=self.symlinks, unique_dirs=self.unique_dirs)
+        try:
+            for row in results:
+                # El recorrido (si lo hay) lo crea la caché: se expone para el progreso
+                self.walker = self.cache.walker
+                if self.stopped:
+                    return
+                yield row
+        finally:
+            results.close()
+            self.walker = self.cache.walker
+
+    def search_index(self, matcher, query, archives=None):
+        index = FileIndex(self.index_path) if self.index_path else FileIndex()
+        prefixes = tuple(root.rstrip('/') + '/' for root in self.roots)
+        for path, size, mtime, is_dir in index.search(matcher, self.ignore_case, query):
+            if self.stopped:
+                return
+            if path.startswith(prefixes) or path in self.roots:
+                yield path, size, mtime, bool(is_dir)
+        if archives is not None:
+            # En el índice es otra consulta por el nombre invertido, sin recorrer nada
+            archives.extend((path, size, mtime) for path, size, mtime, is_dir in index.search(ARCHIVE_MATCHER)
+                            if not is_dir and path.startswith(prefixes))
+
+
+def entry_type(is_dir):
+    return 'dir' if is_dir else 'file'
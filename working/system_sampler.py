@@ -0,0 +1,186 @@
+import os
+import platform
+import queue
+import threading
+import time
+import psutil
+from mounts import classify
+from time_series import RingBuffer
+
+try:
+    import cpuinfo
+    CPU_INFO_AVAILABLE = True
+except ImportError:
+    CPU_INFO_AVAILABLE = False
+
+# Muestreo del sistema en un hilo aparte: lo que no cambia (modelo de CPU, versión del
+# sistema) se lee una vez, lo que cambia poco (particiones, direcciones de red) cada
+# SLOW_INTERVAL y los contadores cada 'interval'. A la interfaz solo llegan las líneas
+# que cambiaron desde el último envío. Cada lectura se guarda además en búferes
+# circulares (HISTORY_SECONDS) para las minigráficas
+
+SAMPLE_INTERVAL = 1.0   # segundos entre lecturas de los contadores
+SLOW_INTERVAL = 30.0    # particiones, uso de disco y direcciones de red
+HISTORY_SECONDS = 3600  # una hora de historia, sea cual sea el tiempo de ejecución
+SECTIONS = ('disk', 'cpu', 'ram', 'net', 'system')
+
+
+def login_name():
+    try:
+        return os.getlogin()
+    except OSError:
+        return os.environ.get('USER') or os.environ.get('USERNAME', 'Desconocido')
+
+
+class SystemSampler:
+    def __init__(self, format_size, interval=SAMPLE_INTERVAL, slow_interval=SLOW_INTERVAL, publish_lines=True):
+        self.format_size = format_size
+        self.publish_lines = publish_lines   # False: solo historia, sin líneas de texto
+        self.interval = interval
+        self.slow_interval = slow_interval
+        # (sección, número de líneas, {posición: texto}) con lo que cambió
+        self.updates = queue.Queue()
+        self.sent = {}
+        self.static = None
+        self.slow = {'disk': [], 'net': []}
+        self.thread = None
+        self.stopped = False
+        self.wakeup = threading.Event()
+        capacity = max(2, int(HISTORY_SECONDS / interval))
+        self.history = {
+            'cpu': RingBuffer(capacity, psutil.cpu_count() or 1),   # % por núcleo
+            'ram': RingBuffer(capacity),                            # % en uso
+            'disk_io': RingBuffer(capacity, 2),                     # bytes/s leídos, escritos
+            'net_io': RingBuffer(capacity, 2),                      # bytes/s recibidos, enviados
+        }
+        self.samples = 0        # lecturas guardadas: la interfaz redibuja cuando cambia
+        self.last_counters = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopped = False
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def run(self):
+        # Lo estático primero: cpuinfo puede tardar más de un segundo
+        self.static = self.read_static()
+        psutil.cpu_percent(percpu=True)   # la primera lectura solo fija la referencia
+        self.last_counters = self.read_counters()
+        next_slow = 0.0
+        while not self.stopped:
+            now = time.monotonic()
+            if now >= next_slow:
+                self.slow = {'disk': self.read_disks(), 'net': self.read_addresses()}
+                next_slow = now + self.slow_interval
+            sections = self.sample()
+            if self.publish_lines:
+                self.publish(sections)
+            self.wakeup.wait(self.interval)
+
+    def read_static(self):
+        brand = "Instalar py-cpuinfo para más detalles"
+        if CPU_INFO_AVAILABLE:
+            try:
+                brand = cpuinfo.get_cpu_info().get('brand_raw', brand)
+            except Exception:
+                brand = "Información de CPU no disponible"
+        return {
+            'brand': brand,
+            'cores': f"Núcleos: {psutil.cpu_count(logical=False)} físicos / {psutil.cpu_count()} lógicos",
+            'system': [
+                f"Sistema: {platform.system()} {platform.release()}",
+                f"Versión: {platform.version()}",
+                f"Arquitectura: {platform.machine()}",
+                f"Usuario: {login_name()}",
+            ],
+        }
+
+    def read_disks(self):
+        info = []
+        for part in psutil.disk_partitions():
+            # statvfs sobre un montaje de red caído puede bloquear: solo discos locales
+            if 'snap' in part.mountpoint or classify(part.fstype) == 'network':
+                continue
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except OSError:
+                continue
+            info.append(f"📌 {part.device} ({part.fstype})")
+            info.append(f" Punto de montaje: {part.mountpoint}")
+            info.append(f" Espacio: {self.format_size(usage.used)} / {self.format_size(usage.total)}")
+            info.append(f" Uso: {usage.percent}%")
+        return info
+
+    def read_addresses(self):
+        info = []
+        for interface, addrs in psutil.net_if_addrs().items():
+            info.append(f"🌍 {interface}")
+            for addr in addrs:
+                info.append(f" {addr.family.name}: {addr.address}")
+        return info
+
+    def read_counters(self):
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        return (
+            time.monotonic(),
+            (disk.read_bytes, disk.write_bytes) if disk else (0, 0),
+            (net.bytes_recv, net.bytes_sent) if net else (0, 0),
+        )
+
+    def record(self, per_core, mem):
+        # Los contadores de E/S son acumulados: se guarda la diferencia por segundo
+        counters = self.read_counters()
+        last = self.last_counters
+        elapsed = counters[0] - last[0]
+        if elapsed > 0:
+            history = self.history
+            width = history['cpu'].width
+            history['cpu'].append((list(per_core) + [0.0] * width)[:width])
+            history['ram'].append([mem.percent])
+            history['disk_io'].append([max(0, (new - old) / elapsed) for new, old in zip(counters[1], last[1])])
+            history['net_io'].append([max(0, (new - old) / elapsed) for new, old in zip(counters[2], last[2])])
+            self.samples += 1
+        self.last_counters = counters
+
+    def sample(self):
+        static = self.static
+        freq = psutil.cpu_freq()
+        mem = psutil.virtual_memory()
+        per_core = psutil.cpu_percent(percpu=True)
+        self.record(per_core, mem)
+        return {
+            'disk': self.slow['disk'],
+            'cpu': [
+                f"Procesador: {static['brand']}",
+                static['cores'],
+                f"Frecuencia: {freq.current:.2f} MHz" if freq else "Frecuencia: no disponible",
+                f"Uso actual: {sum(per_core) / len(per_core):.1f}%",
+            ],
+            'ram': [
+                f"Total: {self.format_size(mem.total)}",
+                f"En uso: {self.format_size(mem.used)} ({mem.percent}%)",
+                f"Disponible: {self.format_size(mem.available)}",
+            ],
+            'net': self.slow['net'],
+            'system': static['system'],
+        }
+
+    def publish(self, sections):
+        for section in SECTIONS:
+            lines = sections[section]
+            previous = self.sent.get(section, [])
+            changed = {i: text for i, text in enumerate(lines) if i >= len(previous) or previous[i] != text}
+            if section not in self.sent or changed or len(lines) != len(previous):
+                self.sent[section] = lines
+                self.updates.put((section, len(lines), changed))
@@ -0,0 +1,117 @@
+import threading
+import tkinter as tk
+from array import array
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Series temporales de tamaño fijo (búfer circular) y su dibujo como minigráficas en un
+# Canvas. La memoria no crece con el tiempo de ejecución: al llenarse, cada muestra
+# nueva pisa la más antigua
+
+
+class RingBuffer:
+    def __init__(self, capacity, width=1):
+        # width: valores por muestra (p. ej. uno por núcleo)
+        self.capacity = capacity
+        self.width = width
+        self.count = 0       # muestras guardadas (como mucho capacity)
+        self.head = 0        # posición de la próxima escritura
+        self.lock = threading.Lock()
+        if NUMPY_AVAILABLE:
+            self.data = np.zeros((capacity, width), dtype=np.float32)
+        else:
+            self.data = array('f', bytes(4 * capacity * width))
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values):
+        with self.lock:
+            if NUMPY_AVAILABLE:
+                self.data[self.head] = values
+            else:
+                base = self.head * self.width
+                self.data[base:base + self.width] = array('f', values)
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def last(self):
+        if not self.count:
+            return None
+        row = (self.head - 1) % self.capacity
+        if NUMPY_AVAILABLE:
+            return self.data[row].tolist()
+        return self.data[row * self.width:(row + 1) * self.width].tolist()
+
+    def values(self):
+        # Copia en orden cronológico: filas = muestras, columnas = series
+        with self.lock:
+            start = (self.head - self.count) % self.capacity
+            if NUMPY_AVAILABLE:
+                if start + self.count <= self.capacity:
+                    return self.data[start:start + self.count].copy()
+                return np.concatenate((self.data[start:], self.data[:self.head]))
+            rows = [start + i - self.capacity if start + i >= self.capacity else start + i
+                    for i in range(self.count)]
+            width = self.width
+            return [self.data[r * width:(r + 1) * width].tolist() for r in rows]
+
+
+def downsample(values, points):
+    # Como mucho 'points' columnas por serie; de cada tramo se queda el máximo para que
+    # los picos cortos sigan viéndose. Devuelve una lista de series (listas de floats)
+    if NUMPY_AVAILABLE:
+        data = np.asarray(values, dtype=np.float32)
+        if len(data) > points:
+            bucket = -(-len(data) // points)
+            pad = bucket * -(-len(data) // bucket) - len(data)
+            if pad:
+                data = np.concatenate((np.repeat(data[:1], pad, axis=0), data))
+            data = data.reshape(-1, bucket, data.shape[1]).max(axis=1)
+        return data.T.tolist()
+    series = [list(column) for column in zip(*values)]
+    if len(values) <= points:
+        return series
+    bucket = -(-len(values) // points)
+    # Los tramos se alinean con la muestra más reciente; el primero puede ser más corto
+    start = len(values) % bucket
+    reduced = []
+    for data in series:
+        maxima = [max(data[:start])] if start else []
+        maxima.extend(max(data[i:i + bucket]) for i in range(start, len(data), bucket))
+        reduced.append(maxima)
+    return reduced
+
+
+class Sparkline(tk.Canvas):
+    # Una fila por serie; cada fila es un único elemento 'line' del Canvas al que solo
+    # se le cambian las coordenadas en cada redibujado
+    def __init__(self, master, rows=1, row_height=28, width=260, color='#5dade2', maximum=None, **kwargs):
+        super().__init__(master, width=width, height=rows * row_height, bg='#1c2833',
+                         highlightthickness=0, **kwargs)
+        self.rows = rows
+        self.row_height = row_height
+        self.plot_width = width
+        self.maximum = maximum      # None: escala automática según el máximo visible
+        self.lines = [self.create_line(0, 0, 0, 0, fill=color, width=1) for _ in range(rows)]
+        self.caption = self.create_text(4, 2, anchor=tk.NW, fill='white', font=('Arial', 8), text='')
+
+    def draw(self, values, caption=''):
+        self.itemconfig(self.caption, text=caption)
+        if len(values) < 2:
+            return
+        series = downsample(values, self.plot_width)
+        height = self.row_height - 3
+        for row, (line, data) in enumerate(zip(self.lines, series)):
+            top = row * self.row_height + 2
+            peak = self.maximum or max(max(data), 1.0)
+            step = self.plot_width / max(len(data) - 1, 1)
+            coords = []
+            for i, value in enumerate(data):
+                coords.append(i * step)
+                coords.append(top + height - min(value, peak) / peak * height)
+            self.coords(line, *coords)
@@ -0,0 +1,438 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk
+from array import array
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Tabla virtual para millones de resultados: los datos viven en arrays compactos
+# y el Treeview solo tiene las filas que caben en pantalla
+
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_LINK = 2
+
+NAME_KEY_CHUNK = 65536     # ordenar por nombre con numpy: filas por bloque al leer el blob
+NAME_KEY_SPAN = 1 << 22    # y bytes del blob copiados como mucho por bloque
+NAME_TIE_BATCH = 1 << 18   # filas empatadas reordenadas por lote
+
+
+class ResultStore:
+    def __init__(self):
+        self.generation = 0
+        self.path_rows = None            # ruta -> fila, solo mientras se siguen cambios (track_paths)
+        self.clear()
+
+    def clear(self):
+        self.generation += 1             # invalida ordenaciones en curso sobre datos anteriores
+        self.blob = bytearray()          # rutas codificadas, una tras otra
+        self.offsets = array('Q', [0])   # inicio de cada ruta en blob
+        self.name_starts = array('Q')    # inicio del nombre (tras la última '/') en blob
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.kinds = array('b')
+        self.order = None                # permutación al ordenar (None = orden de llegada)
+        self.deleted = set()             # filas quitadas: siguen en los arrays, no en order
+        if self.path_rows is not None:
+            self.path_rows = {}
+
+    def __len__(self):
+        # Filas visibles; las guardadas (incluidas las quitadas) son len(self.sizes)
+        return len(self.order) if self.order is not None else len(self.sizes)
+
+    def append(self, path, size, mtime, kind):
+        start = len(self.blob)
+        self.blob += os.fsencode(path)
+        slash = self.blob.rfind(b'/', start)
+        self.name_starts.append(slash + 1 if slash >= 0 else start)
+        self.offsets.append(len(self.blob))
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.kinds.append(kind)
+        index = len(self.sizes) - 1
+        if self.order is not None:
+            self.order.append(index)
+        if self.path_rows is not None:
+            self.path_rows[path] = index
+        return index
+
+    def track_paths(self, enabled=True):
+        # Índice ruta -> fila para aplicar cambios sin recorrer el blob; ocupa memoria por
+        # cada resultado, así que solo existe mientras hay una búsqueda en vivo
+        if not enabled:
+            self.path_rows = None
+        elif self.path_rows is None:
+            self.path_rows = {self.path(i): i for i in range(len(self.sizes)) if i not in self.deleted}
+
+    def row_of(self, path):
+        return self.path_rows.get(path)
+
+    def rows_under(self, directories):
+        # (ruta, fila) de lo que cuelga de alguno de los directorios: una pasada por lote
+        prefixes = tuple(directory.rstrip('/') + '/' for directory in directories)
+        return [(path, index) for path, index in self.path_rows.items() if path.startswith(prefixes)]
+
+    def update(self, index, size, mtime, kind):
+        self.sizes[index] = size
+        self.mtimes[index] = mtime
+        self.kinds[index] = kind
+
+    def remove_rows(self, indices):
+        # Salen de la vista de una vez (un solo recorrido de order por lote); las rutas
+        # siguen en el blob hasta el próximo clear. Devuelve cuántas se quitaron
+        indices = set(indices) - self.deleted
+        if not indices:
+            return 0
+        self.deleted |= indices
+        if self.path_rows is not None:
+            for index in indices:
+                self.path_rows.pop(self.path(index), None)
+        if NUMPY_AVAILABLE:
+            if self.order is not None:
+                current = np.frombuffer(self.order, dtype=np.uint32)
+            else:
+                current = np.arange(len(self.sizes), dtype=np.uint32)
+            kept = current[~np.isin(current, np.fromiter(indices, dtype=np.uint32, count=len(indices)))]
+            order = array('I')
+            order.frombytes(kept.tobytes())
+            self.order = order
+        else:
+            current = self.order if self.order is not None else range(len(self.sizes))
+            self.order = array('I', (index for index in current if index not in indices))
+        return len(indices)
+
+    def index_at(self, position):
+        return self.order[position] if self.order is not None else position
+
+    def path(self, index):
+        return os.fsdecode(bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]))
+
+    def name(self, index):
+        return os.fsdecode(bytes(self.blob[self.name_starts[index]:self.offsets[index + 1]]))
+
+    def name_bytes(self, index):
+        return bytes(self.blob[self.name_starts[index]:self.offsets[index + 1]])
+
+    def sorted_order(self, field, reverse=False, count=None):
+        # Se calcula sobre una foto de las filas actuales; puede correr fuera del hilo de Tk
+        if count is None:
+            count = len(self.sizes)
+        if self.deleted:
+            return self.without_deleted(self.sorted_order_all(field, reverse, count))
+        return self.sorted_order_all(field, reverse, count)
+
+    def sorted_order_all(self, field, reverse, count):
+        if field in ('size', 'mtime', 'kind') and NUMPY_AVAILABLE:
+            column = {'size': self.sizes, 'mtime': self.mtimes, 'kind': self.kinds}[field]
+            # Copia de la columna: un array exportando su buffer no puede crecer
+            keys = np.frombuffer(column[:count], dtype=column.typecode)
+            idx = np.argsort(keys, kind='stable').astype(np.uint32)
+            if reverse:
+                idx = idx[::-1]
+            order = array('I')
+            order.frombytes(idx.tobytes())
+            return order
+        if field == 'name':
+            if NUMPY_AVAILABLE:
+                return self.sorted_by_name(reverse, count)
+            # Los nombres en bytes, tal cual están en el blob: sin decodificar cada ruta
+            key = self.name_bytes
+        else:
+            key = {'size': self.sizes, 'mtime': self.mtimes, 'kind': self.kinds}[field].__getitem__
+        return array('I', sorted(range(count), key=key, reverse=reverse))
+
+    def name_lengths(self, starts, count):
+        lengths = np.empty(count, dtype=np.uint32)
+        for low in range(0, count, NAME_KEY_CHUNK):
+            high = min(low + NAME_KEY_CHUNK, count)
+            lengths[low:high] = np.frombuffer(self.offsets[low + 1:high + 1], dtype=np.uint64) - starts[low:high]
+        return lengths
+
+    def name_words(self, starts, lengths, offset, rows=None):
+        # Bytes [offset, offset + 8) del nombre de cada fila (rows en orden creciente, o
+        # todas) como entero big-endian, con ceros pasado el final: comparar palabras es
+        # comparar los bytes. El blob se copia por tramos acotados; exportarlo entero
+        # impediría que creciera
+        total = len(starts) if rows is None else len(rows)
+        words = np.zeros(total, dtype=np.uint64)
+        columns = np.arange(8)
+        low = 0
+        while low < total:
+            high = min(low + NAME_KEY_CHUNK, total)
+            chunk_rows = slice(low, high) if rows is None else rows[low:high]
+            chunk_starts = starts[chunk_rows]
+            origin = int(chunk_starts[0])
+            # Sin pasar de NAME_KEY_SPAN bytes de blob por tramo
+            high = low + max(1, int(np.searchsorted(chunk_starts, origin + NAME_KEY_SPAN)))
+            chunk_starts = chunk_starts[:high - low]
+            chunk_lengths = lengths[slice(low, high) if rows is None else rows[low:high]]
+            data = np.frombuffer(bytes(self.blob[origin + offset:int(chunk_starts[-1]) + offset + 8]), dtype=np.uint8)
+            if len(data):
+                first = (chunk_starts - np.uint64(origin)).astype(np.int64)
+                positions = np.minimum(first[:, None] + columns, len(data) - 1)
+                inside = columns + offset < chunk_lengths[:, None]
+                chunk = np.where(inside, data[positions], 0).astype(np.uint8)
+                words[low:high] = chunk.view('>u8').ravel()
+            low = high
+        return words
+
+    def split_ties(self, words, groups, rows, lengths, offset):
+        # Posiciones de los tramos de palabras iguales (dentro de su grupo) que siguen
+        # empatados: más de una fila y algún nombre más largo que offset. Devuelve
+        # (posiciones, tramo de cada una, cuántos tramos). Las filas que ya son únicas
+        # se descartan antes de mirar los tramos
+        first = np.ones(len(words), dtype=bool)
+        first[1:] = words[1:] != words[:-1]
+        if groups is not None:
+            first[1:] |= groups[1:] != groups[:-1]
+        alone = first.copy()
+        alone[:-1] &= first[1:]
+        tied = np.flatnonzero(~alone).astype(np.uint32)
+        del alone
+        first = first[tied]
+        label = np.cumsum(first, dtype=np.uint32)
+        label -= 1
+        run_starts = np.flatnonzero(first)
+        longest = np.maximum.reduceat(lengths[rows[tied]], run_starts) if len(tied) else run_starts
+        keep = (longest > offset)[label]
+        return tied[keep], label[keep], len(run_starts)
+
+    def refine_ties(self, idx, starts, lengths, positions, groups, offset):
+        # Reordena cada tramo empatado por los 8 bytes siguientes del nombre, por lotes de
+        # tramos enteros para que la memoria de trabajo no crezca con los empates. Dentro
+        # de un tramo las filas siguen en orden creciente: todas las ordenaciones son estables
+        next_positions = []
+        next_groups = []
+        labels = 0
+        low = 0
+        while low < len(positions):
+            high = min(low + NAME_TIE_BATCH, len(positions))
+            if high < len(positions):
+                # El lote acaba donde empieza un tramo; un tramo más grande va entero
+                high = int(np.searchsorted(groups, groups[high]))
+                if high <= low:
+                    high = int(np.searchsorted(groups, groups[low], side='right'))
+            batch = positions[low:high]
+            batch_groups = groups[low:high]
+            rows = idx[batch]
+            if batch_groups[0] == batch_groups[-1]:
+                # Un solo tramo: las filas ya van en orden y el blob se lee hacia delante
+                words = self.name_words(starts, lengths, offset, rows)
+                perm = np.argsort(words, kind='stable').astype(np.uint32)
+            else:
+                by_row = np.argsort(rows, kind='stable')
+                words = np.empty(len(rows), dtype=np.uint64)
+                words[by_row] = self.name_words(starts, lengths, offset, rows[by_row])
+                del by_row
+                # lexsort es estable y toma la última clave como la principal
+                perm = np.lexsort((words, batch_groups)).astype(np.uint32)
+            rows = rows[perm]
+            words = words[perm]
+            del perm
+            idx[batch] = rows
+            tied, label, count = self.split_ties(words, batch_groups, rows, lengths, offset + 8)
+            del words, rows
+            next_positions.append(batch[tied])
+            next_groups.append(label + np.uint32(labels))
+            labels += count
+            low = high
+        if not next_positions:
+            return positions, groups
+        return np.concatenate(next_positions), np.concatenate(next_groups)
+
+    def sorted_by_name(self, reverse, count):
+        # Radix de 8 en 8 bytes: se ordena por los 8 primeros bytes del nombre y después,
+        # solo dentro de los tramos empatados, por los 8 siguientes, hasta deshacer los
+        # empates. La memoria extra es de unas pocas palabras por fila
+        if not count:
+            return array('I')
+        starts = np.frombuffer(self.name_starts[:count], dtype=np.uint64)
+        lengths = self.name_lengths(starts, count)
+        words = self.name_words(starts, lengths, 0)
+        idx = np.argsort(words, kind='stable').astype(np.uint32)
+        words = words[idx]
+        positions, groups, _ = self.split_ties(words, None, idx, lengths, 8)
+        del words
+        offset = 8
+        while len(positions):
+            positions, groups = self.refine_ties(idx, starts, lengths, positions, groups, offset)
+            offset += 8
+        if reverse:
+            idx = idx[::-1]
+        order = array('I')
+        order.frombytes(idx.tobytes())
+        return order
+
+    def without_deleted(self, order):
+        deleted = self.deleted
+        return array('I', (index for index in order if index not in deleted))
+
+    def set_order(self, order, count):
+        # Las filas llegadas mientras se ordenaba se añaden al final; las quitadas
+        # mientras tanto se descartan
+        order.extend(range(count, len(self.sizes)))
+        self.order = self.without_deleted(order) if self.deleted else order
+
+
+class VirtualTable(ttk.Frame):
+    def __init__(self, master, store, columns, formatter, **kwargs):
+        # columns: lista de (id, título, ancho, campo de ordenación)
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.formatter = formatter
+        self.offset = 0
+        self.visible_rows = 1
+        self.selected = None
+        self.sort_field = None
+        self.sort_reverse = False
+        self.sorting = False
+        self.select_callbacks = []
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in columns], show='headings', selectmode='browse')
+        for col_id, title, width, field in columns:
+            self.tree.heading(col_id, text=title, command=lambda f=field: self.sort_by(f))
+            self.tree.column(col_id, width=width)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(1, 'units'))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-1, 'pages') or 'break')
+        self.tree.bind('<Next>', lambda e: self.scroll(1, 'pages') or 'break')
+        self.tree.bind('<Up>', lambda e: self.move_selection(-1) or 'break')
+        self.tree.bind('<Down>', lambda e: self.move_selection(1) or 'break')
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+
+    def bind_select(self, callback):
+        self.select_callbacks.append(callback)
+
+    def row_height(self):
+        return int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+
+    def on_resize(self, event):
+        # La cabecera ocupa aproximadamente una fila
+        rows = max(1, event.height // self.row_height() - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def max_offset(self):
+        return max(0, len(self.store) - self.visible_rows)
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.store)))
+        else:
+            self.scroll(int(value), unit)
+
+    def scroll(self, amount, unit):
+        step = self.visible_rows if unit == 'pages' else 3
+        self.scroll_to(self.offset + amount * step)
+
+    def scroll_to(self, offset):
+        offset = min(max(0, offset), self.max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def move_selection(self, delta):
+        if not len(self.store):
+            return
+        position = 0 if self.selected is None else min(max(0, self.selected + delta), len(self.store) - 1)
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible_rows:
+            self.offset = position - self.visible_rows + 1
+        self.selected = position
+        self.refresh()
+        self.notify_select()
+
+    def clear(self):
+        self.store.clear()
+        self.offset = 0
+        self.selected = None
+        self.refresh()
+
+    def refresh(self):
+        # Solo se materializan las filas visibles; los items del Treeview se reutilizan
+        count = len(self.store)
+        self.offset = min(self.offset, self.max_offset())
+        wanted = min(self.visible_rows, count - self.offset)
+        rows = self.tree.get_children()
+        if len(rows) > wanted:
+            self.tree.delete(*rows[wanted:])
+        for i in range(len(rows), wanted):
+            self.tree.insert('', tk.END, iid=f"row{i}")
+        for i in range(wanted):
+            index = self.store.index_at(self.offset + i)
+            self.tree.item(f"row{i}", values=self.formatter(index))
+
+        # selection_set dispara <<TreeviewSelect>>; on_select ignora la fila ya seleccionada
+        if self.selected is not None and self.offset <= self.selected < self.offset + wanted:
+            self.tree.selection_set(f"row{self.selected - self.offset}")
+        else:
+            self.tree.selection_set(())
+
+        if count:
+            self.scrollbar.set(self.offset / count, (self.offset + wanted) / count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = self.offset + int(selection[0][3:])
+        if position != self.selected:
+            self.selected = position
+            self.notify_select()
+
+    def notify_select(self):
+        for callback in self.select_callbacks:
+            callback(self.selected_index())
+
+    def selected_index(self):
+        if self.selected is None or self.selected >= len(self.store):
+            return None
+        return self.store.index_at(self.selected)
+
+    def sort_by(self, field):
+        if self.sorting:
+            return
+        self.sort_reverse = not self.sort_reverse if field == self.sort_field else False
+        self.sort_field = field
+        self.sorting = True
+        selected = self.selected_index()
+        reverse = self.sort_reverse
+        generation = self.store.generation
+        count = len(self.store.sizes)
+
+        def run():
+            order = self.store.sorted_order(field, reverse, count)
+            self.after(0, finish, order)
+
+        def finish(order):
+            self.sorting = False
+            if generation != self.store.generation:
+                return
+            self.store.set_order(order, count)
+            self.selected = None
+            if selected is not None:
+                # Se conserva la fila seleccionada y se lleva a la vista
+                order = self.store.order
+                self.selected = order.index(selected) if selected in order else None
+                if self.selected is not None:
+                    self.offset = max(0, self.selected - self.visible_rows // 2)
+            self.refresh()
+
+        threading.Thread(target=run, daemon=True).start()